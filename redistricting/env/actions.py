@@ -1,10 +1,88 @@
 """Valid action generation and incremental updates."""
 
-from typing import Dict, List, Set, Tuple
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 
-from redistricting.env.masking import check_contiguity, district_populations, population_bounds
+from redistricting.env.masking import (
+    BoundaryIndex,
+    DistrictConnectivity,
+    PopulationTracker,
+    check_contiguity,
+    local_removal_contiguous,
+)
+from redistricting.graph.store import PrecinctStore
+
+CAP_STRATEGIES = ("first", "uniform", "stratified")
+
+
+def _sample_valid(
+    candidates: List[Tuple[int, int]],
+    assignment: Dict[int, int],
+    strategy: str,
+    rng: Optional[np.random.Generator],
+    limit: int,
+    is_valid: Callable[[int, int], bool],
+) -> List[Tuple[int, int]]:
+    """Draw up to `limit` valid moves from `candidates`, validating only what is drawn.
+
+    `uniform` walks a random permutation; `stratified` shuffles each (source, target)
+    district pair and takes turns between pairs in random order, each turn yielding that
+    pair's next valid move. Either way the result is the subset a reservoir over the valid
+    moves would hold, without validating the rest.
+    """
+    if strategy not in CAP_STRATEGIES or strategy == "first":
+        raise ValueError(f"Not a sampling cap strategy: {strategy!r}")
+    rng = rng if rng is not None else np.random.default_rng()
+    drawn: List[Tuple[int, int]] = []
+    if limit <= 0:
+        return drawn
+    if strategy == "uniform":
+        for idx in rng.permutation(len(candidates)).tolist():
+            if is_valid(*candidates[idx]):
+                drawn.append(candidates[idx])
+                if len(drawn) >= limit:
+                    break
+        return drawn
+
+    groups: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for node, target in candidates:
+        groups.setdefault((assignment[node], target), []).append((node, target))
+    pairs = list(groups.values())
+    queues = []
+    for pair in rng.permutation(len(pairs)).tolist():
+        members = pairs[pair]
+        queues.append(iter([members[i] for i in rng.permutation(len(members)).tolist()]))
+    while queues:
+        remaining = []
+        for queue in queues:
+            for move in queue:
+                if is_valid(*move):
+                    drawn.append(move)
+                    if len(drawn) >= limit:
+                        return drawn
+                    remaining.append(queue)
+                    break
+        queues = remaining
+    return drawn
 
 
 def _is_move_valid(
@@ -14,19 +92,36 @@ def _is_move_valid(
     target_district: int,
     pop_tol: float,
     n_districts: int,
+    populations: Optional[PopulationTracker] = None,
+    connectivity: Optional[DistrictConnectivity] = None,
+    contiguous_districts: Optional[AbstractSet[int]] = None,
 ) -> bool:
     current_district = assignment[node]
     if current_district == target_district:
         return False
-    temp_assignment = dict(assignment)
-    temp_assignment[node] = target_district
-    _, min_allowed_pop, max_allowed_pop = population_bounds(graph, n_districts, pop_tol)
-    pops = district_populations(graph, temp_assignment, [current_district, target_district])
-    if pops[current_district] < min_allowed_pop or pops[target_district] > max_allowed_pop:
+    if populations is None:
+        populations = PopulationTracker.from_graph(graph, assignment, n_districts, pop_tol)
+    if not populations.move_is_feasible(node, current_district, target_district):
         return False
-    if not check_contiguity(graph, temp_assignment, current_district):
+    if connectivity is not None:
+        return connectivity.removal_keeps_contiguous(node) and (
+            connectivity.addition_keeps_contiguous(graph, node, target_district)
+        )
+    if contiguous_districts is not None:
+        # A node adjacent to a contiguous target keeps it contiguous; a contiguous source only
+        # needs the node's same-district neighbours to stay mutually reachable.
+        if current_district in contiguous_districts:
+            source_ok = local_removal_contiguous(graph, assignment, node)
+        else:
+            source_ok = check_contiguity(graph, assignment, current_district, node, target_district)
+        if not source_ok:
+            return False
+        if target_district in contiguous_districts:
+            return any(assignment[nbr] == target_district for nbr in graph.neighbors(node))
+        return check_contiguity(graph, assignment, target_district, node, target_district)
+    if not check_contiguity(graph, assignment, current_district, node, target_district):
         return False
-    if not check_contiguity(graph, temp_assignment, target_district):
+    if not check_contiguity(graph, assignment, target_district, node, target_district):
         return False
     return True
 
@@ -37,19 +132,259 @@ def generate_valid_actions(
     pop_tol: float,
     n_districts: int,
     max_actions: int | None = None,
+    populations: Optional[PopulationTracker] = None,
+    store: Optional[PrecinctStore] = None,
+    parallel: bool = False,
+    n_workers: Optional[int] = None,
+    cap_strategy: str = "first",
+    rng: Optional[np.random.Generator] = None,
+) -> List[Tuple[int, int]]:
+    """Generate legal actions as tuples: (node, target_district).
+
+    `populations` must reflect `assignment`; one is built (a single O(N) pass) if omitted.
+    Contiguity for every candidate comes from one articulation-point pass per district.
+    `parallel` shards the scan by source district across a process pool (see
+    `generate_valid_actions_parallel`). It is opt-in: every call spawns its own pool, which
+    only pays off on large graphs and only when few envs enumerate at once.
+
+    With `max_actions`, `cap_strategy="first"` keeps the first moves in node order;
+    `"uniform"`/`"stratified"` draw the cap with `_sample_valid` and return it sorted. Sampled
+    caps always take the serial path, which validates only the moves it draws.
+    """
+    sampled = max_actions is not None and cap_strategy != "first"
+    if parallel and not sampled:
+        return generate_valid_actions_parallel(
+            graph,
+            assignment,
+            pop_tol,
+            n_districts,
+            max_actions=max_actions,
+            populations=populations,
+            store=store,
+            n_workers=n_workers,
+        )
+    if populations is None:
+        populations = PopulationTracker.from_graph(graph, assignment, n_districts, pop_tol)
+    connectivity = DistrictConnectivity(graph, assignment)
+    candidates = [
+        (node, target_district)
+        for node in graph.nodes()
+        for target_district in {assignment[nbr] for nbr in graph.neighbors(node)}
+    ]
+
+    def is_valid(node: int, target_district: int) -> bool:
+        return _is_move_valid(
+            graph,
+            assignment,
+            node,
+            target_district,
+            pop_tol,
+            n_districts,
+            populations,
+            connectivity,
+        )
+
+    if sampled:
+        return sorted(
+            _sample_valid(candidates, assignment, cap_strategy, rng, max_actions, is_valid)
+        )
+    actions: List[Tuple[int, int]] = []
+    for node, target_district in candidates:
+        if is_valid(node, target_district):
+            actions.append((node, target_district))
+            if max_actions is not None and len(actions) >= max_actions:
+                break
+    return actions
+
+
+@dataclass
+class _MoveShard:
+    """Static arrays a worker needs to validate moves out of any source district."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    edge_sources: np.ndarray
+    node_populations: np.ndarray
+    codes: np.ndarray
+    district_populations: np.ndarray
+    min_pop: float
+    max_pop: float
+    component: np.ndarray
+    component_size: np.ndarray
+    n_components: np.ndarray
+
+
+_WORKER_SHARD: Optional[_MoveShard] = None
+
+
+def _init_move_worker(shard: _MoveShard) -> None:
+    global _WORKER_SHARD
+    _WORKER_SHARD = shard
+
+
+def _pooled_district_moves(code: int) -> List[Tuple[int, int]]:
+    return _district_moves(_WORKER_SHARD, code)
+
+
+def _district_moves(shard: _MoveShard, code: int) -> List[Tuple[int, int]]:
+    """Valid `(row, target_code)` moves out of district `code`, mirroring `_is_move_valid`.
+
+    Same population bounds as `PopulationTracker.move_is_feasible` and the same
+    component/articulation rules as `DistrictConnectivity`.
+    """
+    codes = shard.codes
+    rows = np.flatnonzero(codes == code)
+    inside = (codes[shard.edge_sources] == code) & (codes[shard.indices] == code)
+    subgraph = nx.Graph()
+    subgraph.add_nodes_from(rows.tolist())
+    subgraph.add_edges_from(
+        zip(shard.edge_sources[inside].tolist(), shard.indices[inside].tolist())
+    )
+    articulation = set(nx.articulation_points(subgraph))
+    district_size = len(rows)
+    source_pop = shard.district_populations[code]
+
+    moves: List[Tuple[int, int]] = []
+    for row in rows.tolist():
+        nbrs = shard.indices[shard.indptr[row] : shard.indptr[row + 1]]
+        nbr_codes = codes[nbrs]
+        targets = set(nbr_codes.tolist())
+        targets.discard(code)
+        if not targets:
+            continue
+        node_pop = shard.node_populations[row]
+        if source_pop - node_pop < shard.min_pop:
+            continue
+        if district_size - 1 > 1:
+            if shard.component_size[shard.component[row]] == 1:
+                own_pieces = 0
+            else:
+                own_pieces = 2 if row in articulation else 1
+            if shard.n_components[code] - 1 + own_pieces > 1:
+                continue
+        for target in targets:
+            if shard.district_populations[target] + node_pop > shard.max_pop:
+                continue
+            touched = np.unique(shard.component[nbrs[nbr_codes == target]])
+            if len(touched) == shard.n_components[target]:
+                moves.append((row, target))
+    return moves
+
+
+def generate_valid_actions_parallel(
+    graph: nx.Graph,
+    assignment: Dict[int, int],
+    pop_tol: float,
+    n_districts: int,
+    max_actions: int | None = None,
+    populations: Optional[PopulationTracker] = None,
+    store: Optional[PrecinctStore] = None,
+    n_workers: Optional[int] = None,
 ) -> List[Tuple[int, int]]:
-    """Generate legal actions as tuples: (node, target_district)."""
+    """`generate_valid_actions` with candidate moves sharded by source district.
+
+    Workers receive the CSR adjacency, population arrays, and encoded assignment once (pool
+    initializer) and validate one source district per task. Results are merged by replaying
+    the serial node/target loop, so the output (including `max_actions` truncation) is
+    identical to the serial scan.
+    """
+    if store is None:
+        store = PrecinctStore.from_graph(graph, ["P0010001"])
+    if populations is None:
+        populations = PopulationTracker.from_graph(
+            graph, assignment, n_districts, pop_tol, store=store
+        )
+    labels = list(populations.index)
+    codes = store.assignment_array(assignment, populations.index)
+
+    # Components of every district at once, from the intra-district edges.
+    src, dst = store.edge_sources, store.indices
+    keep = codes[src] == codes[dst]
+    size = store.n_nodes
+    adjacency = csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.int8), (src[keep], dst[keep])), shape=(size, size)
+    )
+    n_comp, component = connected_components(adjacency, directed=False)
+    component_owner = np.empty(n_comp, dtype=np.int64)
+    component_owner[component] = codes
+    shard = _MoveShard(
+        indptr=store.indptr,
+        indices=store.indices,
+        edge_sources=src,
+        node_populations=store.column("P0010001"),
+        codes=codes,
+        district_populations=np.asarray(populations.populations, dtype=np.float64),
+        min_pop=populations.min_allowed_pop,
+        max_pop=populations.max_allowed_pop,
+        component=component,
+        component_size=np.bincount(component, minlength=n_comp),
+        n_components=np.bincount(component_owner, minlength=len(labels)),
+    )
+
+    district_codes = np.unique(codes).tolist()
+    workers = n_workers if n_workers is not None else (os.cpu_count() or 1)
+    if workers > 1 and len(district_codes) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(district_codes)),
+            initializer=_init_move_worker,
+            initargs=(shard,),
+        ) as pool:
+            results = list(pool.map(_pooled_district_moves, district_codes))
+    else:
+        results = [_district_moves(shard, code) for code in district_codes]
+
+    node_ids = store.node_ids.tolist()
+    valid: Dict[Any, Set[Hashable]] = {}
+    for moves in results:
+        for row, target in moves:
+            valid.setdefault(node_ids[row], set()).add(labels[target])
+
     actions: List[Tuple[int, int]] = []
     for node in graph.nodes():
-        target_districts: Set[int] = {assignment[nbr] for nbr in graph.neighbors(node)}
-        for target_district in target_districts:
-            if _is_move_valid(graph, assignment, node, target_district, pop_tol, n_districts):
+        node_valid = valid.get(node)
+        if not node_valid:
+            continue
+        for target_district in {assignment[nbr] for nbr in graph.neighbors(node)}:
+            if target_district in node_valid:
                 actions.append((node, target_district))
                 if max_actions is not None and len(actions) >= max_actions:
                     return actions
     return actions
 
 
+def _moves_touching(
+    graph: nx.Graph,
+    assignment: Dict[int, int],
+    districts: AbstractSet[int],
+    boundary: BoundaryIndex,
+    pop_tol: float,
+    n_districts: int,
+    populations: PopulationTracker,
+    connectivity: Optional[DistrictConnectivity],
+    contiguous_districts: Optional[AbstractSet[int]],
+) -> List[Tuple[int, int]]:
+    """Valid moves that leave or enter any of `districts`, read off the boundary index."""
+    moves: List[Tuple[int, int]] = []
+    for node in boundary.nodes_touching(districts):
+        source_touched = assignment[node] in districts
+        for target_district in boundary.targets(node):
+            if not source_touched and target_district not in districts:
+                continue
+            if _is_move_valid(
+                graph,
+                assignment,
+                node,
+                target_district,
+                pop_tol,
+                n_districts,
+                populations,
+                connectivity,
+                contiguous_districts,
+            ):
+                moves.append((node, target_district))
+    return moves
+
+
 def update_valid_actions_incremental(
     graph: nx.Graph,
     assignment: Dict[int, int],
@@ -60,33 +395,188 @@ def update_valid_actions_incremental(
     pop_tol: float,
     n_districts: int,
     max_actions: int | None = None,
+    populations: Optional[PopulationTracker] = None,
+    contiguous_districts: Optional[AbstractSet[int]] = None,
+    boundary: Optional[BoundaryIndex] = None,
+    cap_strategy: str = "first",
+    rng: Optional[np.random.Generator] = None,
 ) -> List[Tuple[int, int]]:
-    """Incrementally refresh valid actions near affected districts."""
-    retained = [(n, d) for n, d in prev_actions if n != moved_node]
-    affected_nodes = set()
-    for node in graph.nodes():
-        if assignment[node] in {old_district, new_district}:
-            affected_nodes.add(node)
-            affected_nodes.update(graph.neighbors(node))
-
-    refreshed = set(retained)
-    for node in affected_nodes:
-        target_districts = {assignment[nbr] for nbr in graph.neighbors(node)}
-        for target_district in target_districts:
-            action = (node, target_district)
-            if action in refreshed:
-                continue
-            if _is_move_valid(graph, assignment, node, target_district, pop_tol, n_districts):
-                refreshed.add(action)
-
-    # Remove actions that may have become invalid.
-    pruned = [
-        action
-        for action in refreshed
-        if _is_move_valid(graph, assignment, action[0], action[1], pop_tol, n_districts)
+    """Incrementally refresh valid actions after `moved_node` flipped between two districts.
+
+    Only moves leaving or entering `old_district`/`new_district` can change validity, so
+    those are dropped and regenerated from the boundary nodes touching the two districts;
+    every other previous action is kept as is. `populations` and `boundary` must already
+    include the move. When the caller tracks which districts are contiguous
+    (`contiguous_districts`), moves are re-validated with local bounded searches; otherwise
+    a `DistrictConnectivity` index is built.
+
+    With a sampled `cap_strategy` the surviving previous actions are kept and the rest of
+    the `max_actions` budget is refilled from all boundary moves with `_sample_valid`.
+    """
+    if populations is None:
+        populations = PopulationTracker.from_graph(graph, assignment, n_districts, pop_tol)
+    if boundary is None:
+        boundary = BoundaryIndex(graph, assignment)
+    connectivity = None
+    if contiguous_districts is None:
+        connectivity = DistrictConnectivity(graph, assignment)
+    touched = {old_district, new_district}
+    actions = [
+        (node, target)
+        for node, target in prev_actions
+        if assignment[node] not in touched and target not in touched
     ]
-    pruned_sorted = sorted(pruned)
+    if max_actions is not None and cap_strategy != "first":
+        exposed = set(actions)
+        candidates = [
+            (node, target)
+            for node in sorted(boundary.boundary_nodes())
+            for target in boundary.targets(node)
+            if (node, target) not in exposed
+        ]
+        actions.extend(
+            _sample_valid(
+                candidates,
+                assignment,
+                cap_strategy,
+                rng,
+                max_actions - len(actions),
+                lambda node, target: _is_move_valid(
+                    graph,
+                    assignment,
+                    node,
+                    target,
+                    pop_tol,
+                    n_districts,
+                    populations,
+                    connectivity,
+                    contiguous_districts,
+                ),
+            )
+        )
+        return sorted(actions)
+    actions.extend(
+        _moves_touching(
+            graph,
+            assignment,
+            touched,
+            boundary,
+            pop_tol,
+            n_districts,
+            populations,
+            connectivity,
+            contiguous_districts,
+        )
+    )
+    actions.sort()
     if max_actions is not None:
-        return pruned_sorted[:max_actions]
-    return pruned_sorted
+        return actions[:max_actions]
+    return actions
+
+
+class ActionTable:
+    """Fixed global (node, district) action indexing with an in-place legality vector.
+
+    Action `i * n_districts + d` moves the node at row `i` of `node_ids` to the district with
+    code `d`, so an index means the same move at every step; `legal` marks the entries that
+    are currently valid and `n_legal` counts them.
+    """
+
+    def __init__(self, node_ids: Sequence[Any], district_labels: Sequence[Hashable]):
+        self.node_ids = list(node_ids)
+        self.node_index = {node: idx for idx, node in enumerate(self.node_ids)}
+        self.district_labels = list(district_labels)
+        self.district_index = {label: code for code, label in enumerate(self.district_labels)}
+        self.n_districts = len(self.district_labels)
+        self.legal = np.zeros(len(self.node_ids) * self.n_districts, dtype=bool)
+        self.n_legal = 0
+
+    @property
+    def size(self) -> int:
+        return self.legal.size
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.node_ids)
+
+    def node_mask(self) -> np.ndarray:
+        """Rows with at least one legal move (first stage of a factorized choice)."""
+        return self.legal.reshape(self.n_rows, self.n_districts).any(axis=1)
+
+    def district_mask(self, row: int) -> np.ndarray:
+        """Legal target codes for one row (second stage of a factorized choice)."""
+        start = int(row) * self.n_districts
+        return self.legal[start : start + self.n_districts]
+
+    def index(self, node: Any, district: Hashable) -> int:
+        return self.node_index[node] * self.n_districts + self.district_index[district]
+
+    def decode(self, action: int) -> Tuple[Any, Hashable]:
+        row, code = divmod(int(action), self.n_districts)
+        return self.node_ids[row], self.district_labels[code]
+
+    def actions(self) -> List[Tuple[Any, Hashable]]:
+        """Currently legal moves in index order."""
+        return [self.decode(action) for action in np.flatnonzero(self.legal).tolist()]
+
+    def set_actions(self, actions: Iterable[Tuple[Any, Hashable]]) -> None:
+        self.legal[:] = False
+        indices = [self.index(node, district) for node, district in actions]
+        self.legal[np.asarray(indices, dtype=np.int64)] = True
+        self.n_legal = int(np.count_nonzero(self.legal))
+
+
+def update_action_table(
+    table: ActionTable,
+    graph: nx.Graph,
+    assignment: Dict[int, int],
+    old_district: int,
+    new_district: int,
+    moved_node: int,
+    pop_tol: float,
+    n_districts: int,
+    populations: PopulationTracker,
+    boundary: BoundaryIndex,
+    contiguous_districts: Optional[AbstractSet[int]] = None,
+) -> np.ndarray:
+    """In-place counterpart of `update_valid_actions_incremental` for an `ActionTable`.
 
+    Clears the entries that leave or enter the two districts on every row that could hold
+    one, then sets the regenerated moves; no other entry is read or written. Returns the
+    indices of the rows that may have changed, so mirrors of `legal` can follow suit.
+    """
+    connectivity = None
+    if contiguous_districts is None:
+        connectivity = DistrictConnectivity(graph, assignment)
+    touched = {old_district, new_district}
+    codes = np.array([table.district_index[d] for d in touched], dtype=np.int64)
+    # Rows that stopped touching either district did so because `moved_node` left them.
+    rows = boundary.nodes_touching(touched)
+    rows.update(graph.neighbors(moved_node))
+    rows.add(moved_node)
+    k = table.n_districts
+    changed = np.fromiter(
+        (table.node_index[node] for node in rows), dtype=np.int64, count=len(rows)
+    )
+    by_row = table.legal.reshape(-1, k)
+    before = int(np.count_nonzero(by_row[changed]))
+    for node in rows:
+        start = table.node_index[node] * k
+        if assignment[node] in touched:
+            table.legal[start : start + k] = False
+        else:
+            table.legal[start + codes] = False
+    for node, target in _moves_touching(
+        graph,
+        assignment,
+        touched,
+        boundary,
+        pop_tol,
+        n_districts,
+        populations,
+        connectivity,
+        contiguous_districts,
+    ):
+        table.legal[table.index(node, target)] = True
+    table.n_legal += int(np.count_nonzero(by_row[changed])) - before
+    return changed
@@ -1,18 +1,49 @@
 """Core Gymnasium environment for redistricting."""
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 import gymnasium as gym
 import networkx as nx
 import numpy as np
+import torch
+from gerrychain import Partition
 from gymnasium import spaces
 
-from redistricting.env.actions import generate_valid_actions, update_valid_actions_incremental
-from redistricting.env.masking import build_action_mask
+from redistricting.env.actions import (
+    CAP_STRATEGIES,
+    ActionTable,
+    _is_move_valid,
+    generate_valid_actions,
+    update_action_table,
+    update_valid_actions_incremental,
+)
+from redistricting.env.masking import (
+    BoundaryIndex,
+    DeviceActionMask,
+    DistrictConnectivity,
+    PopulationTracker,
+    build_action_mask,
+    district_population_array,
+)
 from redistricting.env.observations import FeatureConfig, build_node_features
+from redistricting.graph.coarsen import CoarseLevel, build_hierarchy, project_assignment
 from redistricting.graph.construction import build_precinct_graph
-from redistricting.graph.metrics import MCalc
+from redistricting.graph.metrics import (
+    BOUNDARY_COLUMNS,
+    METRIC_REGISTRY,
+    TALLY_COLUMNS,
+    MCalc,
+    MetricsEngine,
+)
+from redistricting.graph.shared import (
+    AttachedPrecinctGraph,
+    SharedGraphHandle,
+    attach_precinct_graph,
+)
+from redistricting.graph.store import PrecinctStore, district_index
 from redistricting.reward.shaping import (
     DeltaRewardWrapper,
     EMADeltaRewardWrapper,
@@ -21,6 +52,24 @@ from redistricting.reward.shaping import (
 from redistricting.reward.zscore import ZScoreReward
 
 
+# Metrics `step` reports in `info` whatever the reward weights are.
+INFO_METRICS = ("EfficiencyGap",)
+
+
+@dataclass(frozen=True)
+class BaselineSnapshot:
+    """Immutable copy of the baseline map captured once at env construction."""
+
+    partition: Partition
+    assignment: Mapping[int, int]
+    valid_actions: Tuple[Tuple[int, int], ...]
+    assignment_codes: np.ndarray
+    district_populations: np.ndarray
+    district_tallies: np.ndarray
+    contiguous_districts: frozenset
+    boundary: BoundaryIndex
+
+
 class GerrymanderingEnv(gym.Env):
     """Graph-based redistricting environment with hard action masking."""
 
@@ -44,8 +93,17 @@ class GerrymanderingEnv(gym.Env):
         ema_alpha: float = 0.1,
         include_geometry_metrics: bool = False,
         max_action_space_size: Optional[int] = None,
+        shared_graph: Optional[SharedGraphHandle] = None,
+        coarse_levels: int = 0,
+        action_mode: str = "list",
+        action_cap_strategy: str = "first",
+        parallel_actions: bool = False,
     ):
         super().__init__()
+        if action_mode not in ("list", "table", "factorized", "lazy"):
+            raise ValueError(f"Unknown action_mode: {action_mode!r}")
+        if action_cap_strategy not in CAP_STRATEGIES:
+            raise ValueError(f"Unknown action_cap_strategy: {action_cap_strategy!r}")
         self.state = state
         self.basepath = basepath
         self.pop_tol = pop_tol
@@ -53,10 +111,34 @@ class GerrymanderingEnv(gym.Env):
         self.feature_config = feature_config
         self.include_geometry_metrics = include_geometry_metrics
         self.max_action_space_size = max_action_space_size
+        # "list": Discrete over the compacted valid-action list (index meaning shifts per step).
+        # "table": Discrete over a fixed node x district table; never truncated.
+        # "factorized": MultiDiscrete (node row, district code) over the same table, with a
+        # node mask and a per-node district mask instead of one mask over all pairs.
+        # "lazy": MultiDiscrete (node row, district code) with no mask maintenance at all;
+        # each step validates only the chosen move. Pair with `sample_legal_move`.
+        self.action_mode = action_mode
+        # How `max_action_space_size` picks the exposed moves: "first" in node order, or a
+        # "uniform"/"stratified" (per district pair) sample drawn with `self.np_random`.
+        self.action_cap_strategy = action_cap_strategy
+        # Shard full action enumeration across a process pool; see `generate_valid_actions`.
+        self.parallel_actions = parallel_actions
         self.reward_mode = reward_mode
         self.score_reward_scale = float(score_reward_scale)
 
-        self.graph, self.partition = build_precinct_graph(state, basepath)
+        self._shared_graph: Optional[AttachedPrecinctGraph] = None
+        if shared_graph is not None:
+            # Static precinct data was published once by the parent; attach without copying.
+            self._shared_graph = attach_precinct_graph(shared_graph)
+            if coarse_levels > 0:
+                # Coarsening sums node attributes and edge boundaries off the graph itself.
+                self._shared_graph.copy_attributes()
+            self.graph, self.partition = self._shared_graph.graph, self._shared_graph.partition
+        else:
+            # Shapes stay in the on-disk geometry store; geometry metrics decode them on demand.
+            self.graph, self.partition = build_precinct_graph(
+                state, basepath, include_geometry=False
+            )
         self.metrics_calc = MCalc()
 
         if reward_fn is None:
@@ -74,23 +156,215 @@ class GerrymanderingEnv(gym.Env):
         )
 
         self.n_districts = len(self.partition.parts)
-        self.n_precincts = len(self.graph.nodes)
-        self._baseline_assignment = dict(self.partition.assignment)
         self.current_step = 0
 
         self._cached_graph_observation: Optional[Tuple[nx.Graph, np.ndarray]] = None
-        self._partition_hash: Optional[int] = None
+        # Created on the first `get_action_mask_tensor` call, then kept in sync by `step`.
+        self._device_mask: Optional[DeviceActionMask] = None
+
+        self._store_columns = (
+            feature_config.columns() + tuple(TALLY_COLUMNS) + tuple(BOUNDARY_COLUMNS)
+        )
+        self._district_labels = list(district_index(self.partition.parts.keys()))
+        self._district_index = district_index(self._district_labels)
+        # Level 0 is the precinct graph; with `coarse_levels` the episode starts on the
+        # coarsest supernode graph and `refine()` steps back down towards precincts.
+        self.hierarchy: List[CoarseLevel] = build_hierarchy(
+            self.graph, self.partition, coarse_levels
+        )
+        self._level_states: Dict[
+            int,
+            Tuple[
+                PrecinctStore,
+                PopulationTracker,
+                MetricsEngine,
+                BaselineSnapshot,
+                Optional[ActionTable],
+            ],
+        ] = {}
+        self._start_level = len(self.hierarchy) - 1
+        self._bind_level(self._start_level)
+        self._total_population = float(self.store.column("P0010001").sum())
+        self._restore_baseline()
+        self.action_space = self._make_action_space()
+        self.observation_space = spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
 
-        self._valid_actions = generate_valid_actions(
+    @property
+    def partition(self) -> Partition:
+        """Current plan. `step` only updates the live assignment in the boundary index, so
+        after moves the partition is rebuilt here, once, on first read."""
+        if self._partition is None:
+            self._partition = Partition(
+                self.graph, dict(self._boundary.assignment), self._partition_updaters
+            )
+        return self._partition
+
+    @partition.setter
+    def partition(self, partition: Partition) -> None:
+        self._partition = partition
+        self._partition_updaters = partition.updaters
+
+    def _bind_level(self, level: int) -> None:
+        """Point graph, store, and baseline snapshot at one hierarchy level (cached per level)."""
+        self.level = level
+        self.graph = self.hierarchy[level].graph
+        self.n_precincts = len(self.graph.nodes)
+        if level not in self._level_states:
+            if level == 0 and self._shared_graph is not None:
+                store = self._shared_graph.store
+            else:
+                store = PrecinctStore.from_graph(self.graph, self._store_columns)
+            self.store = store
+            self.partition = self.hierarchy[level].partition
+            self._populations = PopulationTracker.from_graph(
+                self.graph,
+                self.partition.assignment,
+                self.n_districts,
+                self.pop_tol,
+                store=store,
+                index=self._district_index,
+            )
+            self._metrics_engine = MetricsEngine(
+                store,
+                store.assignment_array(self.partition.assignment, self._district_index),
+                len(self._district_labels),
+            )
+            table = None
+            if self.action_mode in ("table", "factorized"):
+                table = ActionTable(store.node_ids.tolist(), self._district_labels)
+            self._level_states[level] = (
+                store,
+                self._populations,
+                self._metrics_engine,
+                self._capture_baseline(),
+                table,
+            )
+        (
+            self.store,
+            self._populations,
+            self._metrics_engine,
+            self._baseline,
+            self._action_table,
+        ) = self._level_states[level]
+        self._cached_graph_observation = None
+
+    def refine(self) -> bool:
+        """Project the current plan one level finer and continue there.
+
+        Returns False when already at precinct level.
+        """
+        if self.level == 0:
+            return False
+        fine_to_coarse = self.hierarchy[self.level].fine_to_coarse
+        assignment = project_assignment(self._boundary.assignment, fine_to_coarse)
+        updaters = self.partition.updaters
+        self._bind_level(self.level - 1)
+        self.partition = Partition(self.graph, assignment, updaters)
+        self._baseline_assignment = self._baseline.assignment
+        self._distance = self._count_distance(assignment)
+        self._assignment_codes = self.store.assignment_array(assignment, self._district_index)
+        self._populations.populations = district_population_array(
+            self.store, self._assignment_codes, len(self._district_labels)
+        )
+        self._metrics_engine.load(self._assignment_codes)
+        self._contiguous_districts = DistrictConnectivity(
+            self.graph, assignment
+        ).contiguous_districts()
+        self._boundary = BoundaryIndex(self.graph, assignment)
+        valid_actions = self._enumerate_valid_actions(assignment)
+        if self._action_table is not None:
+            self._action_table.set_actions(valid_actions)
+        else:
+            self._valid_actions = valid_actions
+        self.action_space = self._make_action_space()
+        self._reload_device_mask()
+        return True
+
+    def precinct_assignment(self) -> Dict:
+        """Return the current plan mapped down to precinct-level nodes."""
+        assignment = dict(self.partition.assignment)
+        for level in range(self.level, 0, -1):
+            assignment = project_assignment(assignment, self.hierarchy[level].fine_to_coarse)
+        return assignment
+
+    def _capture_baseline(self) -> BaselineSnapshot:
+        assignment = dict(self.partition.assignment)
+        valid_actions = self._enumerate_valid_actions(assignment)
+        codes = self.store.assignment_array(assignment, self._district_index)
+        district_pops = self._populations.populations.copy()
+        tallies = self._metrics_engine.tallies.copy()
+        for array in (codes, district_pops, tallies):
+            array.setflags(write=False)
+        return BaselineSnapshot(
+            partition=self.partition,
+            assignment=MappingProxyType(assignment),
+            valid_actions=tuple(valid_actions),
+            assignment_codes=codes,
+            district_populations=district_pops,
+            district_tallies=tallies,
+            contiguous_districts=frozenset(
+                DistrictConnectivity(self.graph, assignment).contiguous_districts()
+            ),
+            boundary=BoundaryIndex(self.graph, assignment),
+        )
+
+    def _restore_baseline(self) -> None:
+        """Point the env back at the baseline snapshot; no file I/O or action regeneration."""
+        self.partition = self._baseline.partition
+        self._baseline_assignment = self._baseline.assignment
+        if self._action_table is not None:
+            self._action_table.set_actions(self._baseline.valid_actions)
+        else:
+            self._valid_actions = list(self._baseline.valid_actions)
+        self._assignment_codes = self._baseline.assignment_codes.copy()
+        self._populations.populations = self._baseline.district_populations.copy()
+        self._metrics_engine.tallies = self._baseline.district_tallies.copy()
+        self._metrics_engine.sizes = np.bincount(
+            self._assignment_codes, minlength=len(self._district_labels)
+        )
+        self._contiguous_districts = set(self._baseline.contiguous_districts)
+        self._boundary = self._baseline.boundary.copy()
+        self._distance = 0
+
+    def _enumerate_valid_actions(self, assignment: Dict) -> List[Tuple[int, int]]:
+        if self.action_mode == "lazy":
+            return []
+        return generate_valid_actions(
             self.graph,
-            dict(self.partition.assignment),
+            assignment,
             self.pop_tol,
             self.n_districts,
-            max_actions=self.max_action_space_size,
+            max_actions=self._max_actions(),
+            populations=self._populations,
+            store=self.store,
+            parallel=self.parallel_actions,
+            cap_strategy=self.action_cap_strategy,
+            rng=self.np_random,
         )
-        self._initial_action_space_size = len(self._valid_actions)
-        self.action_space = spaces.Discrete(max(1, self._initial_action_space_size))
-        self.observation_space = spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
+
+    def _max_actions(self) -> Optional[int]:
+        return self.max_action_space_size if self.action_mode == "list" else None
+
+    def _action_space_size(self) -> int:
+        if self._action_table is not None:
+            return self._action_table.size
+        if self.action_mode == "lazy":
+            return self.store.n_nodes * len(self._district_labels)
+        return max(1, len(self._valid_actions))
+
+    def _make_action_space(self) -> spaces.Space:
+        if self.action_mode == "factorized":
+            return spaces.MultiDiscrete([self._action_table.n_rows, self._action_table.n_districts])
+        if self.action_mode == "lazy":
+            return spaces.MultiDiscrete([self.store.n_nodes, len(self._district_labels)])
+        return spaces.Discrete(self._action_space_size())
+
+    def _n_valid_actions(self) -> int:
+        if self.action_mode == "lazy":
+            return -1  # never enumerated
+        if self._action_table is not None:
+            return self._action_table.n_legal
+        return len(self._valid_actions)
 
     def _resolve_baseline_path(self) -> Path:
         base_path = Path(self.basepath)
@@ -103,77 +377,292 @@ class GerrymanderingEnv(gym.Env):
 
     def get_graph_observation(self) -> Tuple[nx.Graph, np.ndarray]:
         """Return cached tuple (graph, node_features)."""
-        current_partition_hash = hash(tuple(sorted(self.partition.assignment.items())))
-        if self._cached_graph_observation is None or self._partition_hash != current_partition_hash:
+        if self._cached_graph_observation is None:
             features = build_node_features(
-                self.graph, dict(self.partition.assignment), self.n_districts, self.feature_config
+                self.graph,
+                self._boundary.assignment,
+                self.n_districts,
+                self.feature_config,
+                store=self.store,
             )
             self._cached_graph_observation = (self.graph, features)
-            self._partition_hash = current_partition_hash
         return self._cached_graph_observation
 
     def get_valid_action_mask(self) -> np.ndarray:
-        """Return binary mask for current valid actions."""
+        """Return binary mask for current valid actions.
+
+        In factorized mode this is the node mask; see `get_district_mask` for the second stage.
+        """
+        if self.action_mode == "lazy":
+            raise RuntimeError("Lazy action mode keeps no mask; use sample_legal_move()")
+        if self.action_mode == "factorized":
+            return self._action_table.node_mask().astype(np.float32)
+        if self._action_table is not None:
+            return self._action_table.legal.astype(np.float32)
         return build_action_mask(self._valid_actions, self.action_space.n)
 
+    def get_action_mask_tensor(self, device: Optional[torch.device] = None) -> torch.Tensor:
+        """Return the env-owned `torch.bool` mask on `device`, matching `get_valid_action_mask`.
+
+        The tensor persists across steps and is updated in place, so callers that keep it past
+        `step` must copy it.
+        """
+        if self.action_mode == "lazy":
+            raise RuntimeError("Lazy action mode keeps no mask; use sample_legal_move()")
+        if device is None:
+            device = self._device_mask.device if self._device_mask is not None else "cpu"
+        if self._device_mask is None or self._device_mask.device != torch.device(device):
+            self._device_mask = DeviceActionMask(self.get_valid_action_mask(), device)
+        return self._device_mask.tensor
+
+    def _reload_device_mask(self) -> None:
+        if self._device_mask is None:
+            return
+        mask = self.get_valid_action_mask()
+        if mask.shape == tuple(self._device_mask.tensor.shape):
+            self._device_mask.load(mask)
+        else:
+            self._device_mask = DeviceActionMask(mask, self._device_mask.device)
+
+    def _sync_device_mask(self, rows: Optional[np.ndarray]) -> None:
+        """Write only what the last move changed into the device mask."""
+        if self._device_mask is None:
+            return
+        if self._action_table is None:
+            self._device_mask.set_prefix(len(self._valid_actions))
+            return
+        legal = self._action_table.legal.reshape(self._action_table.n_rows, -1)[rows]
+        if self.action_mode == "factorized":
+            legal = legal.any(axis=1, keepdims=True)
+        self._device_mask.update_rows(rows, legal)
+
+    def get_district_mask(self, node: int) -> np.ndarray:
+        """Return the binary target-district mask for one node row (factorized mode)."""
+        return self._action_table.district_mask(node).astype(np.float32)
+
+    def sample_legal_move(
+        self, rng: Optional[np.random.Generator] = None, max_tries: int = 1000
+    ) -> Optional[Tuple[int, int]]:
+        """Draw one legal move as (node row, district code) without enumerating the action set.
+
+        Proposals are random oriented cut edges (u, v): u moves into v's district. A move (u, d)
+        is proposed once per edge from u into d, so it is kept with probability 1 / that count,
+        which makes the draw uniform over legal moves. Only the kept candidate is checked for
+        legality; expected cost is O(1) while legal moves are not rare. Returns None when the
+        plan has no cut edges or `max_tries` proposals were all rejected. The encoding is the
+        one `step` takes in "factorized" and "lazy" modes.
+        """
+        rng = self.np_random if rng is None else rng
+        assignment = self._boundary.assignment
+        for _ in range(max_tries):
+            edge = self._boundary.sample_cut_edge(rng)
+            if edge is None:
+                return None
+            node, other = edge if rng.random() < 0.5 else edge[::-1]
+            target = assignment[other]
+            if rng.random() * self._boundary.neighbor_districts[node][target] >= 1.0:
+                continue
+            if self._is_legal_move(node, target):
+                return self.store.node_index[node], self._district_index[target]
+        return None
+
+    def move_score_deltas(self) -> np.ndarray:
+        """Reward-score change of every currently legal move, evaluated in one vectorized pass.
+
+        Aligned with the action encoding: one entry per `_valid_actions` index in list mode,
+        or one per flat table index (NaN where illegal) in table and factorized modes. Scores
+        use the tally metrics from `MetricsEngine`, so Polsby-Popper never contributes.
+        """
+        if self.action_mode == "lazy":
+            raise RuntimeError("Lazy action mode keeps no action set to score")
+        if self._action_table is not None:
+            legal = np.flatnonzero(self._action_table.legal)
+            rows, targets = np.divmod(legal, self._action_table.n_districts)
+        else:
+            rows = np.fromiter(
+                (self.store.node_index[node] for node, _ in self._valid_actions),
+                dtype=np.int64,
+                count=len(self._valid_actions),
+            )
+            targets = np.fromiter(
+                (self._district_index[target] for _, target in self._valid_actions),
+                dtype=np.int64,
+                count=len(self._valid_actions),
+            )
+        candidates = self._metrics_engine.candidate_metrics(
+            rows, self._assignment_codes[rows], targets
+        )
+        current = {
+            name: np.asarray([value], dtype=np.float64)
+            for name, value in self._metrics_engine.metrics().items()
+        }
+        deltas = self._score_metric_arrays(candidates) - self._score_metric_arrays(current)[0]
+        if self._action_table is None:
+            return deltas
+        table_deltas = np.full(self._action_table.size, np.nan)
+        table_deltas[legal] = deltas
+        return table_deltas
+
+    def _score_metric_arrays(self, metric_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        score_arrays = getattr(self.reward_fn, "score_arrays", None)
+        if score_arrays is not None:
+            return score_arrays(metric_arrays, self.reward_weights)
+        n_values = len(next(iter(metric_arrays.values())))
+        return np.array(
+            [
+                self.reward_fn(
+                    {name: float(values[i]) for name, values in metric_arrays.items()},
+                    self.reward_weights,
+                )
+                for i in range(n_values)
+            ],
+            dtype=np.float64,
+        )
+
+    def _is_legal_move(self, node: int, target: int) -> bool:
+        return _is_move_valid(
+            self.graph,
+            self._boundary.assignment,
+            node,
+            target,
+            self.pop_tol,
+            self.n_districts,
+            self._populations,
+            None,
+            self._contiguous_districts,
+        )
+
+    def _active_metrics(self) -> Optional[Tuple[str, ...]]:
+        """Metrics the reward and `info` actually read, or None to compute them all.
+
+        `ZScoreReward` ignores metrics without weight, so zero-weighted ones (and their
+        inputs, e.g. geometry for Polsby-Popper) are skipped; other reward functions may read
+        any metric.
+        """
+        if not isinstance(self.reward_fn, ZScoreReward):
+            return None
+        names = {name for name, weight in self.reward_weights.items() if weight}
+        names.update(INFO_METRICS)
+        return tuple(name for name in METRIC_REGISTRY if name in names)
+
     def _distance_from_baseline(self) -> int:
+        """Nodes off their baseline district, kept current by `step`."""
+        return self._distance
+
+    def _count_distance(self, assignment: Mapping) -> int:
         return sum(
             1
-            for node in self.graph.nodes()
-            if self.partition.assignment[node] != self._baseline_assignment.get(node, -1)
+            for node, district in assignment.items()
+            if district != self._baseline_assignment.get(node, -1)
         )
 
     def _max_population_deviation(self) -> float:
-        total_pop = sum(self.graph.nodes[n].get("P0010001", 0) for n in self.graph.nodes())
-        ideal_pop = total_pop / self.n_districts
-        pop_deviations = []
-        for district_id in self.partition.parts.keys():
-            district_pop = sum(
-                self.graph.nodes[n].get("P0010001", 0) for n in self.partition.parts[district_id]
-            )
-            pop_deviations.append(abs(district_pop - ideal_pop) / ideal_pop)
-        return float(max(pop_deviations) * 100 if pop_deviations else 0.0)
+        ideal_pop = self._total_population / self.n_districts
+        present = self._metrics_engine.sizes > 0
+        populations = self._populations.populations
+        pop_deviations = np.abs(populations[present] - ideal_pop) / ideal_pop
+        return float(pop_deviations.max() * 100 if pop_deviations.size else 0.0)
 
     def step(self, action: int):
         """Apply action and return Gymnasium 5-tuple."""
         terminated = False
         truncated = False
 
-        if action >= len(self._valid_actions):
+        if self.action_mode == "lazy":
+            row, code = (int(part) for part in action)
+            in_bounds = 0 <= row < self.store.n_nodes and 0 <= code < len(self._district_labels)
+            illegal = not in_bounds
+            if in_bounds:
+                node = self.store.node_ids[row].item()
+                target_district = self._district_labels[code]
+                illegal = not self._is_legal_move(node, target_district)
+            action = row * len(self._district_labels) + code
+        else:
+            if self.action_mode == "factorized":
+                row, code = (int(part) for part in action)
+                table = self._action_table
+                in_range = 0 <= row < table.n_rows and 0 <= code < table.n_districts
+                action = row * table.n_districts + code if in_range else -1
+            if self._action_table is not None:
+                in_bounds = 0 <= action < self._action_table.size
+                illegal = not in_bounds or not self._action_table.legal[action]
+            else:
+                in_bounds = action < len(self._valid_actions)
+                illegal = not in_bounds
+        if illegal:
             info = {
-                "error": "Action index out of bounds",
+                "error": "Action index out of bounds" if not in_bounds else "Illegal action",
                 "action": int(action),
-                "valid_actions_count": len(self._valid_actions),
-                "action_space_size": self.action_space.n,
+                "valid_actions_count": self._n_valid_actions(),
+                "action_space_size": self._action_space_size(),
             }
             return self._get_observation(), np.float32(-10.0), True, False, info
 
-        node, target_district = self._valid_actions[action]
-        old_district = self.partition.assignment[node]
-        new_assignment = dict(self.partition.assignment)
-        new_assignment[node] = target_district
-
-        from gerrychain import Partition
-
-        self.partition = Partition(self.graph, new_assignment, self.partition.updaters)
-        self._valid_actions = update_valid_actions_incremental(
-            self.graph,
-            dict(self.partition.assignment),
-            old_district,
-            target_district,
-            node,
-            self._valid_actions,
-            self.pop_tol,
-            self.n_districts,
-            self.max_action_space_size,
+        if self._action_table is not None:
+            node, target_district = self._action_table.decode(action)
+        elif self.action_mode != "lazy":
+            node, target_district = self._valid_actions[action]
+        # The boundary index owns the live assignment; `partition` is rebuilt only when read.
+        new_assignment = self._boundary.assignment
+        old_district = new_assignment[node]
+        baseline_district = self._baseline_assignment.get(node, -1)
+        self._distance += (target_district != baseline_district) - (
+            old_district != baseline_district
         )
+        self._populations.apply_move(node, old_district, target_district)
+        self._boundary.apply_move(node, old_district, target_district)
+        self._partition = None
+        row = self.store.node_index[node]
+        old_code = self._district_index[old_district]
+        new_code = self._district_index[target_district]
+        self._assignment_codes[row] = new_code
+        self._metrics_engine.apply_move(row, old_code, new_code)
+        # A legal move leaves both of its districts contiguous.
+        self._contiguous_districts.update((old_district, target_district))
+        changed_rows = None
+        if self._action_table is not None:
+            changed_rows = update_action_table(
+                self._action_table,
+                self.graph,
+                new_assignment,
+                old_district,
+                target_district,
+                node,
+                self.pop_tol,
+                self.n_districts,
+                self._populations,
+                self._boundary,
+                contiguous_districts=self._contiguous_districts,
+            )
+        elif self.action_mode != "lazy":
+            self._valid_actions = update_valid_actions_incremental(
+                self.graph,
+                new_assignment,
+                old_district,
+                target_district,
+                node,
+                self._valid_actions,
+                self.pop_tol,
+                self.n_districts,
+                self.max_action_space_size,
+                populations=self._populations,
+                contiguous_districts=self._contiguous_districts,
+                boundary=self._boundary,
+                cap_strategy=self.action_cap_strategy,
+                rng=self.np_random,
+            )
+        self._sync_device_mask(changed_rows)
         self._cached_graph_observation = None
-        self._partition_hash = None
 
-        metrics_df = self.metrics_calc.calculate_metrics(
-            self.partition, include_geometry=self.include_geometry_metrics
-        )
-        metrics = metrics_df.iloc[0].to_dict()
+        active = self._active_metrics()
+        if self.include_geometry_metrics:
+            metrics_df = self.metrics_calc.calculate_metrics(
+                self.partition, include_geometry=True, store=self.store, metrics=active
+            )
+            metrics = metrics_df.iloc[0].to_dict()
+        else:
+            # Tally metrics only: O(k) from the incrementally maintained district tallies.
+            metrics = self._metrics_engine.metrics(active)
         total_score = self.reward_fn(metrics, self.reward_weights)
         distance = self._distance_from_baseline()
         max_pop_deviation = self._max_population_deviation()
@@ -185,8 +674,10 @@ class GerrymanderingEnv(gym.Env):
             reward = np.float32(self.delta_reward(total_score, distance))
 
         self.current_step += 1
-        no_valid_actions = self.get_valid_action_mask().sum() == 0
-        terminated = bool(no_valid_actions)
+        # Lazy mode never knows the legal-move count; only truncation ends its episodes.
+        n_valid = self._n_valid_actions()
+        terminated = n_valid == 0
+
         truncated = bool(self.current_step >= self.max_steps)
 
         info = {
@@ -195,7 +686,7 @@ class GerrymanderingEnv(gym.Env):
             "old_district": int(old_district),
             "new_district": int(target_district),
             "step": int(self.current_step),
-            "valid_actions": int(self.get_valid_action_mask().sum()),
+            "valid_actions": n_valid,
             "distance_from_baseline": int(distance),
             "total_score": float(total_score),
             "efficiency_gap": float(metrics.get("EfficiencyGap", 0.0)),
@@ -207,26 +698,30 @@ class GerrymanderingEnv(gym.Env):
         """Reset env to baseline map."""
         del options
         super().reset(seed=seed)
-        self.graph, self.partition = build_precinct_graph(self.state, self.basepath)
-        self._baseline_assignment = dict(self.partition.assignment)
+        if self.level != self._start_level:
+            self._bind_level(self._start_level)
+        self._restore_baseline()
+        if self._max_actions() is not None and self.action_cap_strategy != "first":
+            # Draw each episode's capped sample from the freshly seeded `np_random`.
+            self._valid_actions = self._enumerate_valid_actions(dict(self._baseline_assignment))
         self.current_step = 0
         self.delta_reward.reset()
         self.ema_delta_reward.reset()
         self._cached_graph_observation = None
-        self._partition_hash = None
-        self._valid_actions = generate_valid_actions(
-            self.graph,
-            dict(self.partition.assignment),
-            self.pop_tol,
-            self.n_districts,
-            max_actions=self.max_action_space_size,
-        )
-        self.action_space = spaces.Discrete(max(1, self._initial_action_space_size))
+        self.action_space = self._make_action_space()
+        self._reload_device_mask()
         return self._get_observation(), {}
 
+    def close(self):
+        """Detach from a shared graph publication, if any."""
+        if self._shared_graph is not None:
+            self._shared_graph.close()
+            self._shared_graph = None
+        super().close()
+
     def render(self):
         """Render summary stats."""
         print(
-            f"Step={self.current_step}, Districts={self.n_districts}, ValidActions={len(self._valid_actions)}"
+            f"Step={self.current_step}, Districts={self.n_districts}, ValidActions={self._n_valid_actions()}"
         )
 
@@ -1,9 +1,15 @@
 """Action validity and masking helpers."""
 
-from typing import Dict, Iterable, List, Tuple
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
 
 import networkx as nx
 import numpy as np
+import torch
+
+from redistricting.graph.store import PrecinctStore, district_index
+
+LOCAL_CONTIGUITY_BUDGET = 512
 
 
 def build_action_mask(valid_actions: List[Tuple[int, int]], action_space_size: int) -> np.ndarray:
@@ -13,9 +19,60 @@ def build_action_mask(valid_actions: List[Tuple[int, int]], action_space_size: i
     return mask
 
 
-def check_contiguity(graph: nx.Graph, assignment: Dict[int, int], district: int) -> bool:
-    """Return True if all nodes assigned to `district` are connected."""
-    district_nodes = [node for node, dist in assignment.items() if dist == district]
+class DeviceActionMask:
+    """Persistent `torch.bool` action mask on one device, updated in place between steps.
+
+    Policies can consume `tensor` directly instead of converting a fresh NumPy mask each
+    step. Only the entries a move can change are written: a prefix for compacted action
+    lists, or whole rows (`tensor` viewed as `(-1, width)`) for table-backed masks.
+    """
+
+    def __init__(self, mask: np.ndarray, device: torch.device):
+        self.device = torch.device(device)
+        self.tensor = torch.zeros(mask.shape, dtype=torch.bool, device=self.device)
+        self._prefix = 0
+        self.load(mask)
+
+    def load(self, mask: np.ndarray) -> None:
+        """Overwrite the whole mask (episode start, level change)."""
+        self.tensor.copy_(torch.from_numpy(np.asarray(mask, dtype=bool)))
+        self._prefix = int(np.count_nonzero(mask))
+
+    def set_prefix(self, n_valid: int) -> None:
+        """Mark the first `n_valid` entries legal; only the entries in between flip."""
+        n_valid = min(int(n_valid), self.tensor.numel())
+        if n_valid > self._prefix:
+            self.tensor[self._prefix : n_valid] = True
+        elif n_valid < self._prefix:
+            self.tensor[n_valid : self._prefix] = False
+        self._prefix = n_valid
+
+    def update_rows(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Copy `values` (shape `(len(rows), width)`) into the given rows."""
+        if len(rows) == 0:
+            return
+        view = self.tensor.view(-1, values.shape[1])
+        index = torch.from_numpy(rows).to(self.device)
+        view[index] = torch.from_numpy(np.ascontiguousarray(values)).to(self.device)
+
+
+def check_contiguity(
+    graph: nx.Graph,
+    assignment: Dict[int, int],
+    district: int,
+    moved_node: Optional[int] = None,
+    moved_to: Optional[int] = None,
+) -> bool:
+    """Return True if all nodes assigned to `district` are connected.
+
+    `moved_node`/`moved_to` evaluate the assignment as if that single flip were applied,
+    without copying `assignment`.
+    """
+    district_nodes = [
+        node
+        for node, dist in assignment.items()
+        if (moved_to if node == moved_node else dist) == district
+    ]
     if len(district_nodes) <= 1:
         return True
     if len(district_nodes) == 2:
@@ -24,17 +81,257 @@ def check_contiguity(graph: nx.Graph, assignment: Dict[int, int], district: int)
     return nx.is_connected(district_subgraph)
 
 
-def population_bounds(graph: nx.Graph, n_districts: int, pop_tol: float) -> Tuple[float, float, float]:
+def local_removal_contiguous(
+    graph: nx.Graph,
+    assignment: Mapping[Any, Hashable],
+    node: Any,
+    budget: int = LOCAL_CONTIGUITY_BUDGET,
+) -> bool:
+    """Return True if a contiguous district stays contiguous after `node` leaves it.
+
+    Runs a simultaneous BFS from the node's same-district neighbours, merging searches as
+    they meet: success once all have met, failure as soon as one search group runs out of
+    frontier. Past `budget` visited nodes it falls back to `check_contiguity`. Only valid
+    when the district is contiguous before the move.
+    """
+    district = assignment[node]
+    sources = list(dict.fromkeys(n for n in graph.neighbors(node) if assignment[n] == district))
+    if len(sources) <= 1:
+        return True
+
+    parent = list(range(len(sources)))
+    pending = [1] * len(sources)
+    groups = len(sources)
+
+    def find(label: int) -> int:
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    owner = {source: label for label, source in enumerate(sources)}
+    queue = deque(sources)
+    while queue:
+        current = queue.popleft()
+        root = find(owner[current])
+        pending[root] -= 1
+        for nbr in graph.neighbors(current):
+            if nbr == node or assignment[nbr] != district:
+                continue
+            label = owner.get(nbr)
+            if label is None:
+                owner[nbr] = root
+                pending[root] += 1
+                queue.append(nbr)
+                continue
+            other = find(label)
+            if other != root:
+                parent[other] = root
+                pending[root] += pending[other]
+                groups -= 1
+                if groups == 1:
+                    return True
+        if pending[root] == 0:
+            return False
+        if len(owner) > budget:
+            return check_contiguity(graph, assignment, district, node, None)
+    return groups == 1
+
+
+class DistrictConnectivity:
+    """Components and articulation points of every district's induced subgraph.
+
+    Built once per assignment (one biconnected pass per district), it answers single-flip
+    contiguity for all candidate moves, including districts that are already disconnected.
+    """
+
+    def __init__(self, graph: nx.Graph, assignment: Mapping[Any, Hashable]):
+        members: Dict[Hashable, List[Any]] = {}
+        for node, district in assignment.items():
+            members.setdefault(district, []).append(node)
+        self.assignment = assignment
+        self.component: Dict[Any, int] = {}
+        self.component_size: List[int] = []
+        self.n_components: Dict[Hashable, int] = {}
+        self.district_size = {district: len(nodes) for district, nodes in members.items()}
+        self.articulation_points = set()
+        for district, nodes in members.items():
+            subgraph = graph.subgraph(nodes)
+            components = list(nx.connected_components(subgraph))
+            self.n_components[district] = len(components)
+            for component in components:
+                comp_id = len(self.component_size)
+                self.component_size.append(len(component))
+                for node in component:
+                    self.component[node] = comp_id
+            self.articulation_points.update(nx.articulation_points(subgraph))
+
+    def contiguous_districts(self) -> Set[Hashable]:
+        """Districts whose induced subgraph is a single component."""
+        return {district for district, count in self.n_components.items() if count == 1}
+
+    def removal_keeps_contiguous(self, node: Any) -> bool:
+        """True if the node's district stays connected (or has <= 1 node) without it."""
+        district = self.assignment[node]
+        if self.district_size[district] - 1 <= 1:
+            return True
+        if self.component_size[self.component[node]] == 1:
+            own_pieces = 0
+        else:
+            own_pieces = 2 if node in self.articulation_points else 1
+        return self.n_components[district] - 1 + own_pieces <= 1
+
+    def addition_keeps_contiguous(self, graph: nx.Graph, node: Any, target: Hashable) -> bool:
+        """True if `target` plus `node` is connected."""
+        touched = {
+            self.component[nbr] for nbr in graph.neighbors(node) if self.assignment[nbr] == target
+        }
+        return len(touched) == self.n_components.get(target, 0)
+
+
+class BoundaryIndex:
+    """Boundary nodes and per-node neighbouring-district counts, updated in O(degree) per flip.
+
+    `by_district[d]` holds the boundary nodes inside `d`; `adjacent[d]` holds the nodes outside
+    `d` with at least one neighbour in it. Together they give every candidate move that
+    touches a district without scanning the graph. Cut edges are also kept in an indexable
+    pool so `sample_cut_edge` draws one uniformly in O(1).
+    """
+
+    def __init__(self, graph: nx.Graph, assignment: Mapping[Any, Hashable]):
+        self.graph = graph
+        self.assignment = dict(assignment)
+        self.neighbor_districts: Dict[Any, Dict[Hashable, int]] = {}
+        self.by_district: Dict[Hashable, Set[Any]] = {}
+        self.adjacent: Dict[Hashable, Set[Any]] = {}
+        self.cut_edges: List[Tuple[Any, Any]] = []
+        self._cut_position: Dict[Tuple[Any, Any], int] = {}
+        for u, v in graph.edges():
+            if self.assignment[u] != self.assignment[v]:
+                self._cut_position[(u, v)] = len(self.cut_edges)
+                self.cut_edges.append((u, v))
+        for node in graph.nodes():
+            counts: Dict[Hashable, int] = {}
+            for nbr in graph.neighbors(node):
+                district = self.assignment[nbr]
+                counts[district] = counts.get(district, 0) + 1
+            self.neighbor_districts[node] = counts
+            own = self.assignment[node]
+            for district in counts:
+                if district != own:
+                    self.adjacent.setdefault(district, set()).add(node)
+            if self.is_boundary(node):
+                self.by_district.setdefault(own, set()).add(node)
+
+    def copy(self) -> "BoundaryIndex":
+        other = object.__new__(BoundaryIndex)
+        other.graph = self.graph
+        other.assignment = dict(self.assignment)
+        other.neighbor_districts = {n: dict(c) for n, c in self.neighbor_districts.items()}
+        other.by_district = {d: set(nodes) for d, nodes in self.by_district.items()}
+        other.adjacent = {d: set(nodes) for d, nodes in self.adjacent.items()}
+        other.cut_edges = list(self.cut_edges)
+        other._cut_position = dict(self._cut_position)
+        return other
+
+    def is_boundary(self, node: Any) -> bool:
+        counts = self.neighbor_districts[node]
+        return len(counts) > (1 if self.assignment[node] in counts else 0)
+
+    def targets(self, node: Any) -> List[Hashable]:
+        """Neighbouring districts other than the node's own."""
+        own = self.assignment[node]
+        return [district for district in self.neighbor_districts[node] if district != own]
+
+    def boundary_nodes(self) -> Set[Any]:
+        return set().union(*self.by_district.values())
+
+    def nodes_touching(self, districts: Iterable[Hashable]) -> Set[Any]:
+        """Boundary nodes inside, or adjacent to, any of `districts`."""
+        nodes: Set[Any] = set()
+        for district in districts:
+            nodes.update(self.by_district.get(district, ()))
+            nodes.update(self.adjacent.get(district, ()))
+        return nodes
+
+    def sample_cut_edge(self, rng: np.random.Generator) -> Optional[Tuple[Any, Any]]:
+        """A uniformly random cut edge, or None when the plan has a single district."""
+        if not self.cut_edges:
+            return None
+        return self.cut_edges[int(rng.integers(len(self.cut_edges)))]
+
+    def apply_move(self, node: Any, source: Hashable, target: Hashable) -> None:
+        self.assignment[node] = target
+        for nbr in self.graph.neighbors(node):
+            counts = self.neighbor_districts[nbr]
+            own = self.assignment[nbr]
+            self._mark_cut(node, nbr, own != target)
+            counts[source] -= 1
+            if counts[source] == 0:
+                del counts[source]
+                self.adjacent.get(source, set()).discard(nbr)
+            counts[target] = counts.get(target, 0) + 1
+            if target != own:
+                self.adjacent.setdefault(target, set()).add(nbr)
+            self._index_boundary(nbr)
+
+        self.by_district.get(source, set()).discard(node)
+        self.adjacent.get(target, set()).discard(node)
+        if source in self.neighbor_districts[node]:
+            self.adjacent.setdefault(source, set()).add(node)
+        self._index_boundary(node)
+
+    def _mark_cut(self, u: Any, v: Any, cut: bool) -> None:
+        key = (u, v) if (u, v) in self._cut_position else (v, u)
+        position = self._cut_position.get(key)
+        if cut and position is None:
+            self._cut_position[(u, v)] = len(self.cut_edges)
+            self.cut_edges.append((u, v))
+        elif not cut and position is not None:
+            # Swap-remove keeps the pool dense for O(1) sampling.
+            last = self.cut_edges.pop()
+            del self._cut_position[key]
+            if last != key:
+                self.cut_edges[position] = last
+                self._cut_position[last] = position
+
+    def _index_boundary(self, node: Any) -> None:
+        own = self.by_district.setdefault(self.assignment[node], set())
+        if self.is_boundary(node):
+            own.add(node)
+        else:
+            own.discard(node)
+
+
+def population_bounds(
+    graph: nx.Graph, n_districts: int, pop_tol: float, store: Optional[PrecinctStore] = None
+) -> Tuple[float, float, float]:
     """Compute ideal, minimum, and maximum district populations."""
-    total_pop = sum(graph.nodes[n].get("P0010001", 0) for n in graph.nodes())
+    if store is not None:
+        total_pop = float(store.column("P0010001").sum())
+    else:
+        total_pop = sum(graph.nodes[n].get("P0010001", 0) for n in graph.nodes())
     ideal_pop = total_pop / n_districts
     return ideal_pop, ideal_pop * (1.0 - pop_tol), ideal_pop * (1.0 + pop_tol)
 
 
 def district_populations(
-    graph: nx.Graph, assignment: Dict[int, int], districts: Iterable[int]
+    graph: nx.Graph,
+    assignment: Dict[int, int],
+    districts: Iterable[int],
+    store: Optional[PrecinctStore] = None,
 ) -> Dict[int, float]:
     """Compute district populations for requested district IDs."""
+    if store is not None:
+        wanted = {district: code for code, district in enumerate(dict.fromkeys(districts))}
+        other = len(wanted)
+        codes = np.fromiter(
+            (wanted.get(assignment.get(n), other) for n in store.node_ids.tolist()),
+            dtype=np.int64,
+            count=store.n_nodes,
+        )
+        sums = np.bincount(codes, weights=store.column("P0010001"), minlength=other + 1)
+        return {district: float(sums[code]) for district, code in wanted.items()}
     out = {}
     for district in districts:
         out[district] = sum(
@@ -42,3 +339,79 @@ def district_populations(
         )
     return out
 
+
+def district_population_array(
+    store: PrecinctStore, codes: np.ndarray, n_districts: int
+) -> np.ndarray:
+    """Return per-district populations for an encoded assignment via `np.bincount`."""
+    return store.district_sums("P0010001", codes, n_districts)
+
+
+class PopulationTracker:
+    """Per-district populations kept in sync with node flips, plus cached bounds.
+
+    Checking a move is two array reads; applying one is two array writes.
+    """
+
+    def __init__(
+        self,
+        node_index: Mapping[Any, int],
+        node_populations: np.ndarray,
+        assignment: Mapping[Any, Hashable],
+        n_districts: int,
+        pop_tol: float,
+        index: Optional[Mapping[Hashable, int]] = None,
+    ):
+        self.node_index = node_index
+        self.node_populations = node_populations
+        self.index = dict(index) if index is not None else district_index(assignment.values())
+        self.ideal_pop = float(node_populations.sum()) / n_districts
+        self.min_allowed_pop = self.ideal_pop * (1.0 - pop_tol)
+        self.max_allowed_pop = self.ideal_pop * (1.0 + pop_tol)
+        codes = np.fromiter(
+            (self.index[assignment[node]] for node in node_index),
+            dtype=np.int64,
+            count=len(node_index),
+        )
+        order = np.fromiter(node_index.values(), dtype=np.int64, count=len(node_index))
+        self.populations = np.bincount(
+            codes, weights=node_populations[order], minlength=len(self.index)
+        )
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: nx.Graph,
+        assignment: Mapping[Any, Hashable],
+        n_districts: int,
+        pop_tol: float,
+        store: Optional[PrecinctStore] = None,
+        index: Optional[Mapping[Hashable, int]] = None,
+    ) -> "PopulationTracker":
+        """Build from a `PrecinctStore` when given, otherwise one pass over graph nodes."""
+        if store is not None:
+            return cls(
+                store.node_index, store.column("P0010001"), assignment, n_districts, pop_tol, index
+            )
+        nodes = list(graph.nodes())
+        node_pops = np.fromiter(
+            (graph.nodes[n].get("P0010001", 0) for n in nodes), dtype=np.float64, count=len(nodes)
+        )
+        node_index = {node: idx for idx, node in enumerate(nodes)}
+        return cls(node_index, node_pops, assignment, n_districts, pop_tol, index)
+
+    def population(self, district: Hashable) -> float:
+        return float(self.populations[self.index[district]])
+
+    def move_is_feasible(self, node: Any, source: Hashable, target: Hashable) -> bool:
+        """True if moving `node` from `source` to `target` keeps both within bounds."""
+        node_pop = self.node_populations[self.node_index[node]]
+        return (
+            self.populations[self.index[source]] - node_pop >= self.min_allowed_pop
+            and self.populations[self.index[target]] + node_pop <= self.max_allowed_pop
+        )
+
+    def apply_move(self, node: Any, source: Hashable, target: Hashable) -> None:
+        node_pop = self.node_populations[self.node_index[node]]
+        self.populations[self.index[source]] -= node_pop
+        self.populations[self.index[target]] += node_pop
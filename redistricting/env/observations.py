@@ -1,11 +1,13 @@
 """Observation and feature extraction for graph-based RL."""
 
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Tuple
 
 import networkx as nx
 import numpy as np
 
+from redistricting.graph.store import PrecinctStore
+
 
 @dataclass(frozen=True)
 class FeatureConfig:
@@ -22,8 +24,21 @@ class FeatureConfig:
     pct_asian: str = "P0040008"
     pct_nhpi: str = "P0040009"
 
+    def columns(self) -> Tuple[str, ...]:
+        """Return every configured column name, in field order."""
+        return tuple(getattr(self, f.name) for f in fields(self))
+
 
-def _feature_totals(graph: nx.Graph, cfg: FeatureConfig) -> Dict[str, float]:
+def _feature_totals(
+    graph: nx.Graph, cfg: FeatureConfig, store: Optional[PrecinctStore] = None
+) -> Dict[str, float]:
+    if store is not None:
+        pop = float(store.column(cfg.total_pop).sum())
+        vap = float(store.column(cfg.voting_age_pop).sum())
+        dem = float(store.column(cfg.dem_votes).sum())
+        rep = float(store.column(cfg.rep_votes).sum())
+        votes = dem + rep if (dem + rep) > 0 else 1
+        return {"pop": pop, "vap": vap, "dem": dem, "rep": rep, "votes": votes}
     pop = sum(graph.nodes[n].get(cfg.total_pop, 0) for n in graph.nodes())
     vap = sum(graph.nodes[n].get(cfg.voting_age_pop, 0) for n in graph.nodes())
     dem = sum(graph.nodes[n].get(cfg.dem_votes, 0) for n in graph.nodes())
@@ -32,10 +47,62 @@ def _feature_totals(graph: nx.Graph, cfg: FeatureConfig) -> Dict[str, float]:
     return {"pop": pop, "vap": vap, "dem": dem, "rep": rep, "votes": votes}
 
 
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(numerator, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _build_node_features_columnar(
+    store: PrecinctStore, assignment: Dict[int, int], n_districts: int, cfg: FeatureConfig
+) -> np.ndarray:
+    totals = _feature_totals(None, cfg, store)
+    pop = store.column(cfg.total_pop)
+    vap = store.column(cfg.voting_age_pop)
+    dem_votes = store.column(cfg.dem_votes)
+    rep_votes = store.column(cfg.rep_votes)
+    pct_white = _safe_ratio(store.column(cfg.pct_white), vap)
+    features = np.column_stack(
+        [
+            pop / totals["pop"] if totals["pop"] > 0 else np.zeros_like(pop),
+            vap / totals["vap"] if totals["vap"] > 0 else np.zeros_like(vap),
+            dem_votes / totals["votes"],
+            rep_votes / totals["votes"],
+            _safe_ratio(np.abs(dem_votes - rep_votes), dem_votes + rep_votes),
+            pct_white,
+            _safe_ratio(store.column(cfg.pct_latino), vap),
+            _safe_ratio(store.column(cfg.pct_black), vap),
+            _safe_ratio(store.column(cfg.pct_native), vap),
+            _safe_ratio(store.column(cfg.pct_asian), vap),
+            _safe_ratio(store.column(cfg.pct_nhpi), vap),
+            1 - pct_white,
+        ]
+    ).astype(np.float32)
+
+    district_ids = np.fromiter(
+        (
+            d if isinstance(d, (int, np.integer)) and 0 <= d < n_districts else -1
+            for d in (assignment[node] for node in store.node_ids.tolist())
+        ),
+        dtype=np.int64,
+        count=store.n_nodes,
+    )
+    onehot = np.zeros((store.n_nodes, n_districts), dtype=np.float32)
+    rows = np.flatnonzero(district_ids >= 0)
+    onehot[rows, district_ids[rows]] = 1.0
+    return np.concatenate([features, onehot], axis=1, dtype=np.float32)
+
+
 def build_node_features(
-    graph: nx.Graph, assignment: Dict[int, int], n_districts: int, cfg: FeatureConfig = FeatureConfig()
+    graph: nx.Graph,
+    assignment: Dict[int, int],
+    n_districts: int,
+    cfg: FeatureConfig = FeatureConfig(),
+    store: Optional[PrecinctStore] = None,
 ) -> np.ndarray:
     """Build normalized node feature matrix with district one-hot encoding."""
+    if store is not None:
+        return _build_node_features_columnar(store, assignment, n_districts, cfg)
     totals = _feature_totals(graph, cfg)
     node_features = []
     for node in graph.nodes():
@@ -1,7 +1,18 @@
 """Graph construction and district metric helpers."""
 
 from .construction import build_precinct_graph, validate_precinct_graph
-from .metrics import MCalc
-
-__all__ = ["build_precinct_graph", "validate_precinct_graph", "MCalc"]
+from .geometry import GeometryStore
+from .metrics import MCalc, MetricsEngine
+from .shared import attach_precinct_graph, publish_precinct_graph
+from .store import PrecinctStore
 
+__all__ = [
+    "build_precinct_graph",
+    "validate_precinct_graph",
+    "GeometryStore",
+    "MCalc",
+    "MetricsEngine",
+    "PrecinctStore",
+    "attach_precinct_graph",
+    "publish_precinct_graph",
+]
@@ -0,0 +1,206 @@
+"""On-disk cache for compiled precinct graphs."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import gerrychain as gc
+import numpy as np
+
+CACHE_DIRNAME = "graph_cache"
+CACHE_FORMAT_VERSION = 2
+_FINGERPRINT_INDEX = "fingerprints.json"
+_SHAPEFILE_SUFFIXES = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+_PARQUET_FILENAME = "precincts.parquet"
+
+
+def source_files(shapefile_path: Path) -> List[Path]:
+    """Return the on-disk files that feed `build_precinct_graph` for one shapefile."""
+    files = []
+    for stem in (shapefile_path.stem, "precincts_with_districts"):
+        for suffix in _SHAPEFILE_SUFFIXES:
+            candidate = shapefile_path.parent / f"{stem}{suffix}"
+            if candidate.exists():
+                files.append(candidate)
+    parquet = shapefile_path.parent / _PARQUET_FILENAME
+    if parquet.exists():
+        files.append(parquet)
+    return files
+
+
+def _file_digest(path: Path, index: Dict[str, Dict]) -> str:
+    stat = path.stat()
+    entry = index.get(str(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    index[str(path)] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+    return digest.hexdigest()
+
+
+def graph_fingerprint(
+    files: Iterable[Path], attr_cols: Sequence[str], crs: str, cache_root: Optional[Path] = None
+) -> str:
+    """Hash source file contents, requested attribute columns, and target CRS into a cache key.
+
+    File digests are memoized by (size, mtime) under `cache_root` so warm lookups do not
+    re-read multi-megabyte shapefiles.
+    """
+    index: Dict[str, Dict] = {}
+    index_path = cache_root / _FINGERPRINT_INDEX if cache_root is not None else None
+    if index_path is not None and index_path.exists():
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = {}
+    before = dict(index)
+
+    key = hashlib.sha256()
+    key.update(f"v{CACHE_FORMAT_VERSION}".encode())
+    for path in sorted(Path(p) for p in files):
+        key.update(path.name.encode())
+        key.update(_file_digest(path, index).encode())
+    key.update(json.dumps(list(attr_cols)).encode())
+    key.update(str(crs).encode())
+
+    if index_path is not None and index != before:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        index_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    return key.hexdigest()[:32]
+
+
+def save_graph_cache(cache_root: Path, key: str, graph: gc.Graph, district_col: str) -> Path:
+    """Compile `graph` to flat arrays under `cache_root/<key>` and drop stale entries."""
+    nodes = list(graph.nodes())
+    position = {node: idx for idx, node in enumerate(nodes)}
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indices: List[int] = []
+    shared_perim: List[float] = []
+    for idx, node in enumerate(nodes):
+        for nbr, data in graph[node].items():
+            indices.append(position[nbr])
+            shared_perim.append(float(data.get("shared_perim", 0.0)))
+        indptr[idx + 1] = len(indices)
+
+    attr_names: List[str] = []
+    for _node, data in graph.nodes(data=True):
+        for name in data:
+            if name not in attr_names:
+                attr_names.append(name)
+    attr_names = [name for name in attr_names if name != "geometry"]
+
+    arrays = {
+        "nodes": np.asarray(nodes),
+        "indptr": indptr,
+        "indices": np.asarray(indices, dtype=np.int64),
+        "shared_perim": np.asarray(shared_perim, dtype=np.float64),
+    }
+    # Node attribute sets differ (e.g. `boundary_perim` only on boundary nodes), so keep a
+    # presence mask per column to restore the exact per-node dicts.
+    for col_idx, name in enumerate(attr_names):
+        present = np.array([name in graph.nodes[n] for n in nodes], dtype=bool)
+        values = [graph.nodes[n][name] for n in nodes if name in graph.nodes[n]]
+        arrays[f"attr_{col_idx}"] = np.asarray(values)
+        arrays[f"present_{col_idx}"] = present
+
+    geometry = getattr(graph, "geometry", None)
+    if geometry is not None:
+        from shapely import to_wkb
+
+        blobs = to_wkb(np.asarray(geometry.loc[nodes].values, dtype=object))
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(blob) for blob in blobs])
+        arrays["geometry_wkb"] = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        arrays["geometry_offsets"] = offsets
+
+    meta = {
+        "version": CACHE_FORMAT_VERSION,
+        "district_col": district_col,
+        "attr_names": attr_names,
+        "crs": graph.graph.get("crs"),
+        "geometry_crs": geometry.crs.to_json() if geometry is not None and geometry.crs else None,
+    }
+
+    cache_root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=cache_root))
+    for name, array in arrays.items():
+        np.save(staging / f"{name}.npy", array, allow_pickle=False)
+    (staging / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    target = cache_root / key
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(staging, target)
+    for entry in cache_root.iterdir():
+        if entry.is_dir() and entry.name != key:
+            shutil.rmtree(entry, ignore_errors=True)
+    return target
+
+
+def load_graph_cache(cache_root: Path, key: str, include_geometry: bool = True):
+    """Return (graph, district_col) from a compiled cache entry, or None on a miss.
+
+    With `include_geometry=False` no shapes are decoded; the entry's WKB buffer is
+    memory-mapped into a `GeometryStore` attached as `graph.geometry_store` instead.
+    """
+    entry = cache_root / key
+    meta_path = entry / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta.get("version") != CACHE_FORMAT_VERSION:
+        return None
+
+    nodes = np.load(entry / "nodes.npy", allow_pickle=False).tolist()
+    indptr = np.load(entry / "indptr.npy", allow_pickle=False)
+    indices = np.load(entry / "indices.npy", allow_pickle=False)
+    shared_perim = np.load(entry / "shared_perim.npy", allow_pickle=False)
+
+    node_attrs: List[Dict] = [{} for _ in nodes]
+    for col_idx, name in enumerate(meta["attr_names"]):
+        values = np.load(entry / f"attr_{col_idx}.npy", allow_pickle=False).tolist()
+        present = np.load(entry / f"present_{col_idx}.npy", allow_pickle=False)
+        for idx, value in zip(np.flatnonzero(present), values):
+            node_attrs[idx][name] = value
+
+    adjacency = {
+        node: {
+            nodes[j]: {"shared_perim": float(shared_perim[k])}
+            for k, j in enumerate(indices[indptr[i] : indptr[i + 1]].tolist(), start=int(indptr[i]))
+        }
+        for i, node in enumerate(nodes)
+    }
+    graph = gc.Graph(adjacency)
+    for node, attrs in zip(nodes, node_attrs):
+        graph.nodes[node].update(attrs)
+    graph.graph["crs"] = meta["crs"]
+
+    wkb_path = entry / "geometry_wkb.npy"
+    if wkb_path.exists() and not include_geometry:
+        from redistricting.graph.geometry import GeometryStore
+
+        graph.geometry_store = GeometryStore.open(entry, nodes, crs=meta["geometry_crs"])
+    elif wkb_path.exists():
+        import geopandas as gpd
+        from shapely import from_wkb
+
+        buffer = np.load(wkb_path, allow_pickle=False).tobytes()
+        offsets = np.load(entry / "geometry_offsets.npy", allow_pickle=False)
+        blobs = [buffer[offsets[i] : offsets[i + 1]] for i in range(len(nodes))]
+        graph.geometry = gpd.GeoSeries(from_wkb(blobs), index=nodes, crs=meta["geometry_crs"])
+        # `Graph.add_data` copies every dataframe column, geometry included, onto the nodes.
+        for node, geom in zip(nodes, graph.geometry.values):
+            graph.nodes[node]["geometry"] = geom
+    return graph, meta["district_col"]
@@ -0,0 +1,144 @@
+"""Multi-resolution supernode graphs built by district-preserving heavy-edge matching."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence
+
+import gerrychain as gc
+import numpy as np
+
+from redistricting.graph.construction import NODE_ATTRIBUTE_COLUMNS
+
+AGGREGATED_COLUMNS = NODE_ATTRIBUTE_COLUMNS + ["area", "perimeter", "boundary_perim"]
+
+
+@dataclass
+class CoarseLevel:
+    """One level of the hierarchy: a graph, its baseline partition, and the map to it.
+
+    `fine_to_coarse` maps every node of the next finer level to a node of this level; it is
+    empty for level 0 (precincts).
+    """
+
+    graph: gc.Graph
+    partition: gc.Partition
+    fine_to_coarse: Dict[Any, int] = field(default_factory=dict)
+
+    @property
+    def n_nodes(self) -> int:
+        return self.graph.number_of_nodes()
+
+
+def heavy_edge_matching(
+    graph, assignment: Mapping[Any, Hashable], weight: str = "shared_perim", seed: int = 0
+) -> Dict[Any, int]:
+    """Pair each node with its unmatched same-district neighbour of heaviest edge weight.
+
+    Nodes are visited in a seeded random order; unmatched nodes become singleton supernodes.
+    Returns node -> supernode id (0..m-1).
+    """
+    nodes = list(graph.nodes)
+    order = np.random.default_rng(seed).permutation(len(nodes))
+    matched: Dict[Any, int] = {}
+    next_id = 0
+    for idx in order.tolist():
+        node = nodes[idx]
+        if node in matched:
+            continue
+        best, best_weight = None, -np.inf
+        for nbr, data in graph[node].items():
+            if nbr in matched or nbr == node or assignment[nbr] != assignment[node]:
+                continue
+            edge_weight = data.get(weight, 1.0)
+            if edge_weight > best_weight:
+                best, best_weight = nbr, edge_weight
+        matched[node] = next_id
+        if best is not None:
+            matched[best] = next_id
+        next_id += 1
+    return matched
+
+
+def contract_graph(
+    graph, fine_to_coarse: Mapping[Any, int], columns: Sequence[str] = AGGREGATED_COLUMNS
+) -> gc.Graph:
+    """Build the supernode graph, summing `columns` and shared boundaries across members.
+
+    Supernode `perimeter` drops twice the boundary shared between its members, so
+    compactness computed from area/perimeter/shared_perim tables stays exact.
+    """
+    n_coarse = max(fine_to_coarse.values()) + 1
+    present = [c for c in columns if any(c in graph.nodes[n] for n in graph.nodes)]
+    sums = {c: np.zeros(n_coarse, dtype=np.float64) for c in present}
+    members = np.zeros(n_coarse, dtype=np.int64)
+    boundary = np.zeros(n_coarse, dtype=bool)
+    for node, data in graph.nodes(data=True):
+        coarse = fine_to_coarse[node]
+        members[coarse] += 1
+        boundary[coarse] |= bool(data.get("boundary_node", False))
+        for column in present:
+            sums[column][coarse] += data.get(column, 0)
+
+    internal = np.zeros(n_coarse, dtype=np.float64)
+    shared: Dict[tuple, float] = {}
+    for u, v, data in graph.edges(data=True):
+        a, b = fine_to_coarse[u], fine_to_coarse[v]
+        length = data.get("shared_perim", 0.0)
+        if a == b:
+            internal[a] += length
+        else:
+            key = (a, b) if a < b else (b, a)
+            shared[key] = shared.get(key, 0.0) + length
+
+    coarse_graph = gc.Graph()
+    for coarse in range(n_coarse):
+        attrs = {column: float(sums[column][coarse]) for column in present}
+        if "perimeter" in attrs:
+            attrs["perimeter"] -= 2.0 * internal[coarse]
+        attrs["boundary_node"] = bool(boundary[coarse])
+        attrs["n_precincts"] = int(members[coarse])
+        coarse_graph.add_node(coarse, **attrs)
+    for (a, b), length in shared.items():
+        coarse_graph.add_edge(a, b, shared_perim=length)
+    return coarse_graph
+
+
+def project_assignment(
+    coarse_assignment: Mapping[int, Hashable], fine_to_coarse: Mapping[Any, int]
+) -> Dict[Any, Hashable]:
+    """Map a coarse-level assignment back onto the nodes of the next finer level."""
+    return {node: coarse_assignment[coarse] for node, coarse in fine_to_coarse.items()}
+
+
+def build_hierarchy(
+    graph,
+    partition: gc.Partition,
+    n_levels: int,
+    min_nodes: Optional[int] = None,
+    min_reduction: float = 0.1,
+    seed: int = 0,
+) -> List[CoarseLevel]:
+    """Return `[precincts, coarse_1, ..., coarse_n]`, each carrying its baseline partition.
+
+    Matching never crosses district lines, so every level reproduces the baseline map
+    exactly. Coarsening stops early below `min_nodes` (default: 4 nodes per district) or
+    when a round shrinks the graph by less than `min_reduction`.
+    """
+    if min_nodes is None:
+        min_nodes = 4 * len(partition.parts)
+    levels = [CoarseLevel(graph, partition)]
+    for depth in range(n_levels):
+        fine = levels[-1]
+        if fine.n_nodes <= min_nodes:
+            break
+        assignment = dict(fine.partition.assignment)
+        fine_to_coarse = heavy_edge_matching(fine.graph, assignment, seed=seed + depth)
+        n_coarse = max(fine_to_coarse.values()) + 1
+        if n_coarse > (1.0 - min_reduction) * fine.n_nodes:
+            break
+        coarse_graph = contract_graph(fine.graph, fine_to_coarse)
+        coarse_assignment = {fine_to_coarse[n]: label for n, label in assignment.items()}
+        coarse_partition = gc.Partition(
+            coarse_graph, coarse_assignment, updaters=partition.updaters
+        )
+        levels.append(CoarseLevel(coarse_graph, coarse_partition, fine_to_coarse))
+    return levels
@@ -1,47 +1,145 @@
 """Build and validate GerryChain precinct graphs."""
 
+import importlib.util
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional
 
 import gerrychain as gc
 import geopandas as gpd
 import networkx as nx
+import numpy as np
+import pyogrio
+import shapely
+from gerrychain.graph.graph import GeometryError, add_boundary_perimeters, invalid_geometries
 from gerrychain.updaters import Election, Tally, cut_edges
 
+from redistricting.graph.cache import (
+    CACHE_DIRNAME,
+    graph_fingerprint,
+    load_graph_cache,
+    save_graph_cache,
+    source_files,
+)
+from redistricting.graph.geometry import GeometryStore, detach_geometry
+from redistricting.graph.store import PrecinctStore
+from redistricting.graph.validation import validate_assignments
 
-def build_precinct_graph(state: str, basepath: str):
-    """Build a precinct graph and baseline partition from a shapefile."""
+
+DISTRICT_COLUMN_CANDIDATES = ("CONG_DIST", "DISTRICT", "CD116FP", "SLDLST", "SLDUST")
+NODE_ATTRIBUTE_COLUMNS = [
+    "P0010001",
+    "P0040001",
+    "CompDemVot",
+    "CompRepVot",
+    "P0040002",
+    "P0040005",
+    "P0040006",
+    "P0040007",
+    "P0040008",
+    "P0040009",
+    "ptP0040002",
+    "ptP0040005",
+    "ptP0040006",
+    "ptP0040007",
+    "ptP0040008",
+    "ptP0040009",
+]
+GRAPH_CRS = "EPSG:2163"
+PARQUET_FILENAME = "precincts.parquet"
+PARALLEL_ADJACENCY_MIN_PRECINCTS = 10_000
+
+
+def _resolve_shapefile_path(state: str, basepath: str) -> Path:
     base_path = Path(basepath)
     if base_path.name == state:
         shapefile_path = base_path / "precincts_with_vap.shp"
     else:
         shapefile_path = base_path / state / "precincts_with_vap.shp"
 
-    if not shapefile_path.exists():
+    if not shapefile_path.exists() and not _parquet_path(shapefile_path).exists():
         raise FileNotFoundError(
             f"Shapefile not found: {shapefile_path}\n"
             f"Expected location: {shapefile_path.resolve()}\n"
             f"Base path: {base_path.resolve()}\n"
             f"State: {state}"
         )
+    return shapefile_path
+
+
+def _parquet_path(shapefile_path: Path) -> Path:
+    return shapefile_path.parent / PARQUET_FILENAME
+
+
+def _parquet_readable(shapefile_path: Path) -> bool:
+    """True when the converted GeoParquet exists, is no older than the shapefile sources it
+    was converted from, and the optional `pyarrow` is installed."""
+    parquet_path = _parquet_path(shapefile_path)
+    if not parquet_path.exists() or importlib.util.find_spec("pyarrow") is None:
+        return False
+    converted = parquet_path.stat().st_mtime_ns
+    return all(
+        path.stat().st_mtime_ns <= converted
+        for path in source_files(shapefile_path)
+        if path != parquet_path
+    )
+
+
+def _pick_district_column(columns) -> Optional[str]:
+    return next((c for c in DISTRICT_COLUMN_CANDIDATES if c in columns), None)
+
 
-    precincts = gpd.read_file(str(shapefile_path))
+def _read_precincts_parquet(parquet_path: Path):
+    """Read only the district, attribute, and geometry columns from a converted GeoParquet."""
+    import pyarrow.parquet as pq
+
+    available = pq.read_schema(parquet_path).names
+    district_col = _pick_district_column(available)
+    if district_col is None:
+        raise ValueError(f"No known district assignment column in {parquet_path}")
+    wanted = [district_col] + [c for c in NODE_ATTRIBUTE_COLUMNS if c in available]
+    precincts = gpd.read_parquet(parquet_path, columns=wanted + ["geometry"])
     precincts.fillna(0, inplace=True)
     if precincts.crs and precincts.crs.is_geographic:
-        precincts = precincts.to_crs(epsg=2163)
+        precincts = precincts.to_crs(GRAPH_CRS)
+    return precincts, district_col
+
+
+def _read_precincts(shapefile_path: Path, prefer_parquet: bool = True):
+    """Read precincts, reproject, and resolve the district assignment column.
 
-    district_col = None
-    for candidate in ("CONG_DIST", "DISTRICT", "CD116FP", "SLDLST", "SLDUST"):
-        if candidate in precincts.columns:
-            district_col = candidate
-            break
+    Prefers an up-to-date `precincts.parquet` (see `convert_precincts_to_parquet`) next to
+    the shapefile unless `prefer_parquet` is False; otherwise reads only the needed
+    shapefile fields and merges `DISTRICT` by `UNIQUE_ID`.
+    """
+    if prefer_parquet and _parquet_readable(shapefile_path):
+        return _read_precincts_parquet(_parquet_path(shapefile_path))
+
+    fields = list(pyogrio.read_info(str(shapefile_path))["fields"])
+    wanted = [
+        c
+        for c in (*DISTRICT_COLUMN_CANDIDATES, "UNIQUE_ID", *NODE_ATTRIBUTE_COLUMNS)
+        if c in fields
+    ]
+    precincts = gpd.read_file(str(shapefile_path), columns=wanted)
+    precincts.fillna(0, inplace=True)
+    if precincts.crs and precincts.crs.is_geographic:
+        precincts = precincts.to_crs(GRAPH_CRS)
+
+    district_col = _pick_district_column(precincts.columns)
     if district_col is None:
         alt_path = shapefile_path.parent / "precincts_with_districts.shp"
         if alt_path.exists() and "UNIQUE_ID" in precincts.columns:
-            districts_gdf = gpd.read_file(str(alt_path))
-            if "DISTRICT" in districts_gdf.columns and "UNIQUE_ID" in districts_gdf.columns:
+            alt_fields = set(pyogrio.read_info(str(alt_path))["fields"])
+            if {"DISTRICT", "UNIQUE_ID"} <= alt_fields:
                 merge_cols = ["UNIQUE_ID", "DISTRICT"]
+                districts_df = gpd.read_file(
+                    str(alt_path), columns=merge_cols, ignore_geometry=True
+                )
                 precincts = precincts.merge(
-                    districts_gdf[merge_cols],
+                    districts_df[merge_cols],
                     on="UNIQUE_ID",
                     how="left",
                 )
@@ -52,33 +150,126 @@ def build_precinct_graph(state: str, basepath: str):
             f"(tried CONG_DIST, DISTRICT, merge from precincts_with_districts). "
             f"Columns: {list(precincts.columns)}"
         )
+    return precincts, district_col
 
-    attr_cols = [
-        district_col,
-        "P0010001",
-        "P0040001",
-        "CompDemVot",
-        "CompRepVot",
-        "P0040002",
-        "P0040005",
-        "P0040006",
-        "P0040007",
-        "P0040008",
-        "P0040009",
-        "ptP0040002",
-        "ptP0040005",
-        "ptP0040006",
-        "ptP0040007",
-        "ptP0040008",
-        "ptP0040009",
-    ]
-    graph = gc.Graph.from_geodataframe(
-        precincts,
-        adjacency="rook",
-        cols_to_add=[col for col in attr_cols if col in precincts.columns],
-        reproject=False,
-    )
 
+def convert_precincts_to_parquet(state: str, basepath: str) -> Path:
+    """Write `<state dir>/precincts.parquet` with the district column pre-merged.
+
+    One-time step (requires `pyarrow`); later loads read only the projected columns and
+    skip the `UNIQUE_ID` merge against `precincts_with_districts`.
+    """
+    shapefile_path = _resolve_shapefile_path(state, basepath)
+    if not shapefile_path.exists():
+        raise FileNotFoundError(f"Shapefile not found: {shapefile_path}")
+    precincts, district_col = _read_precincts(shapefile_path, prefer_parquet=False)
+    keep = [district_col] + [c for c in NODE_ATTRIBUTE_COLUMNS if c in precincts.columns]
+    output_path = _parquet_path(shapefile_path)
+    precincts[keep + ["geometry"]].to_parquet(output_path, index=True)
+    return output_path
+
+
+def _shared_boundary_lengths(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Return `left[i] ∩ right[i]` boundary lengths for one tile of candidate pairs."""
+    return shapely.length(shapely.intersection(left, right))
+
+
+def _tile_ids(geometries: np.ndarray, n_tiles: int) -> np.ndarray:
+    """Assign each geometry to a cell of a square grid over the bounding-box centres."""
+    bounds = shapely.bounds(geometries)
+    cx = (bounds[:, 0] + bounds[:, 2]) / 2.0
+    cy = (bounds[:, 1] + bounds[:, 3]) / 2.0
+    side = max(1, int(math.ceil(math.sqrt(n_tiles))))
+
+    def _cell(values: np.ndarray) -> np.ndarray:
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        span = hi - lo if hi > lo else 1.0
+        return np.minimum(((values - lo) / span * side).astype(np.int64), side - 1)
+
+    return _cell(cx) * side + _cell(cy)
+
+
+def rook_adjacency(
+    geometries: gpd.GeoSeries,
+    n_workers: Optional[int] = None,
+    pairs_per_tile: int = 20_000,
+) -> Dict:
+    """Rook adjacency with `shared_perim` edge data, matching `gerrychain` output.
+
+    Candidate pairs come from one bulk STRtree bounding-box query; pairs are grouped into
+    spatial tiles and intersection lengths are computed per tile in a process pool.
+    """
+    index = list(geometries.index)
+    geoms = np.asarray(geometries.values, dtype=object)
+    nonempty = ~shapely.is_empty(geoms)
+    tree = shapely.STRtree(geoms)
+    query_src, query_dst = tree.query(geoms)
+    candidate = (query_src != query_dst) & nonempty[query_src] & nonempty[query_dst]
+    pair_mask = candidate & (query_src < query_dst)
+    src, dst = query_src[pair_mask], query_dst[pair_mask]
+
+    # gerrychain records both i∩j and j∩i; the later (higher index) one wins in the
+    # resulting nx.Graph, so measure with the higher-index geometry on the left.
+    n_tiles = max(1, int(math.ceil(len(src) / pairs_per_tile)))
+    tiles = _tile_ids(geoms[src], n_tiles) if len(src) else np.zeros(0, dtype=np.int64)
+    order = np.argsort(tiles, kind="stable")
+    splits = np.flatnonzero(np.diff(tiles[order])) + 1
+    chunks = [chunk for chunk in np.split(order, splits) if len(chunk)]
+    jobs = [(geoms[dst[chunk]], geoms[src[chunk]]) for chunk in chunks]
+
+    workers = n_workers if n_workers is not None else (os.cpu_count() or 1)
+    lengths = np.zeros(len(src), dtype=np.float64)
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_shared_boundary_lengths, *zip(*jobs)))
+    else:
+        results = [_shared_boundary_lengths(left, right) for left, right in jobs]
+    for chunk, chunk_lengths in zip(chunks, results):
+        lengths[chunk] = chunk_lengths
+
+    shared = {
+        (i, j): length
+        for i, j, length in zip(src.tolist(), dst.tolist(), lengths.tolist())
+        if length > 0
+    }
+    # Walk the query results in their original order so neighbour order (and therefore
+    # float summation order downstream, e.g. `boundary_perim`) matches gerrychain exactly.
+    adjacency: Dict = {node: {} for node in index}
+    for i, j in zip(query_src[candidate].tolist(), query_dst[candidate].tolist()):
+        length = shared.get((i, j) if i < j else (j, i))
+        if length is not None:
+            adjacency[index[i]][index[j]] = {"shared_perim": length}
+    return adjacency
+
+
+def graph_from_geodataframe_parallel(
+    dataframe: gpd.GeoDataFrame,
+    cols_to_add: Optional[List[str]] = None,
+    n_workers: Optional[int] = None,
+) -> gc.Graph:
+    """Drop-in for `gc.Graph.from_geodataframe(adjacency="rook", reproject=False)`."""
+    invalid = invalid_geometries(dataframe)
+    if len(invalid) > 0:
+        raise GeometryError(
+            "Invalid geometries at rows {} before "
+            "reprojection. Consider repairing the affected geometries with "
+            "`.buffer(0)`.".format(invalid)
+        )
+    graph = gc.Graph(rook_adjacency(dataframe.geometry, n_workers=n_workers))
+    graph.geometry = dataframe.geometry
+    graph.issue_warnings()
+    add_boundary_perimeters(graph, dataframe.geometry)
+    nx.set_node_attributes(graph, name="area", values=dataframe.geometry.area.to_dict())
+    graph.add_data(dataframe, columns=cols_to_add)
+    graph.graph["crs"] = dataframe.crs.to_json() if dataframe.crs is not None else None
+    return graph
+
+
+# Node attributes read by the baseline partition's updaters.
+UPDATER_COLUMNS = ("P0010001", "P0040001", "CompDemVot", "CompRepVot")
+
+
+def _build_partition(graph: gc.Graph, district_col: str) -> gc.Partition:
     assignment = {node: data[district_col] for node, data in graph.nodes(data=True)}
     updaters_dict = {
         "population": Tally("P0010001", alias="population"),
@@ -92,35 +283,102 @@ def build_precinct_graph(state: str, basepath: str):
         ),
         "cut_edges": cut_edges,
     }
-    partition = gc.Partition(graph, assignment, updaters=updaters_dict)
-    return graph, partition
+    return gc.Partition(graph, assignment, updaters=updaters_dict)
+
+
+def _add_perimeters(graph: gc.Graph, geometries: gpd.GeoSeries) -> None:
+    """Store each precinct's full boundary length, state-border exterior included."""
+    for node, length in zip(geometries.index, geometries.length.to_numpy()):
+        graph.nodes[node]["perimeter"] = float(length)
+
 
+def build_precinct_graph(
+    state: str,
+    basepath: str,
+    use_cache: bool = True,
+    parallel_adjacency: Optional[bool] = None,
+    include_geometry: bool = True,
+):
+    """Build a precinct graph and baseline partition from a shapefile.
 
-def validate_precinct_graph(graph: gc.Graph, partition: gc.Partition, tolerance: float = 0.05):
-    """Validate contiguity and district population balance."""
-    results = {"contiguous": {}, "population_balance": {}, "overall": True}
+    With `use_cache`, the compiled graph is stored under `<state dir>/graph_cache/` keyed by
+    a fingerprint of the source files, attribute columns, and CRS; any change to an input
+    file produces a new key, so stale entries are never loaded.
 
-    for dist, nodes in partition.parts.items():
-        subgraph = graph.subgraph(nodes)
-        is_contig = nx.is_connected(subgraph)
-        results["contiguous"][dist] = is_contig
-        if not is_contig:
-            results["overall"] = False
+    `parallel_adjacency` selects the STRtree/process-pool rook builder; by default it is used
+    for states with at least `PARALLEL_ADJACENCY_MIN_PRECINCTS` precincts.
 
-    total_pop = sum(partition["population"].values())
-    num_districts = len(partition.parts)
-    ideal_pop = total_pop / num_districts
+    Nodes carry `area` and `perimeter` and edges carry `shared_perim`, so compactness can be
+    computed from arrays without touching shapes.
 
-    for dist, pop in partition["population"].items():
-        deviation = (pop - ideal_pop) / ideal_pop
-        within_tol = abs(deviation) <= tolerance
+    With `include_geometry=False` shapes are stripped from the nodes and served lazily from
+    `graph.geometry_store` (memory-mapped from the cache entry when caching is on).
+    """
+    shapefile_path = _resolve_shapefile_path(state, basepath)
+
+    cache_root = shapefile_path.parent / CACHE_DIRNAME
+    cache_key = None
+    if use_cache:
+        cache_key = graph_fingerprint(
+            source_files(shapefile_path),
+            list(DISTRICT_COLUMN_CANDIDATES) + NODE_ATTRIBUTE_COLUMNS,
+            GRAPH_CRS,
+            cache_root=cache_root,
+        )
+        cached = load_graph_cache(cache_root, cache_key, include_geometry=include_geometry)
+        if cached is not None:
+            graph, district_col = cached
+            return graph, _build_partition(graph, district_col)
+
+    precincts, district_col = _read_precincts(shapefile_path)
+    attr_cols = [district_col] + NODE_ATTRIBUTE_COLUMNS
+    cols_to_add = [col for col in attr_cols if col in precincts.columns]
+    if parallel_adjacency is None:
+        parallel_adjacency = len(precincts) >= PARALLEL_ADJACENCY_MIN_PRECINCTS
+    if parallel_adjacency:
+        graph = graph_from_geodataframe_parallel(precincts, cols_to_add=cols_to_add)
+    else:
+        graph = gc.Graph.from_geodataframe(
+            precincts,
+            adjacency="rook",
+            cols_to_add=cols_to_add,
+            reproject=False,
+        )
+    _add_perimeters(graph, precincts.geometry)
+    entry = None
+    if cache_key is not None:
+        entry = save_graph_cache(cache_root, cache_key, graph, district_col)
+    if not include_geometry:
+        store = None
+        if entry is not None and (entry / "geometry_wkb.npy").exists():
+            store = GeometryStore.open(entry, list(graph.nodes), crs=graph.geometry.crs)
+        detach_geometry(graph, store)
+    return graph, _build_partition(graph, district_col)
+
+
+def validate_precinct_graph(
+    graph: gc.Graph,
+    partition: gc.Partition,
+    tolerance: float = 0.05,
+    store: Optional[PrecinctStore] = None,
+):
+    """Validate contiguity and district population balance.
+
+    Runs `validate_assignments` on CSR arrays; pass a prebuilt `store` to skip gathering
+    populations and adjacency from `graph`.
+    """
+    if store is None:
+        store = PrecinctStore.from_graph(graph, ["P0010001"])
+    districts = list(partition.parts.keys())
+    codes = store.parts_array(partition.parts)
+    checks = validate_assignments(store, codes, len(districts), tolerance=tolerance)
+
+    results = {"contiguous": {}, "population_balance": {}, "overall": bool(checks["overall"][0])}
+    for code, dist in enumerate(districts):
+        results["contiguous"][dist] = bool(checks["contiguous"][0, code])
         results["population_balance"][dist] = {
-            "population": pop,
-            "deviation": deviation,
-            "within_tolerance": within_tol,
+            "population": float(checks["population"][0, code]),
+            "deviation": float(checks["deviation"][0, code]),
+            "within_tolerance": bool(checks["within_tolerance"][0, code]),
         }
-        if not within_tol:
-            results["overall"] = False
-
     return results
-
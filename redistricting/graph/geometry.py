@@ -0,0 +1,81 @@
+"""Lazily loaded precinct geometries kept outside the in-memory graph."""
+
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import shapely
+
+
+class GeometryStore:
+    """WKB blobs in one contiguous (optionally memory-mapped) buffer, decoded on request."""
+
+    def __init__(self, wkb: np.ndarray, offsets: np.ndarray, node_ids: Iterable[Any], crs=None):
+        self.wkb = wkb
+        self.offsets = offsets
+        self.crs = crs
+        self.node_index = {node: idx for idx, node in enumerate(node_ids)}
+
+    @classmethod
+    def open(cls, directory: Path, node_ids: Iterable[Any], crs=None) -> "GeometryStore":
+        """Memory-map `geometry_wkb.npy` / `geometry_offsets.npy` from a graph cache entry."""
+        directory = Path(directory)
+        wkb = np.load(directory / "geometry_wkb.npy", mmap_mode="r", allow_pickle=False)
+        offsets = np.load(directory / "geometry_offsets.npy", allow_pickle=False)
+        return cls(wkb, offsets, node_ids, crs=crs)
+
+    @classmethod
+    def from_geoseries(cls, geometries: gpd.GeoSeries) -> "GeometryStore":
+        """Encode an in-memory GeoSeries (indexed by node id) into a WKB buffer."""
+        blobs = shapely.to_wkb(np.asarray(geometries.values, dtype=object))
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(blob) for blob in blobs])
+        wkb = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        return cls(wkb, offsets, geometries.index, crs=geometries.crs)
+
+    def __len__(self) -> int:
+        return len(self.node_index)
+
+    def _blob(self, idx: int) -> bytes:
+        return self.wkb[self.offsets[idx] : self.offsets[idx + 1]].tobytes()
+
+    def get(self, node: Any):
+        """Decode the geometry of one node."""
+        return shapely.from_wkb(self._blob(self.node_index[node]))
+
+    def get_many(self, nodes: Iterable[Any]) -> np.ndarray:
+        """Decode geometries for `nodes` in one vectorized call."""
+        return shapely.from_wkb([self._blob(self.node_index[n]) for n in nodes])
+
+    def to_geoseries(self, nodes: Optional[Iterable[Any]] = None) -> gpd.GeoSeries:
+        """Materialize a GeoSeries (all nodes by default) for renderers."""
+        nodes = list(self.node_index) if nodes is None else list(nodes)
+        return gpd.GeoSeries(self.get_many(nodes), index=nodes, crs=self.crs)
+
+
+def detach_geometry(graph: nx.Graph, store: Optional[GeometryStore] = None) -> GeometryStore:
+    """Strip node and graph-level geometries from `graph` and attach a `GeometryStore`."""
+    if store is None:
+        geometry = getattr(graph, "geometry", None)
+        if geometry is None:
+            geometry = gpd.GeoSeries(
+                [graph.nodes[n]["geometry"] for n in graph.nodes], index=list(graph.nodes)
+            )
+        store = GeometryStore.from_geoseries(geometry)
+    for node in graph.nodes:
+        graph.nodes[node].pop("geometry", None)
+    if "geometry" in vars(graph):
+        del graph.geometry
+    graph.geometry_store = store
+    return store
+
+
+def node_geometries(graph, nodes: Iterable[Any]) -> list:
+    """Return geometries for `nodes`, decoding from the graph's `GeometryStore` if detached."""
+    nodes = list(nodes)
+    store = getattr(graph, "geometry_store", None)
+    if store is not None:
+        return list(store.get_many(nodes))
+    return [graph.nodes[n]["geometry"] for n in nodes]
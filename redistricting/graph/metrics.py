@@ -1,105 +1,337 @@
 """District-level metric computation helpers."""
 
+from dataclasses import dataclass
+from math import fsum
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
+
+from redistricting.graph.geometry import node_geometries
+from redistricting.graph.store import PrecinctStore
+
+TALLY_COLUMNS = [
+    "P0010001",
+    "P0040001",
+    "CompDemVot",
+    "CompRepVot",
+    "P0040002",
+    "P0040005",
+    "P0040006",
+    "P0040007",
+    "P0040008",
+    "P0040009",
+]
+BOUNDARY_COLUMNS = ["area", "perimeter"]
+_COL = {name: idx for idx, name in enumerate(TALLY_COLUMNS)}
+# Column order of `MCalc.calculate_metrics_batch`, matching `calculate_metrics` without baseline.
+BATCH_METRICS = (
+    "EfficiencyGap",
+    "PartisanProp",
+    "SeatsVotesDiff",
+    "MinOppAvg",
+    "MinOppMin",
+    "PolPopperAvg",
+    "PolPopperMin",
+)
+# Working-memory budget for one chunk of `calculate_metrics_batch`.
+BATCH_CHUNK_BYTES = 256 * 2**20
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    """A registered metric: the district inputs it reads and the group that computes it.
+
+    Metrics sharing a group (e.g. `MinOppAvg`/`MinOppMin`) are computed together.
+    """
+
+    group: str
+    inputs: FrozenSet[str]
+
+
+# Tally columns behind each tally input; "geometry" is Polsby-Popper's boundary tables or
+# shape unions and "medians" the per-district vote shares of the mean-median test.
+INPUT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "votes": ("CompDemVot", "CompRepVot"),
+    "vap": ("P0040001", "P0040002", "P0040005", "P0040006", "P0040007", "P0040008", "P0040009"),
+    "geometry": (),
+    "medians": ("CompDemVot", "CompRepVot"),
+}
+METRIC_REGISTRY: Dict[str, MetricSpec] = {
+    "EfficiencyGap": MetricSpec("efficiency_gap", frozenset({"votes"})),
+    "PartisanProp": MetricSpec("partisan_prop", frozenset({"votes"})),
+    "SeatsVotesDiff": MetricSpec("seats_votes", frozenset({"votes"})),
+    "MinOppAvg": MetricSpec("minority", frozenset({"vap"})),
+    "MinOppMin": MetricSpec("minority", frozenset({"vap"})),
+    "PolPopperAvg": MetricSpec("polsby_popper", frozenset({"geometry"})),
+    "PolPopperMin": MetricSpec("polsby_popper", frozenset({"geometry"})),
+    "MeanMedianDem": MetricSpec("mean_median", frozenset({"votes", "medians"})),
+    "MeanMedianRep": MetricSpec("mean_median", frozenset({"votes", "medians"})),
+}
+BASELINE_METRICS = ("MeanMedianDem", "MeanMedianRep")
+DEFAULT_METRICS = tuple(name for name in METRIC_REGISTRY if name not in BASELINE_METRICS)
+
+
+def resolve_metrics(
+    metrics: Optional[Iterable[str]] = None, baseline: bool = False
+) -> Tuple[str, ...]:
+    """Validate `metrics` (default `DEFAULT_METRICS`) and return them in registry order.
+
+    `baseline` adds the mean-median test.
+    """
+    names = set(DEFAULT_METRICS if metrics is None else metrics)
+    unknown = names - METRIC_REGISTRY.keys()
+    if unknown:
+        raise ValueError(f"Unknown metrics: {sorted(unknown)}")
+    if baseline:
+        names.update(BASELINE_METRICS)
+    return tuple(name for name in METRIC_REGISTRY if name in names)
+
+
+def required_inputs(metrics: Iterable[str]) -> Set[str]:
+    """Union of the registered inputs of `metrics`."""
+    return set().union(*(METRIC_REGISTRY[name].inputs for name in metrics))
+
+
+def required_columns(metrics: Iterable[str]) -> List[str]:
+    """Tally columns `metrics` read, in `TALLY_COLUMNS` order."""
+    needed = {column for key in required_inputs(metrics) for column in INPUT_COLUMNS[key]}
+    return [column for column in TALLY_COLUMNS if column in needed]
+
+
+def has_boundary_tables(graph) -> bool:
+    """True when `graph` nodes carry the `area`/`perimeter` emitted by graph construction."""
+    first = next(iter(graph.nodes), None)
+    return first is not None and "perimeter" in graph.nodes[first]
+
+
+# Array kernels shared by `MCalc` and `MetricsEngine`. Reductions over districts use `fsum`, so
+# results do not depend on the order districts are listed in.
+
+
+def _efficiency_gap(dem: np.ndarray, rep: np.ndarray, total_votes: float) -> float:
+    total_votes_per_district = dem + rep
+    wasted_dem = fsum(np.where(dem > rep, dem - (total_votes_per_district // 2 + 1), dem))
+    wasted_rep = fsum(np.where(rep > dem, rep - (total_votes_per_district // 2 + 1), rep))
+    return (wasted_dem - wasted_rep) / total_votes if total_votes > 0 else np.nan
+
+
+def _partisan_proportionality(dem: np.ndarray, rep: np.ndarray) -> float:
+    """
+    Compute partisan proportionality proxy.
+
+    TODO: Current formulation follows legacy behavior (district competitiveness proxy)
+    and should be revisited alongside reward alignment in Phase 2.
+    """
+    total = dem + rep
+    voted = total > 0
+    margins = np.abs(dem[voted] - rep[voted]) / total[voted]
+    avg_margin = fsum(margins) / margins.size if margins.size else 0.5
+    return 1.0 - avg_margin
+
+
+def _seats_votes_difference(
+    dem: np.ndarray, rep: np.ndarray, total_dem: float, total_rep: float, total_votes: float
+):
+    p_dem = total_dem / total_votes if total_votes > 0 else 0
+    p_rep = total_rep / total_votes if total_votes > 0 else 0
+    total_seats = dem.size
+    s_dem = np.count_nonzero(dem > rep) / total_seats if total_seats > 0 else 0
+    s_rep = np.count_nonzero(rep > dem) / total_seats if total_seats > 0 else 0
+    diffs = []
+    if p_dem > 0:
+        diffs.append(abs(p_dem - s_dem) / p_dem)
+    if p_rep > 0:
+        diffs.append(abs(p_rep - s_rep) / p_rep)
+    return np.mean(diffs) if diffs else None
+
+
+def _minority_opportunity(tallies: Dict[str, np.ndarray], threshold: float = 0.5):
+    total_pop = tallies["P0040001"]
+    valid_mask = total_pop > 0
+    if not np.any(valid_mask):
+        return {"minority_avg": 0.0, "minority_min": 0.0}
+    total_pop = total_pop[valid_mask]
+    pct_minority = 1 - tallies["P0040005"][valid_mask] / total_pop
+    opportunity_mask = pct_minority >= threshold
+    for column in ("P0040002", "P0040006", "P0040007", "P0040008", "P0040009"):
+        opportunity_mask |= tallies[column][valid_mask] / total_pop >= threshold
+    if np.any(opportunity_mask):
+        minority_shares = pct_minority[opportunity_mask]
+        return {
+            "minority_avg": fsum(minority_shares) / minority_shares.size,
+            "minority_min": float(np.min(minority_shares)),
+        }
+    return {"minority_avg": 0.0, "minority_min": 0.0}
+
+
+def _group_efficiency_gap(tallies: Dict[str, np.ndarray]) -> Dict[str, float]:
+    dem, rep = tallies["CompDemVot"], tallies["CompRepVot"]
+    return {"EfficiencyGap": _efficiency_gap(dem, rep, fsum(dem) + fsum(rep))}
+
+
+def _group_partisan_prop(tallies: Dict[str, np.ndarray]) -> Dict[str, float]:
+    return {
+        "PartisanProp": _partisan_proportionality(tallies["CompDemVot"], tallies["CompRepVot"])
+    }
+
+
+def _group_seats_votes(tallies: Dict[str, np.ndarray]) -> Dict[str, float]:
+    dem, rep = tallies["CompDemVot"], tallies["CompRepVot"]
+    total_dem, total_rep = fsum(dem), fsum(rep)
+    return {
+        "SeatsVotesDiff": _seats_votes_difference(
+            dem, rep, total_dem, total_rep, total_dem + total_rep
+        )
+    }
+
+
+def _group_minority(tallies: Dict[str, np.ndarray]) -> Dict[str, float]:
+    minority = _minority_opportunity(tallies)
+    return {"MinOppAvg": minority["minority_avg"], "MinOppMin": minority["minority_min"]}
+
+
+def _group_mean_median(tallies: Dict[str, np.ndarray]) -> Dict[str, float]:
+    dem, rep = pd.Series(tallies["CompDemVot"]), pd.Series(tallies["CompRepVot"])
+    dem_shares = dem / (dem + rep)
+    rep_shares = rep / (dem + rep)
+    return {
+        "MeanMedianDem": dem_shares.mean() - dem_shares.median(),
+        "MeanMedianRep": rep_shares.mean() - rep_shares.median(),
+    }
+
+
+_TALLY_GROUPS = {
+    "efficiency_gap": _group_efficiency_gap,
+    "partisan_prop": _group_partisan_prop,
+    "seats_votes": _group_seats_votes,
+    "minority": _group_minority,
+    "mean_median": _group_mean_median,
+}
+
+
+def _tally_metrics(
+    tallies: Dict[str, np.ndarray], metrics: Iterable[str] = DEFAULT_METRICS
+) -> Dict[str, float]:
+    """Tally-based `metrics` from per-district arrays; each group is computed at most once.
+
+    Only the columns of `required_columns(metrics)` need to be present in `tallies`;
+    geometry metrics are left to the caller.
+    """
+    metrics = tuple(metrics)
+    values: Dict[str, float] = {}
+    for name in metrics:
+        group = METRIC_REGISTRY[name].group
+        if name not in values and group in _TALLY_GROUPS:
+            values.update(_TALLY_GROUPS[group](tallies))
+    return {name: values[name] for name in metrics if name in values}
+
+
+def _batch_tally_metrics(tallies: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Vectorized `_tally_metrics` over plans: `tallies` is (plans, k, TALLY_COLUMNS).
+
+    Absent districts have all-zero tallies, which every formula below ignores except the seat
+    count, so `present` (plans, k) is only needed there. Returns the first five
+    `BATCH_METRICS` columns.
+    """
+    dem = tallies[:, :, _COL["CompDemVot"]]
+    rep = tallies[:, :, _COL["CompRepVot"]]
+    total_dem, total_rep = dem.sum(axis=1), rep.sum(axis=1)
+    total_votes = total_dem + total_rep
+    has_votes = total_votes > 0
+    safe_votes = np.where(has_votes, total_votes, 1.0)
+
+    per_district = dem + rep
+    wasted_dem = np.where(dem > rep, dem - (per_district // 2 + 1), dem).sum(axis=1)
+    wasted_rep = np.where(rep > dem, rep - (per_district // 2 + 1), rep).sum(axis=1)
+    efficiency_gap = np.where(has_votes, (wasted_dem - wasted_rep) / safe_votes, np.nan)
+
+    voted = per_district > 0
+    margins = np.abs(dem - rep) / np.where(voted, per_district, 1.0)
+    n_voted = voted.sum(axis=1)
+    avg_margin = np.where(
+        n_voted > 0, np.where(voted, margins, 0.0).sum(axis=1) / np.maximum(n_voted, 1), 0.5
+    )
+    partisan_prop = 1.0 - avg_margin
+
+    p_dem = np.where(has_votes, total_dem / safe_votes, 0.0)
+    p_rep = np.where(has_votes, total_rep / safe_votes, 0.0)
+    seats = present.sum(axis=1)
+    safe_seats = np.maximum(seats, 1)
+    s_dem = np.where(seats > 0, (dem > rep).sum(axis=1) / safe_seats, 0.0)
+    s_rep = np.where(seats > 0, (rep > dem).sum(axis=1) / safe_seats, 0.0)
+    diff_dem = np.abs(p_dem - s_dem) / np.where(p_dem > 0, p_dem, 1.0)
+    diff_rep = np.abs(p_rep - s_rep) / np.where(p_rep > 0, p_rep, 1.0)
+    n_diffs = (p_dem > 0).astype(np.int64) + (p_rep > 0)
+    diff_sum = np.where(p_dem > 0, diff_dem, 0.0) + np.where(p_rep > 0, diff_rep, 0.0)
+    seats_votes = np.where(n_diffs > 0, diff_sum / np.maximum(n_diffs, 1), np.nan)
+
+    total_pop = tallies[:, :, _COL["P0040001"]]
+    valid = total_pop > 0
+    safe_pop = np.where(valid, total_pop, 1.0)
+    pct_minority = 1 - tallies[:, :, _COL["P0040005"]] / safe_pop
+    opportunity = pct_minority >= 0.5
+    for column in ("P0040002", "P0040006", "P0040007", "P0040008", "P0040009"):
+        opportunity |= tallies[:, :, _COL[column]] / safe_pop >= 0.5
+    opportunity &= valid
+    n_opp = opportunity.sum(axis=1)
+    minority_avg = np.where(
+        n_opp > 0,
+        np.where(opportunity, pct_minority, 0.0).sum(axis=1) / np.maximum(n_opp, 1),
+        0.0,
+    )
+    minority_min = np.where(n_opp > 0, np.where(opportunity, pct_minority, np.inf).min(axis=1), 0.0)
+    return np.column_stack(
+        [efficiency_gap, partisan_prop, seats_votes, minority_avg, minority_min]
+    )
 
 
 class MCalc:
     """Metric calculator for partitions."""
 
-    def _prepare_partition_data(self, partition, use_geometry: bool = False):
-        districts = pd.DataFrame(
+    def _district_tallies(
+        self, partition, store: Optional[PrecinctStore], columns: Iterable[str] = TALLY_COLUMNS
+    ) -> pd.DataFrame:
+        columns = list(columns)
+        if store is not None:
+            codes = store.parts_array(partition.parts)
+            n_parts = len(partition.parts)
+            tallies = {"DISTRICT": list(partition.parts.keys())}
+            tallies.update(store.district_totals(columns, codes, n_parts))
+            return pd.DataFrame(tallies)
+        nodes_data = partition.graph.nodes
+        return pd.DataFrame(
             [
                 {
                     "DISTRICT": d,
-                    "P0010001": sum(partition.graph.nodes[n].get("P0010001", 0) for n in nodes),
-                    "P0040001": sum(partition.graph.nodes[n].get("P0040001", 0) for n in nodes),
-                    "CompDemVot": sum(partition.graph.nodes[n].get("CompDemVot", 0) for n in nodes),
-                    "CompRepVot": sum(partition.graph.nodes[n].get("CompRepVot", 0) for n in nodes),
-                    "P0040002": sum(partition.graph.nodes[n].get("P0040002", 0) for n in nodes),
-                    "P0040005": sum(partition.graph.nodes[n].get("P0040005", 0) for n in nodes),
-                    "P0040006": sum(partition.graph.nodes[n].get("P0040006", 0) for n in nodes),
-                    "P0040007": sum(partition.graph.nodes[n].get("P0040007", 0) for n in nodes),
-                    "P0040008": sum(partition.graph.nodes[n].get("P0040008", 0) for n in nodes),
-                    "P0040009": sum(partition.graph.nodes[n].get("P0040009", 0) for n in nodes),
+                    **{name: sum(nodes_data[n].get(name, 0) for n in nodes) for name in columns},
                 }
                 for d, nodes in partition.parts.items()
-            ]
+            ],
+            columns=["DISTRICT", *columns],
         )
-        total_dem = districts["CompDemVot"].sum()
-        total_rep = districts["CompRepVot"].sum()
-        total_votes = total_dem + total_rep
 
+    def _prepare_partition_data(
+        self,
+        partition,
+        use_geometry: bool = False,
+        store: Optional[PrecinctStore] = None,
+        columns: Iterable[str] = TALLY_COLUMNS,
+    ):
+        districts = self._district_tallies(partition, store, columns)
         if not use_geometry:
-            return districts, None, total_dem, total_rep, total_votes
+            return districts, None
 
         geom_series = []
         for _, nodes in partition.parts.items():
-            geoms = [partition.graph.nodes[n]["geometry"] for n in nodes]
+            geoms = node_geometries(partition.graph, nodes)
             geom_series.append(gpd.GeoSeries(geoms).geometry.union_all())
         districts_geo = gpd.GeoDataFrame(districts, geometry=geom_series)
         if districts_geo.crs is None:
             districts_geo.set_crs(epsg=2163, inplace=True)
-        return districts, districts_geo, total_dem, total_rep, total_votes
-
-    def _efficiency_gap(self, districts: pd.DataFrame, total_votes: float) -> float:
-        dem_votes = districts["CompDemVot"].values
-        rep_votes = districts["CompRepVot"].values
-        total_votes_per_district = dem_votes + rep_votes
-        wasted_dem = np.sum(
-            np.where(
-                dem_votes > rep_votes,
-                dem_votes - (total_votes_per_district // 2 + 1),
-                dem_votes,
-            )
-        )
-        wasted_rep = np.sum(
-            np.where(
-                rep_votes > dem_votes,
-                rep_votes - (total_votes_per_district // 2 + 1),
-                rep_votes,
-            )
-        )
-        return (wasted_dem - wasted_rep) / total_votes if total_votes > 0 else np.nan
-
-    def _partisan_proportionality(
-        self, districts: pd.DataFrame, total_dem: float, total_votes: float
-    ) -> float:
-        """
-        Compute partisan proportionality proxy.
-
-        TODO: Current formulation follows legacy behavior (district competitiveness proxy)
-        and should be revisited alongside reward alignment in Phase 2.
-        """
-        del total_dem, total_votes
-        vote_margins = []
-        for _, district in districts.iterrows():
-            dem_votes = district["CompDemVot"]
-            rep_votes = district["CompRepVot"]
-            total_district_votes = dem_votes + rep_votes
-            if total_district_votes > 0:
-                margin = abs(dem_votes - rep_votes) / total_district_votes
-                vote_margins.append(margin)
-        avg_margin = np.mean(vote_margins) if vote_margins else 0.5
-        return 1.0 - avg_margin
-
-    def _seats_votes_difference(
-        self, districts: pd.DataFrame, total_dem: float, total_rep: float, total_votes: float
-    ):
-        p_dem = total_dem / total_votes if total_votes > 0 else 0
-        p_rep = total_rep / total_votes if total_votes > 0 else 0
-        dem_seats = (districts["CompDemVot"] > districts["CompRepVot"]).sum()
-        rep_seats = (districts["CompRepVot"] > districts["CompDemVot"]).sum()
-        total_seats = len(districts)
-        s_dem = dem_seats / total_seats if total_seats > 0 else 0
-        s_rep = rep_seats / total_seats if total_seats > 0 else 0
-        diffs = []
-        if p_dem > 0:
-            diffs.append(abs(p_dem - s_dem) / p_dem)
-        if p_rep > 0:
-            diffs.append(abs(p_rep - s_rep) / p_rep)
-        return np.mean(diffs) if diffs else None
+        return districts, districts_geo
 
     def _polsby_popper(self, districts_geo: gpd.GeoDataFrame):
         scores = []
@@ -111,64 +343,212 @@ class MCalc:
             scores.append(score)
         return {"pp_avg": float(np.mean(scores)), "pp_min": float(np.min(scores))}
 
-    def _minority_opportunity(self, districts: pd.DataFrame, threshold: float = 0.5):
-        total_pop = districts["P0040001"].values
-        valid_mask = total_pop > 0
-        if not np.any(valid_mask):
-            return {"minority_avg": 0.0, "minority_min": 0.0}
-        pct_white = districts["P0040005"].values[valid_mask] / total_pop[valid_mask]
-        pct_latino = districts["P0040002"].values[valid_mask] / total_pop[valid_mask]
-        pct_black = districts["P0040006"].values[valid_mask] / total_pop[valid_mask]
-        pct_native = districts["P0040007"].values[valid_mask] / total_pop[valid_mask]
-        pct_asian = districts["P0040008"].values[valid_mask] / total_pop[valid_mask]
-        pct_nhpi = districts["P0040009"].values[valid_mask] / total_pop[valid_mask]
-        pct_minority = 1 - pct_white
-        opportunity_mask = (
-            (pct_latino >= threshold)
-            | (pct_black >= threshold)
-            | (pct_native >= threshold)
-            | (pct_asian >= threshold)
-            | (pct_nhpi >= threshold)
-            | (pct_minority >= threshold)
-        )
-        if np.any(opportunity_mask):
-            minority_shares = pct_minority[opportunity_mask]
-            return {
-                "minority_avg": float(np.mean(minority_shares)),
-                "minority_min": float(np.min(minority_shares)),
-            }
-        return {"minority_avg": 0.0, "minority_min": 0.0}
+    def _polsby_popper_tables(self, partition, store: PrecinctStore):
+        """Polsby-Popper from per-precinct area/perimeter and per-edge shared boundary arrays."""
+        codes = store.parts_array(partition.parts)
+        n_parts = len(partition.parts)
+        area = store.district_sums("area", codes, n_parts)
+        perim = store.district_perimeters(codes, n_parts)
+        safe = np.where(perim > 0, perim, 1.0)
+        scores = np.where(perim > 0, 4 * np.pi * area / safe**2, 0.0)
+        return {"pp_avg": float(np.mean(scores)), "pp_min": float(np.min(scores))}
 
-    def _mean_median_test(self, districts: pd.DataFrame):
-        dem_shares = districts["CompDemVot"] / (districts["CompDemVot"] + districts["CompRepVot"])
-        rep_shares = districts["CompRepVot"] / (districts["CompDemVot"] + districts["CompRepVot"])
-        return {
-            "dem_mm": dem_shares.mean() - dem_shares.median(),
-            "rep_mm": rep_shares.mean() - rep_shares.median(),
-        }
+    def calculate_metrics(
+        self,
+        partition,
+        baseline: bool = False,
+        include_geometry: bool = False,
+        store: Optional[PrecinctStore] = None,
+        metrics: Optional[Iterable[str]] = None,
+    ):
+        """Return a single-row DataFrame of metric values.
+
+        Passing a `PrecinctStore` built from `partition.graph` replaces per-node dict lookups
+        with one `np.bincount` per tallied column. Polsby-Popper is computed from the store's
+        boundary tables when it carries `perimeter`; geometry unions are only a fallback for
+        graphs built without those tables.
 
-    def calculate_metrics(self, partition, baseline: bool = False, include_geometry: bool = False):
-        """Return a single-row DataFrame of metric values."""
-        districts, districts_geo, total_dem, total_rep, total_votes = self._prepare_partition_data(
-            partition, use_geometry=include_geometry
+        `metrics` restricts the result to those `METRIC_REGISTRY` names (default: all but the
+        baseline-only mean-median test, which `baseline` adds). Only the tally columns and
+        geometry that the requested metrics declare as inputs are materialized.
+        """
+        names = resolve_metrics(metrics, baseline)
+        columns = required_columns(names)
+        use_geometry = include_geometry and "geometry" in required_inputs(names)
+        if use_geometry and store is None and has_boundary_tables(partition.graph):
+            store = PrecinctStore.from_graph(partition.graph, columns + BOUNDARY_COLUMNS)
+        use_tables = use_geometry and store is not None and store.has_column("perimeter")
+        districts, districts_geo = self._prepare_partition_data(
+            partition, use_geometry=use_geometry and not use_tables, store=store, columns=columns
         )
-        minority = self._minority_opportunity(districts)
-        metrics = {
-            "EfficiencyGap": self._efficiency_gap(districts, total_votes),
-            "PartisanProp": self._partisan_proportionality(districts, total_dem, total_votes),
-            "SeatsVotesDiff": self._seats_votes_difference(
-                districts, total_dem, total_rep, total_votes
+        values = _tally_metrics({name: districts[name].values for name in columns}, names)
+        if "PolPopperAvg" in names or "PolPopperMin" in names:
+            pp_scores = None
+            if use_tables:
+                pp_scores = self._polsby_popper_tables(partition, store)
+            elif use_geometry and districts_geo is not None:
+                pp_scores = self._polsby_popper(districts_geo)
+            if pp_scores is not None:
+                values.update(
+                    {"PolPopperAvg": pp_scores["pp_avg"], "PolPopperMin": pp_scores["pp_min"]}
+                )
+            else:
+                values.update({"PolPopperAvg": np.nan, "PolPopperMin": np.nan})
+        return pd.DataFrame([{name: values[name] for name in names}])
+
+    def calculate_metrics_batch(
+        self,
+        assignments: np.ndarray,
+        store: PrecinctStore,
+        n_districts: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> np.ndarray:
+        """Score many plans at once; returns a `(n_plans, len(BATCH_METRICS))` float array.
+
+        `assignments` is an `(n_plans, store.n_nodes)` matrix of district codes aligned with
+        `store.node_ids` (e.g. rows of `PrecinctStore.assignment_array`). Tallies for a whole
+        chunk come from one sparse product and every formula is vectorized across plans.
+        Polsby-Popper uses the store's boundary tables and is NaN without `perimeter`.
+        Values agree with `calculate_metrics` up to float rounding, and `SeatsVotesDiff` is
+        NaN where `calculate_metrics` gives None. Chunks default to `BATCH_CHUNK_BYTES` of
+        working memory.
+        """
+        assignments = np.atleast_2d(np.asarray(assignments, dtype=np.int64))
+        n_plans, n_nodes = assignments.shape
+        if n_nodes != store.n_nodes:
+            raise ValueError(f"Assignments have {n_nodes} columns, store has {store.n_nodes} nodes")
+        if n_districts is None:
+            n_districts = int(assignments.max()) + 1 if assignments.size else 0
+        with_tables = store.has_column("perimeter")
+        columns = TALLY_COLUMNS + (BOUNDARY_COLUMNS if with_tables else [])
+        node_values = np.column_stack([store.column(name) for name in columns])
+        if chunk_size is None:
+            n_edges = len(store.indices) if with_tables else 0
+            per_plan = 32 * n_nodes + 24 * n_edges + 8 * n_districts * len(columns)
+            chunk_size = max(1, BATCH_CHUNK_BYTES // max(per_plan, 1))
+
+        results = np.full((n_plans, len(BATCH_METRICS)), np.nan)
+        for start in range(0, n_plans, chunk_size):
+            codes = assignments[start : start + chunk_size]
+            results[start : start + len(codes)] = self._score_chunk(
+                codes, store, node_values, n_districts, with_tables
+            )
+        return results
+
+    def _score_chunk(
+        self,
+        codes: np.ndarray,
+        store: PrecinctStore,
+        node_values: np.ndarray,
+        n_districts: int,
+        with_tables: bool,
+    ) -> np.ndarray:
+        n_plans, n_nodes = codes.shape
+        n_cells = n_plans * n_districts
+        # Column `p * k + d` of `membership` is district `d` of plan `p`; each node row holds
+        # one entry per plan, so `membership.T @ node_values` tallies every district at once.
+        offsets = codes + (np.arange(n_plans, dtype=np.int64) * n_districts)[:, None]
+        membership = csr_matrix(
+            (
+                np.ones(offsets.size),
+                offsets.T.ravel(),
+                np.arange(0, offsets.size + 1, n_plans, dtype=np.int64),
             ),
-            "MinOppAvg": minority["minority_avg"],
-            "MinOppMin": minority["minority_min"],
-        }
-        if include_geometry and districts_geo is not None:
-            pp_scores = self._polsby_popper(districts_geo)
-            metrics.update({"PolPopperAvg": pp_scores["pp_avg"], "PolPopperMin": pp_scores["pp_min"]})
-        else:
-            metrics.update({"PolPopperAvg": np.nan, "PolPopperMin": np.nan})
-        if baseline:
-            mm = self._mean_median_test(districts)
-            metrics.update({"MeanMedianDem": mm["dem_mm"], "MeanMedianRep": mm["rep_mm"]})
-        return pd.DataFrame([metrics])
+            shape=(n_nodes, n_cells),
+        )
+        totals = np.asarray(membership.T @ node_values).reshape(n_plans, n_districts, -1)
+        present = np.bincount(offsets.ravel(), minlength=n_cells).reshape(n_plans, -1) > 0
+
+        scores = np.full((n_plans, len(BATCH_METRICS)), np.nan)
+        scores[:, :5] = _batch_tally_metrics(totals[:, :, : len(TALLY_COLUMNS)], present)
+        if with_tables:
+            area = totals[:, :, len(TALLY_COLUMNS)]
+            perim = totals[:, :, len(TALLY_COLUMNS) + 1]
+            src = offsets[:, store.edge_sources]
+            internal = src == offsets[:, store.indices]
+            shared = store.shared_perim
+            if shared is None:
+                shared = np.zeros(len(store.indices))
+            shared = np.broadcast_to(shared, src.shape)
+            perim = perim - np.bincount(
+                src[internal], weights=shared[internal], minlength=n_cells
+            ).reshape(n_plans, -1)
+            safe = np.where(perim > 0, perim, 1.0)
+            pp = np.where(perim > 0, 4 * np.pi * area / safe**2, 0.0)
+            n_present = np.maximum(present.sum(axis=1), 1)
+            scores[:, 5] = np.where(present, pp, 0.0).sum(axis=1) / n_present
+            scores[:, 6] = np.where(present, pp, np.inf).min(axis=1)
+        return scores
+
+
+class MetricsEngine:
+    """Incremental counterpart of `MCalc` for the tally-based (non-geometry) metrics.
 
+    Keeps a `(districts x TALLY_COLUMNS)` matrix indexed by district code, so a flip is two row
+    updates and `metrics()` costs O(k). Values equal `MCalc.calculate_metrics` for the same
+    plan as long as tallies are integer-valued (census counts and votes), since then the
+    row updates are exact.
+    """
+
+    def __init__(self, store: PrecinctStore, codes: np.ndarray, n_districts: int):
+        self.n_districts = n_districts
+        self._node_tallies = np.column_stack([store.column(name) for name in TALLY_COLUMNS])
+        self.tallies = np.zeros((n_districts, len(TALLY_COLUMNS)), dtype=np.float64)
+        self.sizes = np.zeros(n_districts, dtype=np.int64)
+        self.load(codes)
+
+    def load(self, codes: np.ndarray) -> None:
+        """Rebuild tallies and district sizes from a full code array."""
+        self.sizes = np.bincount(codes, minlength=self.n_districts)
+        for col in range(len(TALLY_COLUMNS)):
+            self.tallies[:, col] = np.bincount(
+                codes, weights=self._node_tallies[:, col], minlength=self.n_districts
+            )
+
+    def apply_move(self, row: int, source: int, target: int) -> None:
+        """Move store row `row` from district code `source` to `target`."""
+        values = self._node_tallies[row]
+        self.tallies[source] -= values
+        self.tallies[target] += values
+        self.sizes[source] -= 1
+        self.sizes[target] += 1
+
+    def candidate_metrics(
+        self, rows: np.ndarray, sources: np.ndarray, targets: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Metric values after each candidate move, for all moves at once.
+
+        Move `i` sends store row `rows[i]` from code `sources[i]` to `targets[i]`; the tallies
+        of every candidate plan are the current matrix with those two rows adjusted, scored
+        by the same vectorized kernels as `MCalc.calculate_metrics_batch`. Returns one array
+        per `BATCH_METRICS` name, aligned with the moves (Polsby-Popper is NaN).
+        """
+        rows, sources, targets = (np.asarray(a, dtype=np.int64) for a in (rows, sources, targets))
+        n_moves = len(rows)
+        moved = np.arange(n_moves)
+        deltas = self._node_tallies[rows]
+        tallies = np.repeat(self.tallies[None], n_moves, axis=0)
+        tallies[moved, sources] -= deltas
+        tallies[moved, targets] += deltas
+        sizes = np.repeat(self.sizes[None], n_moves, axis=0)
+        sizes[moved, sources] -= 1
+        sizes[moved, targets] += 1
+        scores = _batch_tally_metrics(tallies, sizes > 0)
+        values = {name: scores[:, col] for col, name in enumerate(BATCH_METRICS[:5])}
+        values.update({name: np.full(n_moves, np.nan) for name in BATCH_METRICS[5:]})
+        return values
+
+    def metrics(self, metrics: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Same values as `MCalc.calculate_metrics(..., metrics=metrics)` without geometry.
+
+        Polsby-Popper, when requested, is NaN; only the columns the metrics need are read.
+        """
+        names = resolve_metrics(metrics)
+        present = self.tallies[self.sizes > 0]
+        values = _tally_metrics(
+            {name: present[:, _COL[name]] for name in required_columns(names)}, names
+        )
+        for name in names:
+            if METRIC_REGISTRY[name].group == "polsby_popper":
+                values[name] = np.nan
+        return {name: values[name] for name in names}
@@ -0,0 +1,219 @@
+"""Publish static precinct data to shared memory so worker processes attach without copies."""
+
+import numbers
+import sys
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import gerrychain as gc
+import numpy as np
+
+from redistricting.graph.construction import UPDATER_COLUMNS, _build_partition
+from redistricting.graph.geometry import GeometryStore
+from redistricting.graph.store import PrecinctStore, district_index
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """Location and layout of one array inside a shared memory block."""
+
+    shm_name: str
+    dtype: str
+    shape: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class SharedGraphHandle:
+    """Picklable description of a published graph; pass it to worker processes."""
+
+    arrays: Dict[str, SharedArraySpec]
+    columns: Tuple[str, ...]
+    district_col: str
+    district_labels: Tuple[Hashable, ...]
+    geometry_crs: Optional[str] = None
+
+
+def _numeric_attributes(graph) -> List[str]:
+    names: Dict[str, None] = {}
+    for _node, data in graph.nodes(data=True):
+        for name, value in data.items():
+            if isinstance(value, numbers.Real) and not isinstance(value, bool):
+                names.setdefault(name)
+    return list(names)
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    # Attaching processes must not unlink the publisher's blocks when they exit.
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    block = shared_memory.SharedMemory(name=name)
+    # Before 3.13 attaching registers the block with this process's resource tracker, which
+    # unlinks it on exit. Workers started by multiprocessing share the publisher's tracker,
+    # so this can also drop the publisher's entry; `SharedPrecinctGraph.close` restores it.
+    resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def _view(block: shared_memory.SharedMemory, spec: SharedArraySpec) -> np.ndarray:
+    array = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=block.buf)
+    array.setflags(write=False)
+    return array
+
+
+class SharedPrecinctGraph:
+    """Publisher-side owner of the shared blocks; `close()` unlinks them."""
+
+    def __init__(self, handle: SharedGraphHandle, blocks: List[shared_memory.SharedMemory]):
+        self.handle = handle
+        self._blocks = blocks
+
+    def close(self) -> None:
+        """Release and unlink every block; attached workers must be done with them."""
+        for block in self._blocks:
+            block.close()
+            if sys.version_info < (3, 13):
+                # An attach in a process sharing our tracker may have unregistered it.
+                resource_tracker.register(block._name, "shared_memory")
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedPrecinctGraph":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@dataclass
+class AttachedPrecinctGraph:
+    """Worker-side view: graph and partition rebuilt from shared arrays, plus the store."""
+
+    graph: gc.Graph
+    partition: gc.Partition
+    store: PrecinctStore
+    _blocks: List[shared_memory.SharedMemory] = field(default_factory=list, repr=False)
+
+    def copy_attributes(self) -> None:
+        """Copy every shared column onto node dicts and `shared_perim` onto edges.
+
+        Only for graph-walking code such as coarsening; it costs a per-process copy.
+        """
+        nodes = self.store.node_ids.tolist()
+        for name, values in self.store.columns.items():
+            for node, value in zip(nodes, values.tolist()):
+                self.graph.nodes[node][name] = value
+        if self.store.shared_perim is not None:
+            sources = self.store.node_ids[self.store.edge_sources].tolist()
+            targets = self.store.node_ids[self.store.indices].tolist()
+            for u, v, length in zip(sources, targets, self.store.shared_perim.tolist()):
+                self.graph.edges[u, v]["shared_perim"] = length
+
+    def close(self) -> None:
+        """Detach from the blocks (the publisher remains responsible for unlinking)."""
+        for block in self._blocks:
+            block.close()
+        self._blocks = []
+
+
+def publish_precinct_graph(
+    graph,
+    partition: gc.Partition,
+    columns: Optional[Iterable[str]] = None,
+    district_col: str = "district",
+) -> SharedPrecinctGraph:
+    """Copy attribute columns, CSR adjacency, edge tables and the baseline assignment once.
+
+    `columns` defaults to every numeric node attribute; attached graphs carry the baseline
+    label under `district_col`. A detached `GeometryStore` is published too, so workers can
+    still serve geometry metrics and renderers.
+    """
+    names = list(columns) if columns is not None else _numeric_attributes(graph)
+    store = PrecinctStore.from_graph(graph, names)
+    names = [name for name in names if store.has_column(name)]
+    if store.node_ids.dtype.kind not in "iu":
+        raise ValueError("Shared publication requires integer node ids")
+
+    labels = tuple(district_index(partition.parts.keys()))
+    arrays: Dict[str, np.ndarray] = {
+        "node_ids": store.node_ids,
+        "indptr": store.indptr,
+        "indices": store.indices,
+        "shared_perim": store.shared_perim,
+        "assignment": store.assignment_array(partition.assignment, district_index(labels)),
+    }
+    for idx, name in enumerate(names):
+        arrays[f"col_{idx}"] = store.columns[name]
+    geometry_store = getattr(graph, "geometry_store", None)
+    if geometry_store is not None:
+        arrays["geometry_wkb"] = np.asarray(geometry_store.wkb)
+        arrays["geometry_offsets"] = np.asarray(geometry_store.offsets)
+
+    blocks: List[shared_memory.SharedMemory] = []
+    specs: Dict[str, SharedArraySpec] = {}
+    try:
+        for key, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            blocks.append(block)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            specs[key] = SharedArraySpec(block.name, array.dtype.str, tuple(array.shape))
+    except Exception:
+        for block in blocks:
+            block.close()
+            block.unlink()
+        raise
+
+    handle = SharedGraphHandle(
+        arrays=specs,
+        columns=tuple(names),
+        district_col=district_col,
+        district_labels=labels,
+        geometry_crs=str(geometry_store.crs) if geometry_store and geometry_store.crs else None,
+    )
+    return SharedPrecinctGraph(handle, blocks)
+
+
+def attach_precinct_graph(handle: SharedGraphHandle) -> AttachedPrecinctGraph:
+    """Map the published blocks read-only and rebuild a lean graph/partition around them.
+
+    gerrychain partitions need a networkx graph, so each worker still builds its own
+    adjacency dicts, but node dicts hold only the `UPDATER_COLUMNS` tallies and the district
+    label. Other attribute columns, `shared_perim`, and geometries are read through `store`
+    and the shared blocks; `copy_attributes` puts them on the graph where code needs that.
+    """
+    blocks: Dict[str, shared_memory.SharedMemory] = {}
+    arrays: Dict[str, np.ndarray] = {}
+    for key, spec in handle.arrays.items():
+        blocks[key] = _open_block(spec.shm_name)
+        arrays[key] = _view(blocks[key], spec)
+
+    store = PrecinctStore(
+        node_ids=arrays["node_ids"],
+        columns={name: arrays[f"col_{idx}"] for idx, name in enumerate(handle.columns)},
+        indptr=arrays["indptr"],
+        indices=arrays["indices"],
+        shared_perim=arrays["shared_perim"],
+    )
+    # Node dicts carry only what the partition updaters tally plus the district label;
+    # every other column and the edge boundary lengths stay in the shared store.
+    nodes = store.node_ids.tolist()
+    graph = gc.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(
+        zip(store.node_ids[store.edge_sources].tolist(), store.node_ids[store.indices].tolist())
+    )
+    tallied = {
+        name: store.columns[name].tolist() for name in UPDATER_COLUMNS if name in store.columns
+    }
+    labels = [handle.district_labels[code] for code in arrays["assignment"].tolist()]
+    for i, node in enumerate(nodes):
+        attrs: Dict[str, Any] = {name: values[i] for name, values in tallied.items()}
+        attrs[handle.district_col] = labels[i]
+        graph.nodes[node].update(attrs)
+    if "geometry_wkb" in arrays:
+        graph.geometry_store = GeometryStore(
+            arrays["geometry_wkb"], arrays["geometry_offsets"], nodes, crs=handle.geometry_crs
+        )
+
+    partition = _build_partition(graph, handle.district_col)
+    return AttachedPrecinctGraph(graph, partition, store, list(blocks.values()))
@@ -0,0 +1,129 @@
+"""Columnar precinct attributes and CSR adjacency built once from a precinct graph."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Set
+
+import networkx as nx
+import numpy as np
+
+
+def district_index(labels: Iterable[Hashable]) -> Dict[Hashable, int]:
+    """Map district labels to dense codes 0..k-1 in sorted label order."""
+    return {label: code for code, label in enumerate(sorted(set(labels)))}
+
+
+@dataclass
+class PrecinctStore:
+    """Contiguous per-node columns plus CSR `indptr/indices` adjacency.
+
+    Node `i` of every array corresponds to `node_ids[i]`; `node_index` maps back.
+    `shared_perim[k]` is the boundary length shared along CSR entry `indices[k]`.
+    `missing_columns` names the zero-filled columns the source graph never carried.
+    """
+
+    node_ids: np.ndarray
+    columns: Dict[str, np.ndarray]
+    indptr: np.ndarray
+    indices: np.ndarray
+    shared_perim: Optional[np.ndarray] = None
+    missing_columns: Set[str] = field(default_factory=set)
+    node_index: Dict[Any, int] = field(init=False, repr=False)
+    _edge_src: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.node_index = {node: idx for idx, node in enumerate(self.node_ids.tolist())}
+
+    @classmethod
+    def from_graph(cls, graph: nx.Graph, columns: Iterable[str]) -> "PrecinctStore":
+        """Gather `columns` (missing values read as 0) and adjacency from `graph`."""
+        nodes: List[Any] = list(graph.nodes())
+        position = {node: idx for idx, node in enumerate(nodes)}
+        names = list(dict.fromkeys(columns))
+        carried = {name for _node, attrs in graph.nodes(data=True) for name in attrs}
+        data = {
+            name: np.fromiter(
+                (graph.nodes[n].get(name, 0) for n in nodes), dtype=np.float64, count=len(nodes)
+            )
+            for name in names
+        }
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        indices: List[int] = []
+        shared_perim: List[float] = []
+        for idx, node in enumerate(nodes):
+            for nbr, edge in graph[node].items():
+                indices.append(position[nbr])
+                shared_perim.append(edge.get("shared_perim", 0.0))
+            indptr[idx + 1] = len(indices)
+        return cls(
+            node_ids=np.asarray(nodes),
+            columns=data,
+            indptr=indptr,
+            indices=np.asarray(indices, dtype=np.int64),
+            shared_perim=np.asarray(shared_perim, dtype=np.float64),
+            missing_columns={name for name in names if name not in carried},
+        )
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return the column for `name`, or zeros when the graph never carried it."""
+        if name not in self.columns:
+            self.columns[name] = np.zeros(self.n_nodes, dtype=np.float64)
+            self.missing_columns.add(name)
+        return self.columns[name]
+
+    def has_column(self, name: str) -> bool:
+        """True when the source graph carried `name`, rather than it being zero-filled."""
+        return name in self.columns and name not in self.missing_columns
+
+    def neighbors(self, idx: int) -> np.ndarray:
+        """Return neighbour indices of node index `idx`."""
+        return self.indices[self.indptr[idx] : self.indptr[idx + 1]]
+
+    @property
+    def edge_sources(self) -> np.ndarray:
+        """Row index of every CSR entry, i.e. the source node of `indices[k]`."""
+        if self._edge_src is None:
+            self._edge_src = np.repeat(np.arange(self.n_nodes), np.diff(self.indptr))
+        return self._edge_src
+
+    def assignment_array(
+        self, assignment: Mapping[Any, Hashable], index: Mapping[Hashable, int]
+    ) -> np.ndarray:
+        """Encode a node->district mapping as an int64 code array aligned with `node_ids`."""
+        return np.fromiter(
+            (index[assignment[node]] for node in self.node_ids.tolist()),
+            dtype=np.int64,
+            count=self.n_nodes,
+        )
+
+    def parts_array(self, parts: Mapping[Hashable, Iterable[Any]]) -> np.ndarray:
+        """Encode partition parts as codes following the iteration order of `parts`."""
+        codes = np.empty(self.n_nodes, dtype=np.int64)
+        for code, nodes in enumerate(parts.values()):
+            codes[[self.node_index[n] for n in nodes]] = code
+        return codes
+
+    def district_sums(self, name: str, codes: np.ndarray, n_districts: int) -> np.ndarray:
+        """Sum column `name` per district code with a single `np.bincount`."""
+        return np.bincount(codes, weights=self.column(name), minlength=n_districts)
+
+    def district_totals(
+        self, names: Sequence[str], codes: np.ndarray, n_districts: int
+    ) -> Dict[str, np.ndarray]:
+        """Return `district_sums` for several columns."""
+        return {name: self.district_sums(name, codes, n_districts) for name in names}
+
+    def district_perimeters(self, codes: np.ndarray, n_districts: int) -> np.ndarray:
+        """Per-district boundary length: sum of precinct `perimeter` minus internal shared edges.
+
+        Every undirected edge appears twice in the CSR arrays, so the same-district sum already
+        equals `2 * internal shared boundary`.
+        """
+        src = codes[self.edge_sources]
+        internal = src == codes[self.indices]
+        shared = self.shared_perim if self.shared_perim is not None else np.zeros(len(self.indices))
+        doubled = np.bincount(src[internal], weights=shared[internal], minlength=n_districts)
+        return self.district_sums("perimeter", codes, n_districts) - doubled
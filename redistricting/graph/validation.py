@@ -0,0 +1,70 @@
+"""Array-based contiguity and population-balance checks for one or many plans."""
+
+from typing import Dict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from redistricting.graph.store import PrecinctStore
+
+
+def district_component_counts(
+    store: PrecinctStore, codes: np.ndarray, n_districts: int
+) -> np.ndarray:
+    """Return connected-component counts per district for each plan.
+
+    `codes` is `(n_nodes,)` or `(n_plans, n_nodes)` of district codes. Plans are laid out as
+    disjoint blocks of one graph restricted to intra-district edges, so a single
+    `connected_components` call labels every plan at once. Returns `(n_plans, n_districts)`.
+    """
+    codes = np.atleast_2d(np.asarray(codes, dtype=np.int64))
+    n_plans, n_nodes = codes.shape
+    src, dst = store.edge_sources, store.indices
+
+    offsets = (np.arange(n_plans, dtype=np.int64) * n_nodes)[:, None]
+    keep = codes[:, src] == codes[:, dst]
+    rows = (src[None, :] + offsets)[keep]
+    cols = (dst[None, :] + offsets)[keep]
+    size = n_plans * n_nodes
+    adjacency = csr_matrix((np.ones(rows.size, dtype=np.int8), (rows, cols)), shape=(size, size))
+    n_components, labels = connected_components(adjacency, directed=False)
+
+    # Every component lies inside one district of one plan; count components per (plan, code).
+    plan_codes = (codes + np.arange(n_plans)[:, None] * n_districts).ravel()
+    component_owner = np.empty(n_components, dtype=np.int64)
+    component_owner[labels] = plan_codes
+    counts = np.bincount(component_owner, minlength=n_plans * n_districts)
+    return counts.reshape(n_plans, n_districts)
+
+
+def validate_assignments(
+    store: PrecinctStore,
+    codes: np.ndarray,
+    n_districts: int,
+    tolerance: float = 0.05,
+    pop_col: str = "P0010001",
+) -> Dict[str, np.ndarray]:
+    """Validate contiguity and population balance for one plan or a batch of plans.
+
+    Returns arrays shaped `(n_plans, n_districts)` for `contiguous`, `population`,
+    `deviation`, and `within_tolerance`, plus `(n_plans,)` `overall`.
+    """
+    codes = np.atleast_2d(np.asarray(codes, dtype=np.int64))
+    n_plans = codes.shape[0]
+    contiguous = district_component_counts(store, codes, n_districts) == 1
+
+    plan_codes = (codes + np.arange(n_plans)[:, None] * n_districts).ravel()
+    weights = np.tile(store.column(pop_col), n_plans)
+    population = np.bincount(plan_codes, weights=weights, minlength=n_plans * n_districts)
+    population = population.reshape(n_plans, n_districts)
+    ideal_pop = population.sum(axis=1, keepdims=True) / n_districts
+    deviation = (population - ideal_pop) / ideal_pop
+    within_tolerance = np.abs(deviation) <= tolerance
+    return {
+        "contiguous": contiguous,
+        "population": population,
+        "deviation": deviation,
+        "within_tolerance": within_tolerance,
+        "overall": contiguous.all(axis=1) & within_tolerance.all(axis=1),
+    }
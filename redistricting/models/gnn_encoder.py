@@ -109,7 +109,12 @@ class GraphStateEncoder(nn.Module):
         self, x: torch.Tensor, edge_index: torch.Tensor, batch: Optional[torch.Tensor] = None
     ) -> torch.Tensor:
         """Encode node features and aggregate to state embedding."""
-        node_embeddings = self.encoder(x, edge_index)
+        return self.pool(self.encoder(x, edge_index), batch)
+
+    def pool(
+        self, node_embeddings: torch.Tensor, batch: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """Aggregate node embeddings to one state embedding per graph."""
         if self.aggregation == "mean":
             if batch is not None:
                 from torch_geometric.nn import global_mean_pool
@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Mapping, Optional
+from typing import Dict, Mapping, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -16,6 +16,42 @@ class MetricDirection:
     absolute_value: bool = False
 
 
+@dataclass(frozen=True, eq=False)
+class CompiledZScore:
+    """Baseline stats and metric directions as arrays aligned with `names`.
+
+    `valid` marks metrics with a finite median and a finite non-zero std; the others
+    always score zero. `scale` holds 1.0 in their place so division never warns.
+    """
+
+    names: Tuple[str, ...]
+    center: np.ndarray
+    scale: np.ndarray
+    sign: np.ndarray
+    absolute: np.ndarray
+    valid: np.ndarray
+
+    def positions(self, metric_names: Sequence[str]) -> np.ndarray:
+        """Column of each name in `names`, or -1 for metrics without a baseline row."""
+        lookup = {name: i for i, name in enumerate(self.names)}
+        return np.array([lookup.get(name, -1) for name in metric_names], dtype=np.int64)
+
+    def zscores(self, values: np.ndarray, clip: float = 3.0) -> np.ndarray:
+        """Clipped, direction-adjusted z-scores for `values` of shape (..., len(names)).
+
+        Non-finite values and metrics without usable stats give zero.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = np.where(self.absolute, np.abs(values), values)
+        with np.errstate(invalid="ignore", over="ignore"):
+            z = self.sign * (values - self.center) / self.scale
+        return np.where(self.valid & np.isfinite(z), np.clip(z, -clip, clip), 0.0)
+
+    def score(self, values: np.ndarray, weights: np.ndarray, clip: float = 3.0) -> np.ndarray:
+        """Weighted z-score totals over the last axis of `values`."""
+        return self.zscores(values, clip) @ np.asarray(weights, dtype=np.float64)
+
+
 class ZScoreReward:
     """Reward function based on weighted z-scores against ensemble baselines."""
 
@@ -38,28 +74,36 @@ class ZScoreReward:
             "MinOppMin": MetricDirection(lower_is_better=False, absolute_value=False),
             "PartisanProp": MetricDirection(lower_is_better=False, absolute_value=False),
         }
+        self.compile()
+
+    def compile(self) -> CompiledZScore:
+        """Build the array form used by every scoring path, store it as `compiled`, return it.
+
+        Called once at construction; call again after editing `metric_directions`.
+        """
+        names = tuple(str(name) for name in self.baseline_stats.index)
+        center = pd.to_numeric(self.baseline_stats["median"], errors="coerce").to_numpy(float)
+        std = pd.to_numeric(self.baseline_stats["std"], errors="coerce").to_numpy(float)
+        valid = np.isfinite(center) & np.isfinite(std) & (std != 0)
+        directions = [self.metric_directions.get(name, MetricDirection()) for name in names]
+        self.compiled = CompiledZScore(
+            names=names,
+            center=np.where(valid, center, 0.0),
+            scale=np.where(valid, std, 1.0),
+            sign=np.array([-1.0 if d.lower_is_better else 1.0 for d in directions]),
+            absolute=np.array([d.absolute_value for d in directions], dtype=bool),
+            valid=valid,
+        )
+        return self.compiled
 
     def metric_zscore(self, metric_name: str, value: float, clip: float = 3.0) -> float:
         """Compute clipped z-score for one metric."""
-        if metric_name not in self.baseline_stats.index:
+        (position,) = self.compiled.positions([metric_name])
+        if position < 0:
             return 0.0
-        if not np.isfinite(value):
-            return 0.0
-        row = self.baseline_stats.loc[metric_name]
-        center = row["median"]
-        std = row["std"]
-        if pd.isna(center) or pd.isna(std) or std == 0:
-            return 0.0
-        direction = self.metric_directions.get(metric_name, MetricDirection())
-        target_value = abs(value) if direction.absolute_value else value
-        if not np.isfinite(target_value):
-            return 0.0
-        z = (target_value - center) / std
-        if not np.isfinite(z):
-            return 0.0
-        if direction.lower_is_better:
-            z = -z
-        return float(np.clip(z, -clip, clip))
+        values = np.full(len(self.compiled.names), np.nan)
+        values[position] = value
+        return float(self.compiled.zscores(values, clip)[position])
 
     def __call__(
         self, district_metrics: Mapping[str, float], weights: Optional[Mapping[str, float]] = None
@@ -67,16 +111,55 @@ class ZScoreReward:
         """Return weighted z-score reward sum."""
         if weights is None:
             weights = {key: 1.0 for key in district_metrics.keys()}
-        reward = 0.0
-        for metric_name, weight in weights.items():
-            if metric_name not in district_metrics:
-                continue
-            metric_value = district_metrics[metric_name]
-            if metric_value is None:
-                continue
-            z = self.metric_zscore(metric_name, float(metric_value))
-            if not np.isfinite(z):
-                continue
-            reward += float(weight) * z
-        return float(reward)
+        values = np.array(
+            [
+                np.nan if district_metrics.get(name) is None else float(district_metrics[name])
+                for name in self.compiled.names
+            ]
+        )
+        return float(self.compiled.score(values, self.weight_vector(weights)))
+
+    def weight_vector(self, weights: Mapping[str, float]) -> np.ndarray:
+        """`weights` aligned with the compiled metric order; unweighted metrics get zero."""
+        return np.array([float(weights.get(name, 0.0)) for name in self.compiled.names])
 
+    def score_matrix(
+        self,
+        values: np.ndarray,
+        columns: Sequence[str],
+        weights: Optional[Mapping[str, float]] = None,
+        clip: float = 3.0,
+    ) -> np.ndarray:
+        """Weighted z-score totals for rows of `values` whose columns are named by `columns`.
+
+        Accepts one metric vector or an (n_plans, len(columns)) batch, such as the output of
+        `MCalc.calculate_metrics_batch`. Columns without a baseline row are ignored.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if weights is None:
+            weights = {name: 1.0 for name in columns}
+        positions = self.compiled.positions(columns)
+        aligned = np.full(values.shape[:-1] + (len(self.compiled.names),), np.nan)
+        known = positions >= 0
+        aligned[..., positions[known]] = values[..., known]
+        return self.compiled.score(aligned, self.weight_vector(weights), clip)
+
+    def score_arrays(
+        self,
+        metric_arrays: Mapping[str, np.ndarray],
+        weights: Optional[Mapping[str, float]] = None,
+        clip: float = 3.0,
+    ) -> np.ndarray:
+        """Vectorized `__call__`: weighted z-score totals for aligned arrays of metric values.
+
+        Non-finite values contribute nothing, as in `metric_zscore`.
+        """
+        if weights is None:
+            weights = {key: 1.0 for key in metric_arrays.keys()}
+        columns = list(metric_arrays.keys())
+        if not columns:
+            return np.zeros(0, dtype=np.float64)
+        values = np.column_stack(
+            [np.asarray(metric_arrays[name], dtype=np.float64) for name in columns]
+        )
+        return self.score_matrix(values, columns, weights, clip)
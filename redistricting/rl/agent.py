@@ -1,7 +1,7 @@
 """PPO agent with GNN actor-critic models."""
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import networkx as nx
 import numpy as np
@@ -10,10 +10,14 @@ import torch.nn as nn
 import torch.optim as optim
 from torch.distributions import Categorical
 from torch_geometric.data import Batch
+from torch_geometric.utils import to_dense_batch
 
 from redistricting.models.gnn_encoder import GraphStateEncoder, networkx_to_pyg_data
 from redistricting.utils.device import get_device, setup_kernel_optimizations
 
+# NumPy float masks, or the persistent bool tensor from `GerrymanderingEnv.get_action_mask_tensor`.
+MaskLike = Union[np.ndarray, torch.Tensor]
+
 
 class GNNActor(nn.Module):
     """Actor network mapping graph states to action logits."""
@@ -56,6 +60,74 @@ class GNNActor(nn.Module):
         return logits
 
 
+class GNNFactorizedActor(nn.Module):
+    """Two-stage actor: one logit per node, then district logits for a chosen node.
+
+    Logits are O(N) + O(k) instead of one output per (node, district) pair.
+    """
+
+    def __init__(
+        self,
+        node_feature_dim: int,
+        n_districts: int,
+        gnn_hidden_dim: int = 128,
+        gnn_num_layers: int = 3,
+        gnn_embedding_dim: int = 64,
+        policy_hidden_dim: int = 64,
+        encoder_type: str = "graphsage",
+        aggregation: str = "mean",
+    ):
+        super().__init__()
+        self.gnn_encoder = GraphStateEncoder(
+            node_feature_dim=node_feature_dim,
+            hidden_dim=gnn_hidden_dim,
+            num_layers=gnn_num_layers,
+            embedding_dim=gnn_embedding_dim,
+            encoder_type=encoder_type,
+            aggregation=aggregation,
+        )
+        self.node_head = nn.Sequential(
+            nn.Linear(gnn_embedding_dim, policy_hidden_dim),
+            nn.ReLU(),
+            nn.Linear(policy_hidden_dim, 1),
+        )
+        self.district_head = nn.Sequential(
+            nn.Linear(2 * gnn_embedding_dim, policy_hidden_dim),
+            nn.ReLU(),
+            nn.Linear(policy_hidden_dim, n_districts),
+        )
+
+    def forward(
+        self, x: torch.Tensor, edge_index: torch.Tensor, batch=None
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Return (node_logits, node_embeddings, state_embedding)."""
+        node_embeddings = self.gnn_encoder.encoder(x, edge_index)
+        state_embedding = self.gnn_encoder.pool(node_embeddings, batch)
+        node_logits = self.node_head(node_embeddings).squeeze(-1)
+        return node_logits, node_embeddings, state_embedding
+
+    def district_logits(
+        self, node_embedding: torch.Tensor, state_embedding: torch.Tensor
+    ) -> torch.Tensor:
+        """Target-district logits for chosen node(s), conditioned on the pooled state."""
+        return self.district_head(torch.cat([node_embedding, state_embedding], dim=-1))
+
+
+def _mask_logits(logits: torch.Tensor, mask: Optional[torch.Tensor]) -> torch.Tensor:
+    if mask is not None and mask.dtype == torch.bool:
+        logits = torch.where(mask, logits, -1e9)
+    elif mask is not None:
+        logits = logits + (1 - mask) * -1e9
+    return torch.nan_to_num(logits, nan=-1e9, posinf=1e9, neginf=-1e9)
+
+
+def _categorical(logits: torch.Tensor) -> Categorical:
+    probs = torch.softmax(logits, dim=-1)
+    probs = torch.clamp(probs, min=1e-12)
+    probs = probs / probs.sum(dim=-1, keepdim=True)
+    return Categorical(probs)
+
+
 class GNNCritic(nn.Module):
     """Critic network estimating scalar state value."""
 
@@ -116,7 +188,12 @@ class PPOHyperParams:
 
 
 class PPOAgent:
-    """PPO agent that stores graph transitions and performs policy updates."""
+    """PPO agent that stores graph transitions and performs policy updates.
+
+    With `factorized=True` actions are `(node, district)` pairs sampled in two stages
+    (node mask, then the chosen node's district mask) and `action_dim` is the number of
+    districts; log-probs are the joint log-prob of both stages.
+    """
 
     def __init__(
         self,
@@ -129,6 +206,7 @@ class PPOAgent:
         encoder_type: str = "graphsage",
         aggregation: str = "mean",
         device: Optional[Union[str, torch.device]] = None,
+        factorized: bool = False,
     ):
         dev: Optional[torch.device] = None
         if device is not None:
@@ -138,15 +216,27 @@ class PPOAgent:
             setup_kernel_optimizations()
         self.hyperparams = hyperparams or PPOHyperParams()
         self.action_dim = action_dim
-        self.policy = GNNActor(
-            node_feature_dim=node_feature_dim,
-            action_dim=action_dim,
-            gnn_hidden_dim=gnn_hidden_dim,
-            gnn_num_layers=gnn_num_layers,
-            gnn_embedding_dim=gnn_embedding_dim,
-            encoder_type=encoder_type,
-            aggregation=aggregation,
-        ).to(self.device)
+        self.factorized = factorized
+        if factorized:
+            self.policy = GNNFactorizedActor(
+                node_feature_dim=node_feature_dim,
+                n_districts=action_dim,
+                gnn_hidden_dim=gnn_hidden_dim,
+                gnn_num_layers=gnn_num_layers,
+                gnn_embedding_dim=gnn_embedding_dim,
+                encoder_type=encoder_type,
+                aggregation=aggregation,
+            ).to(self.device)
+        else:
+            self.policy = GNNActor(
+                node_feature_dim=node_feature_dim,
+                action_dim=action_dim,
+                gnn_hidden_dim=gnn_hidden_dim,
+                gnn_num_layers=gnn_num_layers,
+                gnn_embedding_dim=gnn_embedding_dim,
+                encoder_type=encoder_type,
+                aggregation=aggregation,
+            ).to(self.device)
         self.value = GNNCritic(
             node_feature_dim=node_feature_dim,
             gnn_hidden_dim=gnn_hidden_dim,
@@ -163,6 +253,7 @@ class PPOAgent:
         self.memory: Dict[str, List] = {
             "graph_data": [],
             "action_masks": [],
+            "district_masks": [],
             "actions": [],
             "rewards": [],
             "log_probs": [],
@@ -170,21 +261,50 @@ class PPOAgent:
             "dones": [],
         }
 
+    def _mask_tensor(self, mask: Optional[MaskLike]) -> Optional[torch.Tensor]:
+        """Tensors (e.g. `GerrymanderingEnv.get_action_mask_tensor`) pass through uncopied."""
+        if mask is None:
+            return None
+        if isinstance(mask, torch.Tensor):
+            return mask.to(self.device)
+        return torch.tensor(mask, dtype=torch.float32, device=self.device)
+
     def get_action(
-        self, graph: nx.Graph, node_features: np.ndarray, action_mask: Optional[np.ndarray] = None
-    ) -> Tuple[int, float, float, float]:
-        """Sample an action and return (action, log_prob, value, entropy)."""
+        self,
+        graph: nx.Graph,
+        node_features: np.ndarray,
+        action_mask: Optional[MaskLike] = None,
+        district_mask_fn: Optional[Callable[[int], np.ndarray]] = None,
+    ) -> Tuple[Union[int, Tuple[int, int]], float, float, float]:
+        """Sample an action and return (action, log_prob, value, entropy).
+
+        In factorized mode `action_mask` masks nodes, `district_mask_fn(node)` returns the
+        district mask for the sampled node, and the action is a `(node, district)` pair.
+        """
         data = networkx_to_pyg_data(graph, node_features, self.device)
+        if self.factorized:
+            with torch.no_grad():
+                node_logits, node_embeddings, state = self.policy(data.x, data.edge_index)
+                node_dist = _categorical(_mask_logits(node_logits, self._mask_tensor(action_mask)))
+                node = node_dist.sample()
+                district_mask = district_mask_fn(int(node.item())) if district_mask_fn else None
+                district_logits = self.policy.district_logits(node_embeddings[node], state)
+                district_dist = _categorical(
+                    _mask_logits(district_logits, self._mask_tensor(district_mask))
+                )
+                district = district_dist.sample()
+                log_prob = node_dist.log_prob(node) + district_dist.log_prob(district)
+                entropy = node_dist.entropy() + district_dist.entropy()
+                value = self.value(data.x, data.edge_index)
+            return (
+                (int(node.item()), int(district.item())),
+                float(log_prob.item()),
+                float(value.item()),
+                float(entropy.item()),
+            )
         with torch.no_grad():
             logits = self.policy(data.x, data.edge_index)
-            if action_mask is not None:
-                mask = torch.tensor(action_mask, dtype=torch.float32, device=self.device)
-                logits = logits + (1 - mask) * -1e9
-            logits = torch.nan_to_num(logits, nan=-1e9, posinf=1e9, neginf=-1e9)
-            probs = torch.softmax(logits, dim=-1)
-            probs = torch.clamp(probs, min=1e-12)
-            probs = probs / probs.sum(dim=-1, keepdim=True)
-            dist = Categorical(probs)
+            dist = _categorical(_mask_logits(logits, self._mask_tensor(action_mask)))
             action = dist.sample()
             log_prob = dist.log_prob(action)
             entropy = dist.entropy()
@@ -202,42 +322,50 @@ class PPOAgent:
         self._entropy_coef_effective = (1.0 - t) * float(h.entropy_coef_start) + t * float(h.entropy_coef)
 
     def greedy_action(
-        self, graph: nx.Graph, node_features: np.ndarray, action_mask: Optional[np.ndarray] = None
-    ) -> int:
+        self,
+        graph: nx.Graph,
+        node_features: np.ndarray,
+        action_mask: Optional[MaskLike] = None,
+        district_mask_fn: Optional[Callable[[int], np.ndarray]] = None,
+    ) -> Union[int, Tuple[int, int]]:
         """Argmax over legal actions (greedy evaluation)."""
         data = networkx_to_pyg_data(graph, node_features, self.device)
+        if self.factorized:
+            with torch.no_grad():
+                node_logits, node_embeddings, state = self.policy(data.x, data.edge_index)
+                node = int(torch.argmax(_mask_logits(node_logits, self._mask_tensor(action_mask))))
+                district_mask = district_mask_fn(node) if district_mask_fn else None
+                district_logits = self.policy.district_logits(node_embeddings[node], state)
+                district_logits = _mask_logits(district_logits, self._mask_tensor(district_mask))
+                return node, int(torch.argmax(district_logits).item())
         with torch.no_grad():
             logits = self.policy(data.x, data.edge_index)
-            if action_mask is not None:
-                mask = torch.tensor(action_mask, dtype=torch.float32, device=self.device)
-                logits = logits + (1 - mask) * -1e9
-            logits = torch.nan_to_num(logits, nan=-1e9, posinf=1e9, neginf=-1e9)
+            logits = _mask_logits(logits, self._mask_tensor(action_mask))
             return int(torch.argmax(logits, dim=-1).item())
 
     def policy_diagnostics(
-        self, graph: nx.Graph, node_features: np.ndarray, action_mask: Optional[np.ndarray] = None
+        self, graph: nx.Graph, node_features: np.ndarray, action_mask: Optional[MaskLike] = None
     ) -> Dict[str, float]:
-        """Entropy, top-k mass, effective action count, and mask sparsity for masked distribution."""
+        """Entropy, top-k mass, effective action count, and mask sparsity for masked distribution.
+
+        In factorized mode these describe the node-selection stage.
+        """
         data = networkx_to_pyg_data(graph, node_features, self.device)
         with torch.no_grad():
             logits = self.policy(data.x, data.edge_index)
-            if action_mask is not None:
-                mask = torch.tensor(action_mask, dtype=torch.float32, device=self.device)
-                logits = logits + (1 - mask) * -1e9
-            logits = torch.nan_to_num(logits, nan=-1e9, posinf=1e9, neginf=-1e9)
-            probs = torch.softmax(logits, dim=-1)
-            probs = torch.clamp(probs, min=1e-12)
-            probs = probs / probs.sum(dim=-1, keepdim=True)
-            dist = Categorical(probs)
+            if self.factorized:
+                logits = logits[0]
+            mask = self._mask_tensor(action_mask)
+            dist = _categorical(_mask_logits(logits, mask))
+            probs = dist.probs
             entropy = float(dist.entropy().item())
             sorted_p, _ = torch.sort(probs, descending=True)
             top1 = float(sorted_p[0].item()) if sorted_p.numel() > 0 else 0.0
             k5 = min(5, sorted_p.numel())
             top5 = float(sorted_p[:k5].sum().item())
             dim = float(probs.numel())
-            if action_mask is not None:
-                mask_t = torch.tensor(action_mask, dtype=torch.float32, device=self.device)
-                n_legal = float(mask_t.sum().item())
+            if mask is not None:
+                n_legal = float(mask.sum().item())
             else:
                 n_legal = dim
             mask_sparsity = n_legal / dim if dim > 0 else 0.0
@@ -255,19 +383,32 @@ class PPOAgent:
         self,
         graph: nx.Graph,
         node_features: np.ndarray,
-        action: int,
+        action: Union[int, Tuple[int, int]],
         reward: float,
         log_prob: float,
         value: float,
         done: bool,
-        action_mask: Optional[np.ndarray] = None,
+        action_mask: Optional[MaskLike] = None,
+        district_mask: Optional[np.ndarray] = None,
     ) -> None:
-        """Append a transition to in-memory rollout buffer."""
+        """Append a transition to in-memory rollout buffer.
+
+        In factorized mode `action_mask` is the node mask and `district_mask` the mask of the
+        chosen node's target districts. Tensor masks are kept as given, on their device, and
+        converted in `update`; pass a copy if the caller keeps modifying it.
+        """
         self.memory["graph_data"].append((graph, node_features))
+        mask_dim = len(node_features) if self.factorized else self.action_dim
         if action_mask is None:
-            self.memory["action_masks"].append(np.ones(self.action_dim, dtype=np.float32))
+            self.memory["action_masks"].append(np.ones(mask_dim, dtype=np.float32))
+        elif isinstance(action_mask, torch.Tensor):
+            self.memory["action_masks"].append(action_mask)
         else:
             self.memory["action_masks"].append(action_mask.astype(np.float32))
+        if self.factorized:
+            if district_mask is None:
+                district_mask = np.ones(self.action_dim, dtype=np.float32)
+            self.memory["district_masks"].append(district_mask.astype(np.float32))
         self.memory["actions"].append(action)
         self.memory["rewards"].append(float(reward))
         self.memory["log_probs"].append(float(log_prob))
@@ -295,6 +436,14 @@ class PPOAgent:
         )
         return returns_t, advantages_t
 
+    def _stored_masks(self, concat: bool = False) -> torch.Tensor:
+        """Buffered action masks as one float32 tensor; tensor masks never leave the device."""
+        masks = [
+            torch.as_tensor(mask, device=self.device).to(torch.float32)
+            for mask in self.memory["action_masks"]
+        ]
+        return torch.cat(masks) if concat else torch.stack(masks)
+
     def update(self) -> Optional[Dict[str, float]]:
         """Run PPO update on collected rollout buffer."""
         if len(self.memory["graph_data"]) == 0:
@@ -307,20 +456,32 @@ class PPOAgent:
         actions = torch.tensor(self.memory["actions"], dtype=torch.long, device=self.device)
         old_log_probs = torch.tensor(self.memory["log_probs"], dtype=torch.float32, device=self.device)
         returns, advantages = self._compute_gae()
-        action_masks = torch.tensor(np.array(self.memory["action_masks"]), dtype=torch.float32, device=self.device)
+        if self.factorized:
+            # Node masks differ in length across levels; they line up with the batched nodes.
+            action_masks = self._stored_masks(concat=True)
+            district_masks = torch.tensor(
+                np.array(self.memory["district_masks"]), dtype=torch.float32, device=self.device
+            )
+        else:
+            action_masks = self._stored_masks()
 
         policy_losses, value_losses, entropies, approx_kls, clip_fracs = [], [], [], [], []
         for _ in range(self.hyperparams.k_epochs):
-            logits = self.policy(batch.x, batch.edge_index, batch.batch)
-            logits = logits + (1 - action_masks) * -1e9
-            logits = torch.nan_to_num(logits, nan=-1e9, posinf=1e9, neginf=-1e9)
+            if self.factorized:
+                new_log_probs, entropy = self._factorized_log_probs(
+                    batch, actions, action_masks, district_masks
+                )
+            else:
+                logits = self.policy(batch.x, batch.edge_index, batch.batch)
+                logits = logits + (1 - action_masks) * -1e9
+                logits = torch.nan_to_num(logits, nan=-1e9, posinf=1e9, neginf=-1e9)
+                probs = torch.softmax(logits, dim=-1)
+                probs = torch.clamp(probs, min=1e-12)
+                probs = probs / probs.sum(dim=-1, keepdim=True)
+                dist = Categorical(probs)
+                new_log_probs = dist.log_prob(actions)
+                entropy = dist.entropy().mean()
             values = self.value(batch.x, batch.edge_index, batch.batch)
-            probs = torch.softmax(logits, dim=-1)
-            probs = torch.clamp(probs, min=1e-12)
-            probs = probs / probs.sum(dim=-1, keepdim=True)
-            dist = Categorical(probs)
-            new_log_probs = dist.log_prob(actions)
-            entropy = dist.entropy().mean()
             ratio = torch.exp(new_log_probs - old_log_probs)
             surr1 = ratio * advantages
             surr2 = torch.clamp(ratio, 1 - self.hyperparams.eps_clip, 1 + self.hyperparams.eps_clip) * advantages
@@ -358,6 +519,26 @@ class PPOAgent:
             "clip_fraction": float(np.mean(clip_fracs)),
         }
 
+    def _factorized_log_probs(
+        self,
+        batch: Batch,
+        actions: torch.Tensor,
+        node_masks: torch.Tensor,
+        district_masks: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Joint log-prob of `(node, district)` actions and mean two-stage entropy."""
+        node_logits, node_embeddings, state = self.policy(batch.x, batch.edge_index, batch.batch)
+        dense_logits, _present = to_dense_batch(
+            _mask_logits(node_logits, node_masks), batch.batch, fill_value=-1e9
+        )
+        node_dist = _categorical(dense_logits)
+        rows = batch.ptr[:-1] + actions[:, 0]
+        district_logits = self.policy.district_logits(node_embeddings[rows], state)
+        district_dist = _categorical(_mask_logits(district_logits, district_masks))
+        log_probs = node_dist.log_prob(actions[:, 0]) + district_dist.log_prob(actions[:, 1])
+        entropy = (node_dist.entropy() + district_dist.entropy()).mean()
+        return log_probs, entropy
+
     def clear_memory(self) -> None:
         """Clear rollout buffer."""
         for key in self.memory:
@@ -77,6 +77,8 @@ class TrainingLoop:
             "greedy_mean_return": [],
         }
         self.eval_metrics_rows: List[Dict[str, float]] = []
+        # Factorized agents pick a node first and then ask the env for that node's districts.
+        self._district_mask_fn = env.get_district_mask if agent.factorized else None
         self.best_reward = -float("inf")
         self.patience_counter = 0
         self._set_seeds(self.config.seed)
@@ -120,8 +122,10 @@ class TrainingLoop:
             last_info: Dict = {}
             while not done:
                 graph, features = self.env.get_graph_observation()
-                action_mask = self.env.get_valid_action_mask()
-                action = self.agent.greedy_action(graph, features, action_mask)
+                action_mask = self.env.get_action_mask_tensor(self.agent.device)
+                action = self.agent.greedy_action(
+                    graph, features, action_mask, district_mask_fn=self._district_mask_fn
+                )
                 _, reward, terminated, truncated, last_info = self.env.step(action)
                 ep_ret += float(reward)
                 done = bool(terminated or truncated)
@@ -161,12 +165,19 @@ class TrainingLoop:
             info: Dict = {}
             while not done:
                 graph, features = self.env.get_graph_observation()
-                action_mask = self.env.get_valid_action_mask()
-                action, log_prob, value, _entropy = self.agent.get_action(graph, features, action_mask)
+                action_mask = self.env.get_action_mask_tensor(self.agent.device)
+                action, log_prob, value, _entropy = self.agent.get_action(
+                    graph, features, action_mask, district_mask_fn=self._district_mask_fn
+                )
+                district_mask = (
+                    self._district_mask_fn(action[0]) if self._district_mask_fn else None
+                )
                 diag = self.agent.policy_diagnostics(graph, features, action_mask)
                 step_entropies.append(diag["entropy"])
                 step_top1.append(diag["top1_prob"])
                 step_sparsity.append(diag["mask_sparsity"])
+                # The env updates its mask tensor in place, so record it before stepping.
+                action_mask = action_mask.clone()
                 _, reward, terminated, truncated, info = self.env.step(action)
                 done = bool(terminated or truncated)
                 self.agent.store_transition(
@@ -178,6 +189,7 @@ class TrainingLoop:
                     value,
                     done,
                     action_mask=action_mask,
+                    district_mask=district_mask,
                 )
                 episode_reward += float(reward)
                 episode_length += 1
@@ -293,8 +305,10 @@ class TrainingLoop:
             total = 0.0
             while not done:
                 graph, features = self.env.get_graph_observation()
-                action_mask = self.env.get_valid_action_mask()
-                action, _, _, _ = self.agent.get_action(graph, features, action_mask)
+                action_mask = self.env.get_action_mask_tensor(self.agent.device)
+                action, _, _, _ = self.agent.get_action(
+                    graph, features, action_mask, district_mask_fn=self._district_mask_fn
+                )
                 _, reward, terminated, truncated, _info = self.env.step(action)
                 total += float(reward)
                 done = bool(terminated or truncated)
@@ -1,17 +1,31 @@
 """Data integrity checks for required redistricting inputs."""
 
+import importlib.util
 import warnings
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
 
-import geopandas as gpd
 import pandas as pd
+import pyogrio
 
-from redistricting.graph.construction import build_precinct_graph
+from redistricting.graph.construction import PARQUET_FILENAME, build_precinct_graph
 
 warnings.filterwarnings("ignore")
 
 
+def _precinct_schema(data_dir: Path) -> Tuple[List[str], int]:
+    """Return (columns, row count) from file metadata without reading any features."""
+    parquet_path = data_dir / PARQUET_FILENAME
+    if parquet_path.exists() and importlib.util.find_spec("pyarrow") is not None:
+        import pyarrow.parquet as pq
+
+        metadata = pq.read_metadata(parquet_path)
+        names = metadata.schema.to_arrow_schema().names
+        return [name for name in names if not name.startswith("__")], metadata.num_rows
+    info = pyogrio.read_info(str(data_dir / "precincts_with_vap.shp"))
+    return list(info["fields"]) + ["geometry"], int(info["features"])
+
+
 def audit_data_directory(state: str, basepath: str) -> Dict:
     """Audit shapefile and baseline stats for required columns and keys."""
     results = {
@@ -29,15 +43,15 @@ def audit_data_directory(state: str, basepath: str) -> Dict:
     }
     data_dir = Path(basepath) / state
     shapefile_path = data_dir / "precincts_with_vap.shp"
-    if not shapefile_path.exists():
+    if not shapefile_path.exists() and not (data_dir / PARQUET_FILENAME).exists():
         results["errors"].append(f"Shapefile not found: {shapefile_path}")
         results["status"] = "FAIL"
         return results
 
     try:
-        gdf = gpd.read_file(shapefile_path)
-        results["node_count"] = len(gdf)
-        results["shapefile_columns"] = list(gdf.columns)
+        columns, node_count = _precinct_schema(data_dir)
+        results["node_count"] = node_count
+        results["shapefile_columns"] = columns
         required_columns = [
             "P0010001",
             "P0040001",
@@ -50,8 +64,8 @@ def audit_data_directory(state: str, basepath: str) -> Dict:
             "CompDemVot",
             "CompRepVot",
         ]
-        missing = [col for col in required_columns if col not in gdf.columns]
-        if not any(c in gdf.columns for c in ("CONG_DIST", "DISTRICT")):
+        missing = [col for col in required_columns if col not in columns]
+        if not any(c in columns for c in ("CONG_DIST", "DISTRICT")):
             missing.append("CONG_DIST_or_DISTRICT")
         if missing:
             results["missing_columns"] = missing
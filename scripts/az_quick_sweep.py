@@ -88,7 +88,11 @@ def random_baseline_end_scores(
     max_steps: int,
     seed: int,
 ) -> tuple[float, float]:
-    """Uniform random legal policy: mean/std of final-step total_score per episode."""
+    """Uniform random legal policy: mean/std of final-step total_score per episode.
+
+    A "lazy" env samples from every legal move; otherwise the draw is over the env's action
+    mask, so a capped env gives the baseline the same action set as the agent.
+    """
     rng = np.random.default_rng(seed)
     scores: List[float] = []
     for ep in range(n_episodes):
@@ -96,12 +100,14 @@ def random_baseline_end_scores(
         env_template.reset(seed=seed + ep)
         last_score = 0.0
         for _ in range(max_steps):
-            mask = env_template.get_valid_action_mask()
-            legal = np.flatnonzero(mask > 0.5)
-            if legal.size == 0:
+            if env_template.action_mode == "lazy":
+                move = env_template.sample_legal_move(rng)
+            else:
+                legal = np.flatnonzero(env_template.get_valid_action_mask())
+                move = int(rng.choice(legal)) if legal.size else None
+            if move is None:
                 break
-            a = int(rng.choice(legal))
-            _, _, term, trunc, info = env_template.step(a)
+            _, _, term, trunc, info = env_template.step(move)
             last_score = float(info.get("total_score", 0.0))
             if term or trunc:
                 break
@@ -184,12 +190,14 @@ def main() -> None:
         flush=True,
     )
 
-    # Reference env for random baseline (default reward)
+    # Reference env for random baseline (default reward), over the agent's action set. Without
+    # a cap that is every legal move, so lazy mode can skip mask maintenance.
     env_ref = GerrymanderingEnv(
         state=args.state,
         basepath=basepath,
         max_steps=args.max_steps,
         max_action_space_size=max_actions,
+        action_mode="list" if max_actions is not None else "lazy",
     )
     print("[baseline] random legal end-of-episode scores (first lines can take several minutes)...", flush=True)
     t0 = time.perf_counter()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Convert precinct shapefiles to GeoParquet with the district column pre-merged."""
+
+import argparse
+
+from redistricting.graph.construction import convert_precincts_to_parquet
+from redistricting.utils.paths import get_data_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write data/processed/<state>/precincts.parquet")
+    parser.add_argument("--state", type=str, default="az")
+    args = parser.parse_args()
+
+    basepath = str(get_data_dir(None, "processed"))
+    output_path = convert_precincts_to_parquet(args.state, basepath)
+    print(f"Wrote {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 import argparse
 from functools import partial
 
+import numpy as np
 import pandas as pd
 from gerrychain import MarkovChain
 from gerrychain.accept import always_accept
@@ -11,9 +12,19 @@ from gerrychain.constraints import Validator, within_percent_of_ideal_population
 from gerrychain.proposals import recom
 
 from redistricting.graph.construction import build_precinct_graph, validate_precinct_graph
-from redistricting.graph.metrics import MCalc
+from redistricting.graph.metrics import (
+    BATCH_METRICS,
+    BOUNDARY_COLUMNS,
+    TALLY_COLUMNS,
+    MCalc,
+    has_boundary_tables,
+)
+from redistricting.graph.store import PrecinctStore, district_index
 from redistricting.utils.paths import get_data_dir
 
+# Thinned plans held in memory before they are batch-scored and dropped.
+PLANS_PER_BATCH = 1024
+
 
 def run_chain(state: str, basepath: str, steps: int, thinning: int, pop_tol: float) -> pd.DataFrame:
     """Run a single ReCom chain and return sampled metric rows."""
@@ -37,14 +48,43 @@ def run_chain(state: str, basepath: str, steps: int, thinning: int, pop_tol: flo
         total_steps=steps,
     )
     mc = MCalc()
-    rows = []
+    if not has_boundary_tables(graph):
+        # Polsby-Popper needs geometry unions here, so score plan by plan.
+        rows = []
+        for idx, part in enumerate(chain):
+            if idx % thinning != 0:
+                continue
+            metrics = mc.calculate_metrics(part, include_geometry=True).iloc[0].to_dict()
+            metrics["step"] = idx
+            rows.append(metrics)
+        return pd.DataFrame(rows)
+
+    store = PrecinctStore.from_graph(graph, TALLY_COLUMNS + BOUNDARY_COLUMNS)
+    index = district_index(partition.parts.keys())
+    frames, steps_kept, plans = [], [], []
     for idx, part in enumerate(chain):
         if idx % thinning != 0:
             continue
-        metrics = mc.calculate_metrics(part, include_geometry=True).iloc[0].to_dict()
-        metrics["step"] = idx
-        rows.append(metrics)
-    return pd.DataFrame(rows)
+        steps_kept.append(idx)
+        plans.append(store.assignment_array(part.assignment, index))
+        if len(plans) == PLANS_PER_BATCH:
+            frames.append(_score_plans(mc, store, plans, steps_kept, len(index)))
+            steps_kept, plans = [], []
+    if plans:
+        frames.append(_score_plans(mc, store, plans, steps_kept, len(index)))
+    if not frames:
+        return pd.DataFrame(columns=[*BATCH_METRICS, "step"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _score_plans(
+    mc: MCalc, store: PrecinctStore, plans: list, steps: list, n_districts: int
+) -> pd.DataFrame:
+    """Batch-score one chunk of thinned plans, tagged with their chain steps."""
+    scores = mc.calculate_metrics_batch(np.stack(plans), store, n_districts=n_districts)
+    df = pd.DataFrame(scores, columns=list(BATCH_METRICS))
+    df["step"] = steps
+    return df
 
 
 def compute_baseline_stats(df: pd.DataFrame) -> pd.DataFrame:
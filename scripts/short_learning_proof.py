@@ -76,12 +76,10 @@ def random_policy_returns(env: GerrymanderingEnv, n_episodes: int, max_steps: in
         env.reset(seed=seed + ep)
         total = 0.0
         for _ in range(max_steps):
-            mask = env.get_valid_action_mask()
-            legal = np.flatnonzero(mask > 0.5)
+            legal = np.flatnonzero(env.get_valid_action_mask())
             if legal.size == 0:
                 break
-            a = int(rng.choice(legal))
-            _, r, term, trunc, _ = env.step(a)
+            _, r, term, trunc, _ = env.step(int(rng.choice(legal)))
             total += float(r)
             if term or trunc:
                 break
@@ -120,18 +118,18 @@ def main() -> None:
 
     import redistricting.env.core as core_mod
 
-    core_mod.build_precinct_graph = lambda state, basepath: fake_builder(tg)
+    core_mod.build_precinct_graph = lambda state, basepath, **kwargs: fake_builder(tg)
 
-    env = GerrymanderingEnv(
+    env_kwargs = dict(
         state="xx",
         basepath="unused",
         reward_fn=score_reward,
         reward_mode="score",
         score_reward_scale=1.0,
         max_steps=25,
-        max_action_space_size=64,
         pop_tol=0.22,
     )
+    env = GerrymanderingEnv(**env_kwargs, max_action_space_size=64)
     _, feats = env.get_graph_observation()
     n_actions = env.action_space.n
 
@@ -146,7 +144,9 @@ def main() -> None:
     )
 
     n_rand = 40
-    rand_mean, rand_std = random_policy_returns(env, n_rand, env.max_steps, seed)
+    # Same capped action set as the agent, so the baseline is comparable.
+    rand_env = GerrymanderingEnv(**env_kwargs, max_action_space_size=64)
+    rand_mean, rand_std = random_policy_returns(rand_env, n_rand, env.max_steps, seed)
     print(f"Baseline (uniform random legal): mean episode return = {rand_mean:.4f} ± {rand_std:.4f}  (n={n_rand})")
 
     agent = PPOAgent(
@@ -21,6 +21,29 @@ def main() -> None:
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--max-actions", type=int, default=256, help="Cap legal moves; use 0 for no cap")
     parser.add_argument("--skip-audit", action="store_true")
+    parser.add_argument(
+        "--action-cap-strategy",
+        type=str,
+        choices=("first", "uniform", "stratified"),
+        default="first",
+        help="How --max-actions picks exposed moves: first in node order, or a random sample",
+    )
+    parser.add_argument(
+        "--parallel-actions",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Shard full valid-move enumeration across a process pool (worth it on large states)",
+    )
+    parser.add_argument(
+        "--action-mode",
+        type=str,
+        choices=("list", "table", "factorized"),
+        default="list",
+        help=(
+            "list=compacted valid-move list; table=fixed node x district table; "
+            "factorized=pick a node, then a district (table modes ignore --max-actions)"
+        ),
+    )
     parser.add_argument(
         "--reward-mode",
         type=str,
@@ -70,6 +93,9 @@ def main() -> None:
         delta_scale_factor=args.delta_scale,
         exploration_coef=args.exploration_coef,
         ema_alpha=args.ema_alpha,
+        action_mode=args.action_mode,
+        action_cap_strategy=args.action_cap_strategy,
+        parallel_actions=args.parallel_actions,
     )
     _, node_features = env.get_graph_observation()
     hyper = PPOHyperParams(
@@ -82,11 +108,13 @@ def main() -> None:
         huber_delta=args.huber_delta,
     )
     dev = "cpu" if args.cpu else None
+    factorized = args.action_mode == "factorized"
     agent = PPOAgent(
         node_feature_dim=node_features.shape[1],
-        action_dim=env.action_space.n,
+        action_dim=int(env.action_space.nvec[1]) if factorized else env.action_space.n,
         hyperparams=hyper,
         device=dev,
+        factorized=factorized,
     )
     print(f"[train] compute_device={agent.device}", flush=True)
     trainer = TrainingLoop(
@@ -2,11 +2,13 @@
 
 from pathlib import Path
 
+import geopandas as gpd
 import networkx as nx
 import numpy as np
 import pytest
 from gerrychain import Graph, Partition
 from gerrychain.updaters import Tally
+from shapely.geometry import box
 
 from redistricting.utils.paths import get_data_dir
 
@@ -40,8 +42,51 @@ def mock_partition(tiny_graph):
     return Partition(Graph.from_networkx(tiny_graph), assignment, updaters=updaters)
 
 
+@pytest.fixture
+def band_builder(tiny_graph):
+    """Stand-in for `build_precinct_graph`: `tiny_graph` split into contiguous row bands.
+
+    Unlike `mock_partition`, single-node flips along band edges can be legal.
+    """
+
+    def build(state, basepath, **kwargs):
+        graph = Graph.from_networkx(tiny_graph)
+        assignment = {n: n // 5 for n in graph.nodes}
+        updaters = {"population": Tally("P0010001", alias="population")}
+        return graph, Partition(graph, assignment, updaters=updaters)
+
+    return build
+
+
 @pytest.fixture
 def az_basepath():
     """Return processed data path for integration tests."""
     return str(get_data_dir(None, "processed"))
 
+
+@pytest.fixture
+def synthetic_basepath(tmp_path):
+    """Write a 4x5 grid of square precincts as `xx/precincts_with_vap.shp` and return basepath."""
+    rows = []
+    for idx in range(20):
+        r, c = divmod(idx, 5)
+        rows.append(
+            {
+                "CONG_DIST": r,
+                "P0010001": 100 + idx,
+                "P0040001": 70,
+                "CompDemVot": 40 + (idx % 3),
+                "CompRepVot": 35 + (idx % 2),
+                "P0040002": 20,
+                "P0040005": 40,
+                "P0040006": 10,
+                "P0040007": 3,
+                "P0040008": 5,
+                "P0040009": 1,
+                "geometry": box(c * 1000.0, r * 1000.0, (c + 1) * 1000.0, (r + 1) * 1000.0),
+            }
+        )
+    state_dir = tmp_path / "xx"
+    state_dir.mkdir()
+    gpd.GeoDataFrame(rows, crs="EPSG:3857").to_file(state_dir / "precincts_with_vap.shp")
+    return str(tmp_path)
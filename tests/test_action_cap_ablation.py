@@ -18,7 +18,7 @@ def test_capped_vs_full_action_space_smoke(monkeypatch, tiny_graph):
     """Both caps should step without error; full list can expose more legal indices."""
     monkeypatch.setattr(
         "redistricting.env.core.build_precinct_graph",
-        lambda state, basepath: _fake_builder(tiny_graph),
+        lambda state, basepath, **kwargs: _fake_builder(tiny_graph),
     )
     for cap in (4, None):
         env = GerrymanderingEnv(
@@ -36,3 +36,52 @@ def test_capped_vs_full_action_space_smoke(monkeypatch, tiny_graph):
             assert term or trunc or env.current_step >= 0
         else:
             assert env.action_space.n >= 1
+
+
+def test_sampled_cap_strategies_step_within_cap(monkeypatch, band_builder):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    for strategy in ("uniform", "stratified"):
+        env = GerrymanderingEnv(
+            state="xx",
+            basepath="unused",
+            reward_fn=lambda metrics, weights: 0.0,
+            max_steps=5,
+            pop_tol=0.5,
+            max_action_space_size=4,
+            action_cap_strategy=strategy,
+        )
+        env.reset(seed=0)
+        for _ in range(3):
+            assert 0 < env.get_valid_action_mask().sum() <= 4
+            _, _, terminated, _, info = env.step(0)
+            assert not terminated and "error" not in info
+
+
+def test_sampled_cap_is_redrawn_from_reset_seed(monkeypatch, band_builder):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    envs = [
+        GerrymanderingEnv(
+            state="xx",
+            basepath="unused",
+            reward_fn=lambda metrics, weights: 0.0,
+            pop_tol=0.5,
+            max_action_space_size=3,
+            action_cap_strategy="uniform",
+        )
+        for _ in range(2)
+    ]
+    samples = []
+    for env in envs:
+        env.reset(seed=0)
+        samples.append(list(env._valid_actions))
+    assert samples[0] == samples[1]
+
+    env = envs[0]
+    env.step(0)
+    env.reset(seed=0)
+    assert env._valid_actions == samples[0]
+    redrawn = set()
+    for seed in range(1, 10):
+        env.reset(seed=seed)
+        redrawn.add(tuple(env._valid_actions))
+    assert len(redrawn) > 1
@@ -0,0 +1,229 @@
+"""Valid-action generation tests against a brute-force reference."""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from redistricting.env.actions import (
+    generate_valid_actions,
+    generate_valid_actions_parallel,
+    update_valid_actions_incremental,
+)
+from redistricting.env.masking import (
+    BoundaryIndex,
+    PopulationTracker,
+    check_contiguity,
+    local_removal_contiguous,
+)
+
+
+def _reference_actions(graph, assignment, pop_tol, n_districts):
+    total = sum(graph.nodes[n]["P0010001"] for n in graph.nodes)
+    ideal = total / n_districts
+    actions = []
+    for node in graph.nodes:
+        for target in sorted({assignment[nbr] for nbr in graph.neighbors(node)}):
+            if target == assignment[node]:
+                continue
+            moved = dict(assignment)
+            moved[node] = target
+            pops = {}
+            for n, d in moved.items():
+                pops[d] = pops.get(d, 0) + graph.nodes[n]["P0010001"]
+            if pops.get(assignment[node], 0) < ideal * (1 - pop_tol):
+                continue
+            if pops[target] > ideal * (1 + pop_tol):
+                continue
+            if all(
+                nx.is_connected(graph.subgraph([n for n, d in moved.items() if d == district]))
+                for district in (assignment[node], target)
+                if any(d == district for d in moved.values())
+            ):
+                actions.append((node, target))
+    return sorted(actions)
+
+
+def _uneven_graph(tiny_graph):
+    graph = tiny_graph.copy()
+    for node in graph.nodes:
+        graph.nodes[node]["P0010001"] = 80 + 7 * (node % 5)
+    return graph
+
+
+@pytest.mark.parametrize("pop_tol", [0.05, 0.2, 0.5])
+def test_generate_valid_actions_matches_reference(tiny_graph, pop_tol):
+    graph = _uneven_graph(tiny_graph)
+    assignment = {n: n // 5 for n in graph.nodes}
+    actions = generate_valid_actions(graph, assignment, pop_tol, 4)
+    assert sorted(actions) == _reference_actions(graph, assignment, pop_tol, 4)
+
+
+def test_population_tracker_follows_moves(tiny_graph):
+    graph = _uneven_graph(tiny_graph)
+    assignment = {n: n // 5 for n in graph.nodes}
+    tracker = PopulationTracker.from_graph(graph, assignment, 4, 0.5)
+    actions = generate_valid_actions(graph, assignment, 0.5, 4, populations=tracker)
+    node, target = actions[0]
+    source = assignment[node]
+    assignment[node] = target
+    tracker.apply_move(node, source, target)
+
+    fresh = PopulationTracker.from_graph(graph, assignment, 4, 0.5)
+    assert tracker.populations.tolist() == pytest.approx(fresh.populations.tolist())
+    updated = update_valid_actions_incremental(
+        graph, assignment, source, target, node, actions, 0.5, 4, populations=tracker
+    )
+    assert updated == _reference_actions(graph, assignment, 0.5, 4)
+
+
+def test_articulation_contiguity_matches_reference_on_disconnected_districts(tiny_graph):
+    graph = _uneven_graph(tiny_graph)
+    # District 0 has a detached corner (19) and district 2 is split in two by node 12.
+    assignment = {n: n // 5 for n in graph.nodes}
+    assignment.update({19: 0, 12: 1})
+    for pop_tol in (0.5, 1.0):
+        actions = generate_valid_actions(graph, assignment, pop_tol, 4)
+        assert sorted(actions) == _reference_actions(graph, assignment, pop_tol, 4)
+        assert (19, 3) in actions  # removing an isolated piece heals district 0
+        assert (12, 2) in actions  # adding 12 reconnects both halves of district 2
+
+
+@pytest.mark.parametrize("budget", [512, 1])
+def test_local_removal_contiguity_matches_full_check(tiny_graph, budget):
+    assignment = {n: n // 5 for n in tiny_graph.nodes}
+    assignment.update({9: 0, 14: 3})
+    for node in tiny_graph.nodes:
+        district = assignment[node]
+        expected = check_contiguity(tiny_graph, assignment, district, node, None)
+        assert local_removal_contiguous(tiny_graph, assignment, node, budget) == expected
+
+
+def test_incremental_update_with_tracked_contiguous_districts(tiny_graph):
+    graph = _uneven_graph(tiny_graph)
+    assignment = {n: n // 5 for n in graph.nodes}
+    tracker = PopulationTracker.from_graph(graph, assignment, 4, 0.5)
+    boundary = BoundaryIndex(graph, assignment)
+    actions = generate_valid_actions(graph, assignment, 0.5, 4, populations=tracker)
+    contiguous = {0, 1, 2, 3}
+    for _ in range(5):
+        node, target = actions[len(actions) // 2]
+        source = assignment[node]
+        assignment[node] = target
+        tracker.apply_move(node, source, target)
+        boundary.apply_move(node, source, target)
+        actions = update_valid_actions_incremental(
+            graph,
+            assignment,
+            source,
+            target,
+            node,
+            actions,
+            0.5,
+            4,
+            populations=tracker,
+            contiguous_districts=contiguous,
+            boundary=boundary,
+        )
+        assert actions == _reference_actions(graph, assignment, 0.5, 4)
+
+
+def test_boundary_index_tracks_flips(tiny_graph):
+    assignment = {n: n // 5 for n in tiny_graph.nodes}
+    index = BoundaryIndex(tiny_graph, assignment)
+    for node, target in [(10, 1), (9, 2), (10, 2), (19, 2)]:
+        source = assignment[node]
+        assignment[node] = target
+        index.apply_move(node, source, target)
+
+        fresh = BoundaryIndex(tiny_graph, assignment)
+        assert index.neighbor_districts == fresh.neighbor_districts
+        for district in range(4):
+            assert index.nodes_touching([district]) == fresh.nodes_touching([district])
+            assert index.by_district.get(district, set()) == {
+                n for n in tiny_graph.nodes if assignment[n] == district and fresh.is_boundary(n)
+            }
+        assert {frozenset(edge) for edge in index.cut_edges} == {
+            frozenset(edge) for edge in fresh.cut_edges
+        }
+        assert len(index.cut_edges) == len(fresh.cut_edges)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_parallel_generation_matches_serial_order(tiny_graph, n_workers):
+    graph = _uneven_graph(tiny_graph)
+    bands = {n: n // 5 for n in graph.nodes}
+    split = {**bands, 19: 0, 12: 1}
+    for assignment in (bands, split):
+        for pop_tol, max_actions in ((0.5, None), (1.0, None), (1.0, 3)):
+            serial = generate_valid_actions(graph, assignment, pop_tol, 4, max_actions=max_actions)
+            parallel = generate_valid_actions_parallel(
+                graph, assignment, pop_tol, 4, max_actions=max_actions, n_workers=n_workers
+            )
+            assert parallel == serial
+            assert serial == generate_valid_actions(
+                graph,
+                assignment,
+                pop_tol,
+                4,
+                max_actions=max_actions,
+                parallel=True,
+                n_workers=n_workers,
+            )
+
+
+def test_sampled_caps_draw_valid_moves_across_the_graph(tiny_graph):
+    graph = _uneven_graph(tiny_graph)
+    assignment = {n: n // 5 for n in graph.nodes}
+    full = _reference_actions(graph, assignment, 0.5, 4)
+    pairs = {(assignment[n], d) for n, d in full}
+    assert len(full) > len(pairs)
+
+    seen = set()
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        uniform = generate_valid_actions(
+            graph, assignment, 0.5, 4, max_actions=4, cap_strategy="uniform", rng=rng
+        )
+        assert len(uniform) == 4 and set(uniform) <= set(full)
+        seen.update(uniform)
+        stratified = generate_valid_actions(
+            graph, assignment, 0.5, 4, max_actions=len(pairs), cap_strategy="stratified", rng=rng
+        )
+        assert {(assignment[n], d) for n, d in stratified} == pairs
+    assert seen == set(full)
+
+
+def test_sampled_cap_refills_after_incremental_update(tiny_graph):
+    graph = _uneven_graph(tiny_graph)
+    assignment = {n: n // 5 for n in graph.nodes}
+    rng = np.random.default_rng(0)
+    tracker = PopulationTracker.from_graph(graph, assignment, 4, 0.5)
+    boundary = BoundaryIndex(graph, assignment)
+    actions = generate_valid_actions(
+        graph, assignment, 0.5, 4, max_actions=5, cap_strategy="uniform", rng=rng
+    )
+    for _ in range(4):
+        node, target = actions[0]
+        source = assignment[node]
+        assignment[node] = target
+        tracker.apply_move(node, source, target)
+        boundary.apply_move(node, source, target)
+        actions = update_valid_actions_incremental(
+            graph,
+            assignment,
+            source,
+            target,
+            node,
+            actions,
+            0.5,
+            4,
+            max_actions=5,
+            populations=tracker,
+            contiguous_districts={0, 1, 2, 3},
+            boundary=boundary,
+            cap_strategy="uniform",
+            rng=rng,
+        )
+        reference = _reference_actions(graph, assignment, 0.5, 4)
+        assert set(actions) <= set(reference)
+        assert len(actions) == min(5, len(reference))
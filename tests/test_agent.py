@@ -1,6 +1,7 @@
 """PPO agent tests."""
 
 import numpy as np
+import torch
 
 from redistricting.rl.agent import PPOAgent
 
@@ -52,3 +53,59 @@ def test_model_save_load_roundtrip(tiny_graph, tmp_path):
     for p1, p2 in zip(agent.policy.parameters(), agent2.policy.parameters()):
         assert p1.shape == p2.shape
 
+
+def test_factorized_agent_respects_both_masks_and_updates(tiny_graph):
+    features = _random_features(tiny_graph, dim=12)
+    agent = PPOAgent(node_feature_dim=12, action_dim=4, factorized=True)
+    node_mask = np.zeros(len(tiny_graph.nodes()), dtype=np.float32)
+    node_mask[[3, 7]] = 1.0
+    district_mask = np.array([0, 1, 0, 1], dtype=np.float32)
+    for _ in range(6):
+        (node, district), log_prob, value, _entropy = agent.get_action(
+            tiny_graph, features, node_mask, district_mask_fn=lambda row: district_mask
+        )
+        assert node in (3, 7) and district in (1, 3)
+        agent.store_transition(
+            tiny_graph,
+            features,
+            (node, district),
+            0.1,
+            log_prob,
+            value,
+            False,
+            action_mask=node_mask,
+            district_mask=district_mask,
+        )
+    node, district = agent.greedy_action(
+        tiny_graph, features, node_mask, district_mask_fn=lambda row: district_mask
+    )
+    assert node in (3, 7) and district in (1, 3)
+    loss_info = agent.update()
+    assert loss_info is not None
+    # First epoch reuses the sampling policy, so the joint log-probs match (ratio ~ 1).
+    assert abs(loss_info["approx_kl"]) < 1.0
+    for value in loss_info.values():
+        assert not np.isnan(value)
+
+
+def test_bool_mask_tensor_matches_numpy_mask(tiny_graph):
+    features = _random_features(tiny_graph, dim=12)
+    agent = PPOAgent(node_feature_dim=12, action_dim=16)
+    agent.policy.eval()  # no dropout, so both greedy passes see the same logits
+    mask = np.zeros(16, dtype=np.float32)
+    mask[[3, 7, 11]] = 1.0
+    mask_tensor = torch.from_numpy(mask > 0.5).to(agent.device)
+    assert agent.greedy_action(tiny_graph, features, mask_tensor) == agent.greedy_action(
+        tiny_graph, features, mask
+    )
+    action, _log_prob, _value, _entropy = agent.get_action(tiny_graph, features, mask_tensor)
+    assert action in (3, 7, 11)
+    diag = agent.policy_diagnostics(tiny_graph, features, mask_tensor)
+    assert diag["n_legal_actions"] == 3.0
+    for stored_mask in (mask_tensor, mask):
+        agent.store_transition(
+            tiny_graph, features, action, 0.1, _log_prob, _value, False, action_mask=stored_mask
+        )
+    assert isinstance(agent.memory["action_masks"][0], torch.Tensor)
+    loss_info = agent.update()
+    assert loss_info is not None and not np.isnan(loss_info["policy_loss"])
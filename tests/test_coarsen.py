@@ -0,0 +1,60 @@
+"""Graph coarsening hierarchy tests."""
+
+import pytest
+
+from redistricting.env.core import GerrymanderingEnv
+from redistricting.graph.coarsen import build_hierarchy, project_assignment
+from redistricting.graph.construction import build_precinct_graph
+from redistricting.graph.metrics import MCalc
+
+
+def test_hierarchy_preserves_baseline_map(band_builder):
+    graph, partition = band_builder("xx", "unused")
+    levels = build_hierarchy(graph, partition, n_levels=2, min_nodes=4)
+    assert len(levels) == 3
+    assert levels[0].n_nodes > levels[1].n_nodes > levels[2].n_nodes
+
+    assignment = dict(levels[-1].partition.assignment)
+    for level in range(len(levels) - 1, 0, -1):
+        assignment = project_assignment(assignment, levels[level].fine_to_coarse)
+    assert assignment == dict(partition.assignment)
+    for level in levels:
+        assert dict(level.partition["population"]) == pytest.approx(dict(partition["population"]))
+
+
+def test_coarse_boundary_tables_keep_compactness_exact(synthetic_basepath):
+    graph, partition = build_precinct_graph("xx", synthetic_basepath, include_geometry=False)
+    coarse = build_hierarchy(graph, partition, n_levels=1, min_nodes=1)[-1]
+    assert coarse.n_nodes < graph.number_of_nodes()
+
+    mc = MCalc()
+    fine_metrics = mc.calculate_metrics(partition, include_geometry=True)
+    coarse_metrics = mc.calculate_metrics(coarse.partition, include_geometry=True)
+    for column in ("PolPopperAvg", "PolPopperMin", "EfficiencyGap"):
+        assert coarse_metrics[column].iloc[0] == pytest.approx(fine_metrics[column].iloc[0])
+
+
+def test_env_runs_coarse_then_refines(monkeypatch, tiny_graph, band_builder):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    env = GerrymanderingEnv(
+        state="xx",
+        basepath="unused",
+        reward_fn=lambda metrics, weights: 0.0,
+        pop_tol=0.5,
+        coarse_levels=1,
+    )
+    assert env.level == 1
+    assert env.n_precincts < tiny_graph.number_of_nodes()
+    assert env.get_valid_action_mask().sum() > 0
+    env.step(0)
+    coarse_plan = env.precinct_assignment()
+
+    assert env.refine()
+    assert env.level == 0
+    assert dict(env.partition.assignment) == coarse_plan
+    assert env.precinct_assignment() == coarse_plan
+    assert not env.refine()
+
+    env.reset()
+    assert env.level == 1
+    assert env.precinct_assignment() == {n: n // 5 for n in tiny_graph.nodes}
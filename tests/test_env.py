@@ -1,10 +1,13 @@
 """Environment behavior tests."""
 
 import numpy as np
+import pandas as pd
+import torch
 from gerrychain import Graph, Partition
 from gerrychain.updaters import Tally
 
 from redistricting.env.core import GerrymanderingEnv
+from redistricting.reward.zscore import ZScoreReward
 
 
 def _fake_builder(tiny_graph):
@@ -18,7 +21,7 @@ def _fake_builder(tiny_graph):
 def test_action_mask_prevents_illegal(monkeypatch, tiny_graph):
     monkeypatch.setattr(
         "redistricting.env.core.build_precinct_graph",
-        lambda state, basepath: _fake_builder(tiny_graph),
+        lambda state, basepath, **kwargs: _fake_builder(tiny_graph),
     )
     env = GerrymanderingEnv(
         state="xx",
@@ -38,7 +41,7 @@ def test_action_mask_prevents_illegal(monkeypatch, tiny_graph):
 def test_env_step_returns_5tuple(monkeypatch, tiny_graph):
     monkeypatch.setattr(
         "redistricting.env.core.build_precinct_graph",
-        lambda state, basepath: _fake_builder(tiny_graph),
+        lambda state, basepath, **kwargs: _fake_builder(tiny_graph),
     )
     env = GerrymanderingEnv(
         state="xx",
@@ -56,7 +59,7 @@ def test_env_step_returns_5tuple(monkeypatch, tiny_graph):
 def test_env_reset_restores_baseline(monkeypatch, tiny_graph):
     monkeypatch.setattr(
         "redistricting.env.core.build_precinct_graph",
-        lambda state, basepath: _fake_builder(tiny_graph),
+        lambda state, basepath, **kwargs: _fake_builder(tiny_graph),
     )
     env = GerrymanderingEnv(
         state="xx",
@@ -72,3 +75,192 @@ def test_env_reset_restores_baseline(monkeypatch, tiny_graph):
     _obs, _info = env.reset()
     assert dict(env.partition.assignment) == baseline
 
+
+def test_env_reset_reuses_baseline_snapshot(monkeypatch, band_builder):
+    calls = []
+
+    def _counting_builder(state, basepath, **kwargs):
+        calls.append(state)
+        return band_builder(state, basepath, **kwargs)
+
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", _counting_builder)
+    env = GerrymanderingEnv(
+        state="xx",
+        basepath="unused",
+        reward_fn=lambda metrics, weights: 0.0,
+        max_steps=5,
+        pop_tol=0.5,
+    )
+    baseline_actions = list(env._valid_actions)
+    baseline_pop_deviation = env._max_population_deviation()
+    for _ in range(3):
+        env.step(0)
+    assert env._distance_from_baseline() > 0
+    env.reset()
+    assert len(calls) == 1
+    assert env._valid_actions == baseline_actions
+    assert env._max_population_deviation() == baseline_pop_deviation
+
+
+def test_action_table_mode_keeps_indices_stable(monkeypatch, band_builder, tiny_graph):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    list_env = GerrymanderingEnv(
+        state="xx", basepath="unused", reward_fn=lambda metrics, weights: 0.0, pop_tol=0.5
+    )
+    table_env = GerrymanderingEnv(
+        state="xx",
+        basepath="unused",
+        reward_fn=lambda metrics, weights: 0.0,
+        pop_tol=0.5,
+        action_mode="table",
+    )
+    table = table_env._action_table
+    assert table_env.action_space.n == tiny_graph.number_of_nodes() * 4
+    rng = np.random.default_rng(0)
+    for _ in range(6):
+        assert table.actions() == list_env._valid_actions
+        legal = np.flatnonzero(table_env.get_valid_action_mask())
+        if legal.size == 0:
+            break
+        action = int(rng.choice(legal))
+        node, target = table.decode(action)
+        assert table.index(node, target) == action
+        _obs, _reward, _terminated, _truncated, info = table_env.step(action)
+        list_env.step(list_env._valid_actions.index((node, target)))
+        # Counters maintained by `step` agree with full recounts.
+        assert info["valid_actions"] == table.n_legal == np.count_nonzero(table.legal)
+        assert info["distance_from_baseline"] == sum(
+            table_env.partition.assignment[n] != table_env._baseline_assignment[n]
+            for n in tiny_graph.nodes
+        )
+        assert dict(table_env.partition.assignment) == table_env._boundary.assignment
+
+    own = table.index(0, table_env.partition.assignment[0])
+    _obs, _reward, terminated, _truncated, info = table_env.step(own)
+    assert terminated and info["error"] == "Illegal action"
+    table_env.reset()
+    assert table.actions() == list(table_env._baseline.valid_actions)
+
+
+def test_lazy_mode_samples_only_legal_moves(monkeypatch, band_builder, tiny_graph):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    list_env = GerrymanderingEnv(
+        state="xx", basepath="unused", reward_fn=lambda metrics, weights: 0.0, pop_tol=0.5
+    )
+    lazy_env = GerrymanderingEnv(
+        state="xx",
+        basepath="unused",
+        reward_fn=lambda metrics, weights: 0.0,
+        pop_tol=0.5,
+        action_mode="lazy",
+    )
+    assert list(lazy_env.action_space.nvec) == [tiny_graph.number_of_nodes(), 4]
+    assert lazy_env._baseline.valid_actions == ()
+    rng = np.random.default_rng(0)
+    for _ in range(8):
+        legal = set(list_env._valid_actions)
+        row, code = lazy_env.sample_legal_move(rng)
+        node = lazy_env.store.node_ids[row].item()
+        target = lazy_env._district_labels[code]
+        assert (node, target) in legal
+        _obs, _reward, terminated, _truncated, info = lazy_env.step((row, code))
+        assert not terminated and info["valid_actions"] == -1
+        list_env.step(list_env._valid_actions.index((node, target)))
+
+    own = lazy_env._district_index[lazy_env.partition.assignment[0]]
+    _obs, _reward, terminated, _truncated, info = lazy_env.step((0, own))
+    assert terminated and info["error"] == "Illegal action"
+
+
+def test_lazy_sampler_is_uniform_over_legal_moves(monkeypatch, band_builder):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    env = GerrymanderingEnv(
+        state="xx",
+        basepath="unused",
+        reward_fn=lambda metrics, weights: 0.0,
+        pop_tol=0.5,
+        action_mode="lazy",
+    )
+    # Moving corner node 0 down gives node 1 two edges into district 1.
+    env.step((env.store.node_index[0], env._district_index[1]))
+    assert env._boundary.neighbor_districts[1][1] == 2
+    rng = np.random.default_rng(0)
+    draws = 20_000
+    counts = {}
+    for _ in range(draws):
+        move = env.sample_legal_move(rng)
+        counts[move] = counts.get(move, 0) + 1
+    freq = np.array(list(counts.values())) / draws
+    assert np.allclose(freq, 1.0 / len(counts), rtol=0.15)
+
+
+def test_device_mask_tensor_tracks_numpy_mask_in_place(monkeypatch, band_builder):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    for mode in ("list", "table", "factorized"):
+        env = GerrymanderingEnv(
+            state="xx",
+            basepath="unused",
+            reward_fn=lambda metrics, weights: 0.0,
+            pop_tol=0.5,
+            action_mode=mode,
+        )
+        mask = env.get_action_mask_tensor("cpu")
+        assert mask.dtype == torch.bool
+        rng = np.random.default_rng(1)
+        for _ in range(6):
+            expected = env.get_valid_action_mask() > 0.5
+            assert env.get_action_mask_tensor() is mask
+            assert np.array_equal(mask.numpy(), expected)
+            legal = np.flatnonzero(expected)
+            if legal.size == 0:
+                break
+            choice = int(rng.choice(legal))
+            if mode == "factorized":
+                district = int(np.flatnonzero(env.get_district_mask(choice))[0])
+                env.step((choice, district))
+            else:
+                env.step(choice)
+        env.reset()
+        assert np.array_equal(
+            env.get_action_mask_tensor().numpy(), env.get_valid_action_mask() > 0.5
+        )
+
+
+def test_move_score_deltas_match_per_move_scoring(monkeypatch, band_builder, tmp_path):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    metrics = ["EfficiencyGap", "PartisanProp", "SeatsVotesDiff", "MinOppAvg", "MinOppMin"]
+    baseline_path = tmp_path / "baseline_stats.csv"
+    pd.DataFrame(
+        {"mean": 0.5, "median": [0.43, 0.93, 0.9, 0.1, 0.1], "std": [0.01, 0.01, 0.1, 0.1, 0.1]},
+        index=metrics,
+    ).to_csv(baseline_path)
+    reward_fn = ZScoreReward(str(baseline_path))
+    weights = {"EfficiencyGap": 1.0, "PartisanProp": 0.5, "SeatsVotesDiff": 2.0, "MinOppAvg": 1.0}
+
+    for mode in ("list", "table"):
+        env = GerrymanderingEnv(
+            state="xx",
+            basepath="unused",
+            reward_fn=reward_fn,
+            reward_weights=weights,
+            pop_tol=0.5,
+            action_mode=mode,
+        )
+        env.step(0 if mode == "list" else int(np.flatnonzero(env.get_valid_action_mask())[0]))
+        moves = env._action_table.actions() if mode == "table" else list(env._valid_actions)
+        current = env.metrics_calc.calculate_metrics(env.partition).iloc[0].to_dict()
+        expected = []
+        for node, target in moves:
+            assignment = dict(env.partition.assignment)
+            assignment[node] = target
+            moved = Partition(env.graph, assignment, env.partition.updaters)
+            after = env.metrics_calc.calculate_metrics(moved).iloc[0].to_dict()
+            expected.append(reward_fn(after, weights) - reward_fn(current, weights))
+
+        deltas = env.move_score_deltas()
+        if mode == "table":
+            legal = env._action_table.legal
+            assert np.isnan(deltas[~legal]).all()
+            deltas = deltas[legal]
+        assert np.allclose(deltas, expected)
+        assert np.ptp(deltas) > 0
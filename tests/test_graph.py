@@ -1,9 +1,24 @@
 """Graph and metric smoke tests."""
 
+from pathlib import Path
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
 import pytest
+from gerrychain import Graph, Partition
+from gerrychain.updaters import Tally
 
-from redistricting.graph.construction import build_precinct_graph, validate_precinct_graph
-from redistricting.graph.metrics import MCalc
+from redistricting.graph.construction import (
+    build_precinct_graph,
+    convert_precincts_to_parquet,
+    graph_from_geodataframe_parallel,
+    rook_adjacency,
+    validate_precinct_graph,
+)
+from redistricting.graph.metrics import BATCH_METRICS, BOUNDARY_COLUMNS, TALLY_COLUMNS, MCalc
+from redistricting.graph.store import PrecinctStore, district_index
+from redistricting.graph.validation import validate_assignments
 
 
 @pytest.mark.slow
@@ -27,3 +42,196 @@ def test_metrics_calculation(az_basepath):
     expected = {"EfficiencyGap", "PartisanProp", "SeatsVotesDiff", "MinOppAvg", "PolPopperAvg"}
     assert expected.issubset(set(metrics_df.columns))
 
+
+def _graph_signature(graph):
+    nodes = {
+        n: {k: v for k, v in data.items() if k != "geometry"} for n, data in graph.nodes(data=True)
+    }
+    edges = {frozenset((u, v)): data["shared_perim"] for u, v, data in graph.edges(data=True)}
+    return nodes, edges
+
+
+def test_graph_cache_roundtrip(synthetic_basepath):
+    cold_graph, cold_partition = build_precinct_graph("xx", synthetic_basepath)
+    cache_root = Path(synthetic_basepath) / "xx" / "graph_cache"
+    assert len([p for p in cache_root.iterdir() if p.is_dir()]) == 1
+
+    warm_graph, warm_partition = build_precinct_graph("xx", synthetic_basepath)
+    assert _graph_signature(warm_graph) == _graph_signature(cold_graph)
+    assert list(warm_graph.nodes()) == list(cold_graph.nodes())
+    assert dict(warm_partition.assignment) == dict(cold_partition.assignment)
+    assert warm_graph.geometry.equals(cold_graph.geometry)
+    assert all(
+        warm_graph.nodes[n]["geometry"].equals(cold_graph.nodes[n]["geometry"])
+        for n in cold_graph.nodes
+    )
+
+
+def test_graph_cache_invalidated_on_source_change(synthetic_basepath):
+    build_precinct_graph("xx", synthetic_basepath)
+    cache_root = Path(synthetic_basepath) / "xx" / "graph_cache"
+    first_key = next(p.name for p in cache_root.iterdir() if p.is_dir())
+
+    shapefile = Path(synthetic_basepath) / "xx" / "precincts_with_vap.shp"
+    gdf = gpd.read_file(shapefile)
+    gdf["P0010001"] = gdf["P0010001"] + 1
+    gdf.to_file(shapefile)
+
+    graph, _partition = build_precinct_graph("xx", synthetic_basepath)
+    keys = [p.name for p in cache_root.iterdir() if p.is_dir()]
+    assert keys != [first_key] and len(keys) == 1
+    assert graph.nodes[0]["P0010001"] == 101
+
+
+def test_parallel_rook_builder_matches_gerrychain(synthetic_basepath):
+    gdf = gpd.read_file(Path(synthetic_basepath) / "xx" / "precincts_with_vap.shp")
+    cols = ["CONG_DIST", "P0010001"]
+    reference = Graph.from_geodataframe(gdf, adjacency="rook", cols_to_add=cols, reproject=False)
+    parallel = graph_from_geodataframe_parallel(gdf, cols_to_add=cols, n_workers=2)
+    assert _graph_signature(parallel) == _graph_signature(reference)
+    assert all(list(parallel.neighbors(n)) == list(reference.neighbors(n)) for n in reference)
+    assert rook_adjacency(gdf.geometry, n_workers=2, pairs_per_tile=8) == rook_adjacency(
+        gdf.geometry, n_workers=1
+    )
+
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_geometry_free_graph_loads_shapes_on_demand(synthetic_basepath, use_cache):
+    full_graph, full_partition = build_precinct_graph("xx", synthetic_basepath, use_cache=use_cache)
+    for _ in range(2):  # cold build, then warm cache hit
+        graph, partition = build_precinct_graph(
+            "xx", synthetic_basepath, use_cache=use_cache, include_geometry=False
+        )
+        assert all("geometry" not in data for _n, data in graph.nodes(data=True))
+        assert getattr(graph, "geometry", None) is None
+        assert _graph_signature(graph) == _graph_signature(full_graph)
+        assert graph.geometry_store.get(7).equals(full_graph.nodes[7]["geometry"])
+
+    mc = MCalc()
+    lazy = mc.calculate_metrics(partition, include_geometry=True)
+    full = mc.calculate_metrics(full_partition, include_geometry=True)
+    assert lazy["PolPopperAvg"].iloc[0] == pytest.approx(full["PolPopperAvg"].iloc[0])
+    assert lazy["PolPopperMin"].iloc[0] == pytest.approx(full["PolPopperMin"].iloc[0])
+
+
+def test_polsby_popper_from_boundary_tables_matches_union(synthetic_basepath):
+    graph, partition = build_precinct_graph("xx", synthetic_basepath)
+    assert all("perimeter" in data and "area" in data for _n, data in graph.nodes(data=True))
+
+    mc = MCalc()
+    _districts, districts_geo, *_ = mc._prepare_partition_data(partition, use_geometry=True)
+    expected = mc._polsby_popper(districts_geo)
+    metrics = mc.calculate_metrics(partition, include_geometry=True)
+    assert metrics["PolPopperAvg"].iloc[0] == pytest.approx(expected["pp_avg"])
+    assert metrics["PolPopperMin"].iloc[0] == pytest.approx(expected["pp_min"])
+
+
+def test_store_without_boundary_tables_falls_back_to_geometry(synthetic_basepath):
+    graph, partition = build_precinct_graph("xx", synthetic_basepath)
+    for _node, data in graph.nodes(data=True):
+        del data["area"], data["perimeter"]
+    # The env requests boundary columns whether or not the graph carries them.
+    store = PrecinctStore.from_graph(graph, TALLY_COLUMNS + BOUNDARY_COLUMNS)
+    assert not store.has_column("perimeter") and store.has_column("P0010001")
+
+    mc = MCalc()
+    expected = mc.calculate_metrics(partition, include_geometry=True)
+    actual = mc.calculate_metrics(partition, include_geometry=True, store=store)
+    assert expected["PolPopperAvg"].iloc[0] > 0
+    assert actual["PolPopperAvg"].iloc[0] == pytest.approx(expected["PolPopperAvg"].iloc[0])
+    assert actual["PolPopperMin"].iloc[0] == pytest.approx(expected["PolPopperMin"].iloc[0])
+
+    codes = store.assignment_array(partition.assignment, district_index(partition.parts.keys()))
+    batch = mc.calculate_metrics_batch(codes, store)
+    assert np.isnan(batch[0, list(BATCH_METRICS).index("PolPopperAvg")])
+
+
+def test_batch_metrics_match_per_plan_metrics(synthetic_basepath):
+    graph, partition = build_precinct_graph("xx", synthetic_basepath)
+    store = PrecinctStore.from_graph(graph, TALLY_COLUMNS + BOUNDARY_COLUMNS)
+    rng = np.random.default_rng(0)
+    plans = [{n: n // 5 for n in graph.nodes}, {n: n % 4 for n in graph.nodes}]
+    plans += [{n: int(rng.integers(4)) for n in graph.nodes} for _ in range(5)]
+    plans.append({n: 0 if n < 10 else 2 for n in graph.nodes})  # districts 1 and 3 empty
+    index = district_index(range(4))
+    matrix = np.stack([store.assignment_array(plan, index) for plan in plans])
+
+    mc = MCalc()
+    for chunk_size in (None, 3):
+        batch = mc.calculate_metrics_batch(matrix, store, n_districts=4, chunk_size=chunk_size)
+        assert batch.shape == (len(plans), len(BATCH_METRICS))
+        for plan, row in zip(plans, batch):
+            expected = mc.calculate_metrics(
+                Partition(graph, plan, partition.updaters), include_geometry=True
+            ).iloc[0]
+            expected = [np.nan if expected[m] is None else expected[m] for m in BATCH_METRICS]
+            assert np.allclose(row, np.asarray(expected, dtype=float), equal_nan=True)
+
+
+def test_parquet_ingest_matches_shapefile(synthetic_basepath):
+    pytest.importorskip("pyarrow")
+    shp_graph, shp_partition = build_precinct_graph("xx", synthetic_basepath, use_cache=False)
+    parquet_path = convert_precincts_to_parquet("xx", synthetic_basepath)
+    assert parquet_path == Path(synthetic_basepath) / "xx" / "precincts.parquet"
+
+    pq_graph, pq_partition = build_precinct_graph("xx", synthetic_basepath, use_cache=False)
+    assert _graph_signature(pq_graph) == _graph_signature(shp_graph)
+    assert dict(pq_partition.assignment) == dict(shp_partition.assignment)
+
+    # A shapefile edited after conversion wins until the parquet is regenerated from it.
+    shapefile = Path(synthetic_basepath) / "xx" / "precincts_with_vap.shp"
+    gdf = gpd.read_file(shapefile)
+    gdf["P0010001"] = gdf["P0010001"] + 1
+    gdf.to_file(shapefile)
+    graph, _partition = build_precinct_graph("xx", synthetic_basepath, use_cache=False)
+    assert graph.nodes[0]["P0010001"] == 101
+    convert_precincts_to_parquet("xx", synthetic_basepath)
+    assert gpd.read_parquet(parquet_path)["P0010001"].iloc[0] == 101
+
+
+def test_parquet_and_shapefile_fill_missing_attributes_alike(synthetic_basepath):
+    pytest.importorskip("pyarrow")
+    state_dir = Path(synthetic_basepath) / "xx"
+    gdf = gpd.read_file(state_dir / "precincts_with_vap.shp")
+    gdf["CompDemVot"] = gdf["CompDemVot"].astype(float).where(gdf.index % 3 != 0)
+    gdf.to_file(state_dir / "precincts_with_vap.shp")
+    shp_graph, _partition = build_precinct_graph("xx", synthetic_basepath, use_cache=False)
+
+    # A GeoParquet written without the converter keeps the nulls.
+    gdf.to_parquet(state_dir / "precincts.parquet")
+    pq_graph, _partition = build_precinct_graph("xx", synthetic_basepath, use_cache=False)
+    assert shp_graph.nodes[0]["CompDemVot"] == 0
+    for node, data in shp_graph.nodes(data=True):
+        assert pq_graph.nodes[node] == data
+
+
+def test_vectorized_validation_matches_networkx(tiny_graph):
+    graph = Graph.from_networkx(tiny_graph)
+    store = PrecinctStore.from_graph(graph, ["P0010001"])
+    plans = [
+        {n: n // 5 for n in graph.nodes},  # contiguous rows
+        {n: n % 4 for n in graph.nodes},  # scattered, disconnected
+        {n: 0 if n < 8 else 1 for n in graph.nodes},  # contiguous, unbalanced
+    ]
+    batch_codes = []
+    for assignment in plans:
+        partition = Partition(graph, assignment, updaters={"population": Tally("P0010001")})
+        result = validate_precinct_graph(graph, partition, tolerance=0.1)
+        for dist, nodes in partition.parts.items():
+            assert result["contiguous"][dist] == nx.is_connected(graph.subgraph(nodes))
+        expected_overall = all(result["contiguous"].values()) and all(
+            abs(pop - 2000 / len(partition)) / (2000 / len(partition)) <= 0.1
+            for pop in partition["population"].values()
+        )
+        assert result["overall"] == expected_overall
+        batch_codes.append(store.assignment_array(assignment, district_index(assignment.values())))
+
+    n_districts = 4
+    batch = validate_assignments(store, np.stack(batch_codes), n_districts, tolerance=0.1)
+    for row, codes in enumerate(batch_codes):
+        single = validate_assignments(store, codes, n_districts, tolerance=0.1)
+        assert np.array_equal(batch["contiguous"][row], single["contiguous"][0])
+        assert np.allclose(batch["population"][row], single["population"][0])
+    assert batch["overall"].tolist() == [True, False, False]
+    assert batch["contiguous"][0].tolist() == [True, True, True, True]
+    assert batch["contiguous"][2].tolist() == [True, True, False, False]
@@ -19,7 +19,7 @@ def _fake_builder(tiny_graph):
 def test_3_episode_smoke(monkeypatch, tiny_graph, tmp_path):
     monkeypatch.setattr(
         "redistricting.env.core.build_precinct_graph",
-        lambda state, basepath: _fake_builder(tiny_graph),
+        lambda state, basepath, **kwargs: _fake_builder(tiny_graph),
     )
     env = GerrymanderingEnv(state="xx", basepath="unused", reward_fn=lambda metrics, weights: 0.0, max_steps=10)
     _graph, features = env.get_graph_observation()
@@ -38,3 +38,31 @@ def test_3_episode_smoke(monkeypatch, tiny_graph, tmp_path):
     assert len(history["episode_rewards"]) == 3
     assert len(history["policy_losses"]) >= 1
 
+
+def test_factorized_action_mode_smoke(monkeypatch, tiny_graph, band_builder, tmp_path):
+    monkeypatch.setattr("redistricting.env.core.build_precinct_graph", band_builder)
+    env = GerrymanderingEnv(
+        state="xx",
+        basepath="unused",
+        reward_fn=lambda metrics, weights: 0.0,
+        max_steps=5,
+        pop_tol=0.5,
+        action_mode="factorized",
+    )
+    assert list(env.action_space.nvec) == [tiny_graph.number_of_nodes(), 4]
+    _graph, features = env.get_graph_observation()
+    agent = PPOAgent(
+        node_feature_dim=features.shape[1],
+        action_dim=int(env.action_space.nvec[1]),
+        hyperparams=PPOHyperParams(k_epochs=2),
+        factorized=True,
+    )
+    trainer = TrainingLoop(
+        env=env,
+        agent=agent,
+        config=TrainingConfig(num_episodes=2, update_frequency=1, save_frequency=1000),
+        run_dir=tmp_path / "run",
+    )
+    history = trainer.train()
+    # Every sampled (node, district) pair was legal, so episodes ran to max_steps.
+    assert history["episode_lengths"] == [5, 5]
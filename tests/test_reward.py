@@ -1,9 +1,11 @@
 """Reward tests."""
 
+import numpy as np
 import pandas as pd
+import pytest
 
 from redistricting.reward.shaping import DeltaRewardWrapper
-from redistricting.reward.zscore import ZScoreReward
+from redistricting.reward.zscore import MetricDirection, ZScoreReward
 
 
 def test_zscore_reward_known_input(tmp_path):
@@ -49,3 +51,59 @@ def test_zscore_reward_ignores_nan_metric(tmp_path):
     reward = reward_fn({"EfficiencyGap": float("nan")}, {"EfficiencyGap": 1.0})
     assert reward == 0.0
 
+
+def test_compiled_scoring_matches_known_zscores(tmp_path):
+    baseline = pd.DataFrame(
+        {
+            "mean": [0.1, 0.5, 0.2, 0.3],
+            "median": [0.1, 0.5, 0.2, 0.3],
+            "std": [0.05, 0.1, 0.0, 0.2],
+        },
+        index=["EfficiencyGap", "PolPopperAvg", "MinOppAvg", "SeatsVotesDiff"],
+    )
+    baseline_path = tmp_path / "baseline_stats.csv"
+    baseline.to_csv(baseline_path)
+    reward_fn = ZScoreReward(str(baseline_path))
+
+    columns = ["SeatsVotesDiff", "EfficiencyGap", "PolPopperAvg", "MinOppAvg", "Unknown"]
+    values = np.array(
+        [
+            [0.1, -0.05, 0.7, 5.0, 9.0],
+            [1.5, 0.4, np.nan, 0.2, np.nan],
+            [np.nan, -0.3, 0.1, -1.0, 0.0],
+        ]
+    )
+    # SeatsVotesDiff is lower-is-better; EfficiencyGap is lower-is-better on |value|;
+    # MinOppAvg has std 0 and Unknown has no baseline row, so both always score 0.
+    expected_z = np.array(
+        [
+            [1.0, 1.0, 2.0, 0.0, 0.0],
+            [-3.0, -3.0, 0.0, 0.0, 0.0],  # -6 clipped; NaN scores 0
+            [0.0, -3.0, -3.0, 0.0, 0.0],  # -4 clipped
+        ]
+    )
+    weights = {
+        "SeatsVotesDiff": 2.0,
+        "EfficiencyGap": 1.0,
+        "PolPopperAvg": 0.5,
+        "MinOppAvg": 1.0,
+        "Unknown": 1.0,
+    }
+    expected = expected_z @ np.array([weights[name] for name in columns])
+    np.testing.assert_allclose(expected, [4.0, -9.0, -4.5])
+
+    for row, z_row in zip(values, expected_z):
+        for name, value, z in zip(columns, row, z_row):
+            assert reward_fn.metric_zscore(name, value) == pytest.approx(z)
+    np.testing.assert_allclose(reward_fn.score_matrix(values, columns, weights), expected)
+    np.testing.assert_allclose(reward_fn.score_matrix(values[0], columns, weights), expected[0])
+    arrays = {name: values[:, i] for i, name in enumerate(columns)}
+    np.testing.assert_allclose(reward_fn.score_arrays(arrays, weights), expected)
+    for row, total in zip(values, expected):
+        assert reward_fn(dict(zip(columns, row)), weights) == pytest.approx(total)
+    assert reward_fn({"PolPopperAvg": None, "SeatsVotesDiff": 0.1}, weights) == pytest.approx(2.0)
+
+    # Editing directions takes effect once `compile()` rebuilds the stored arrays.
+    reward_fn.metric_directions["SeatsVotesDiff"] = MetricDirection()
+    assert reward_fn.compile() is reward_fn.compiled
+    assert reward_fn.metric_zscore("SeatsVotesDiff", 0.1) == pytest.approx(-1.0)
@@ -0,0 +1,157 @@
+"""Shared-memory graph publication tests."""
+
+import multiprocessing
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+from gerrychain import Graph, Partition
+
+from redistricting.env.core import GerrymanderingEnv
+from redistricting.graph.construction import UPDATER_COLUMNS, build_precinct_graph
+from redistricting.graph.metrics import MCalc
+from redistricting.graph.shared import attach_precinct_graph, publish_precinct_graph
+
+
+def _worker_summary(handle):
+    attached = attach_precinct_graph(handle)
+    try:
+        metrics = MCalc().calculate_metrics(
+            attached.partition, include_geometry=True, store=attached.store
+        )
+        return (
+            float(attached.store.column("P0010001").sum()),
+            attached.graph.number_of_edges(),
+            float(metrics["PolPopperAvg"].iloc[0]),
+        )
+    finally:
+        attached.close()
+
+
+def _rss_anon_kib() -> int:
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("RssAnon:"))
+
+
+def _attach_rss_growth(handle):
+    before = _rss_anon_kib()
+    attached = attach_precinct_graph(handle)
+    growth = _rss_anon_kib() - before
+    attached.close()
+    return growth
+
+
+def _unpickle_rss_growth(payload):
+    before = _rss_anon_kib()
+    graph = pickle.loads(payload)
+    growth = _rss_anon_kib() - before
+    del graph
+    return growth
+
+
+def test_attached_graph_matches_published(synthetic_basepath):
+    graph, partition = build_precinct_graph("xx", synthetic_basepath, include_geometry=False)
+    with publish_precinct_graph(graph, partition, district_col="CONG_DIST") as shared:
+        attached = attach_precinct_graph(shared.handle)
+        try:
+            assert list(attached.graph.nodes) == list(graph.nodes)
+            assert dict(attached.partition.assignment) == dict(partition.assignment)
+            assert {frozenset(e) for e in attached.graph.edges} == {
+                frozenset(e) for e in graph.edges
+            }
+            for node, data in graph.nodes(data=True):
+                attrs = attached.graph.nodes[node]
+                assert set(attrs) == {*UPDATER_COLUMNS, "CONG_DIST"}
+                assert attrs["P0010001"] == data["P0010001"]
+            assert not attached.store.column("P0010001").flags.writeable
+            assert attached.graph.geometry_store.get(3).equals(graph.geometry_store.get(3))
+
+            expected = MCalc().calculate_metrics(partition, include_geometry=True)
+            actual = MCalc().calculate_metrics(
+                attached.partition, include_geometry=True, store=attached.store
+            )
+            assert np.allclose(expected.to_numpy(dtype=float), actual.to_numpy(dtype=float))
+
+            ctx = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                total_pop, n_edges, pp_avg = pool.submit(_worker_summary, shared.handle).result()
+            assert total_pop == sum(d["P0010001"] for _n, d in graph.nodes(data=True))
+            assert n_edges == graph.number_of_edges()
+            assert pp_avg == pytest.approx(expected["PolPopperAvg"].iloc[0])
+
+            attached.copy_attributes()
+            for u, v, data in graph.edges(data=True):
+                assert attached.graph.edges[u, v]["shared_perim"] == data["shared_perim"]
+            for node, data in graph.nodes(data=True):
+                assert attached.graph.nodes[node]["area"] == data["area"]
+        finally:
+            attached.close()
+
+
+def test_attaching_processes_do_not_unlink_published_blocks(synthetic_basepath):
+    graph, partition = build_precinct_graph("xx", synthetic_basepath, include_geometry=False)
+    with publish_precinct_graph(graph, partition, district_col="CONG_DIST") as shared:
+        ctx = multiprocessing.get_context("spawn")
+        # Each pool's worker exits before the next attaches; the blocks must survive that.
+        for _ in range(2):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                _total_pop, n_edges, _pp_avg = pool.submit(_worker_summary, shared.handle).result()
+            assert n_edges == graph.number_of_edges()
+
+        # Unrelated interpreters run their own resource tracker, which unlinks on exit.
+        script = (
+            "import pickle, sys\n"
+            "from redistricting.graph.shared import attach_precinct_graph\n"
+            "attached = attach_precinct_graph(pickle.load(sys.stdin.buffer))\n"
+            "print(attached.graph.number_of_edges())\n"
+            "attached.close()\n"
+        )
+        for _ in range(2):
+            result = subprocess.run(
+                [sys.executable, "-c", script],
+                input=pickle.dumps(shared.handle),
+                capture_output=True,
+                cwd=Path(__file__).resolve().parents[1],
+                check=True,
+            )
+            assert int(result.stdout) == graph.number_of_edges()
+            assert b"leaked shared_memory" not in result.stderr
+
+
+@pytest.mark.skipif(not Path("/proc/self/status").exists(), reason="needs Linux /proc")
+def test_attached_worker_does_not_copy_attribute_columns():
+    grid = nx.convert_node_labels_to_integers(nx.grid_2d_graph(120, 120))
+    for node, data in grid.nodes(data=True):
+        data.update({f"attr_{i}": float(node + i) for i in range(60)})
+        data.update({name: 1.0 for name in UPDATER_COLUMNS})
+    for _u, _v, data in grid.edges(data=True):
+        data["shared_perim"] = 1.0
+    graph = Graph.from_networkx(grid)
+    partition = Partition(graph, {n: n // 3600 for n in graph.nodes}, updaters={})
+    ctx = multiprocessing.get_context("spawn")
+    with publish_precinct_graph(graph, partition) as shared:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            attach_growth = pool.submit(_attach_rss_growth, shared.handle).result()
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            copy_growth = pool.submit(_unpickle_rss_growth, pickle.dumps(graph)).result()
+    # The attached worker builds adjacency and partition state but no attribute copies.
+    assert attach_growth < copy_growth / 3
+
+
+def test_env_attaches_to_shared_graph(tiny_graph, mock_partition):
+    with publish_precinct_graph(tiny_graph, mock_partition) as shared:
+        env = GerrymanderingEnv(
+            state="xx",
+            basepath="unused",
+            reward_fn=lambda metrics, weights: 0.0,
+            shared_graph=shared.handle,
+        )
+        assert env.n_precincts == tiny_graph.number_of_nodes()
+        assert env.n_districts == 4
+        assert env.store.column("P0010001").sum() == 100 * tiny_graph.number_of_nodes()
+        env.close()
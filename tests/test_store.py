@@ -0,0 +1,98 @@
+"""PrecinctStore and columnar code path parity tests."""
+
+import numpy as np
+import pytest
+from gerrychain import Partition
+
+from redistricting.env.masking import district_populations, population_bounds
+from redistricting.env.observations import FeatureConfig, build_node_features
+from redistricting.graph.metrics import (
+    TALLY_COLUMNS,
+    MCalc,
+    MetricsEngine,
+    required_columns,
+)
+from redistricting.graph.store import PrecinctStore, district_index
+
+
+def test_store_csr_matches_graph(tiny_graph):
+    store = PrecinctStore.from_graph(tiny_graph, FeatureConfig().columns())
+    assert store.n_nodes == tiny_graph.number_of_nodes()
+    for node in tiny_graph.nodes():
+        idx = store.node_index[node]
+        nbrs = {store.node_ids[j] for j in store.neighbors(idx)}
+        assert nbrs == set(tiny_graph.neighbors(node))
+    assert np.array_equal(store.column("missing_column"), np.zeros(store.n_nodes))
+
+
+def test_columnar_paths_match_dict_paths(tiny_graph, mock_partition):
+    cfg = FeatureConfig()
+    store = PrecinctStore.from_graph(tiny_graph, cfg.columns() + tuple(TALLY_COLUMNS))
+    assignment = dict(mock_partition.assignment)
+
+    assert np.array_equal(
+        build_node_features(tiny_graph, assignment, 4, cfg),
+        build_node_features(tiny_graph, assignment, 4, cfg, store=store),
+    )
+    assert population_bounds(tiny_graph, 4, 0.05) == population_bounds(tiny_graph, 4, 0.05, store)
+    assert district_populations(tiny_graph, assignment, [0, 2]) == district_populations(
+        tiny_graph, assignment, [0, 2], store=store
+    )
+
+    codes = store.assignment_array(assignment, district_index(assignment.values()))
+    assert codes.tolist() == [assignment[n] for n in store.node_ids.tolist()]
+
+    calc = MCalc()
+    expected = calc.calculate_metrics(mock_partition, baseline=True)
+    actual = calc.calculate_metrics(mock_partition, baseline=True, store=store)
+    assert np.allclose(expected.to_numpy(dtype=float), actual.to_numpy(dtype=float), equal_nan=True)
+
+
+def test_metrics_engine_matches_mcalc_exactly_across_flips(tiny_graph, mock_partition):
+    store = PrecinctStore.from_graph(tiny_graph, tuple(TALLY_COLUMNS))
+    assignment = dict(mock_partition.assignment)
+    index = district_index(assignment.values())
+    engine = MetricsEngine(store, store.assignment_array(assignment, index), len(index))
+    calc = MCalc()
+    rng = np.random.default_rng(0)
+    # Random flips, not just legal ones; the last ones empty district 3 entirely.
+    flips = [(int(rng.integers(20)), int(rng.integers(4))) for _ in range(15)]
+    flips += [(n, 0) for n in tiny_graph.nodes if assignment[n] == 3]
+    for node, target in flips:
+        source = assignment[node]
+        assignment[node] = target
+        engine.apply_move(store.node_index[node], index[source], index[target])
+        partition = Partition(mock_partition.graph, assignment, mock_partition.updaters)
+        expected = calc.calculate_metrics(partition).iloc[0].to_dict()
+        actual = engine.metrics()
+        assert actual.keys() == expected.keys()
+        for key, value in expected.items():
+            if value is None or np.isnan(value):
+                assert actual[key] is None or np.isnan(actual[key])
+            else:
+                assert actual[key] == value, key
+
+
+def test_requested_metrics_skip_unused_inputs(monkeypatch, tiny_graph, mock_partition):
+    calc = MCalc()
+    full = calc.calculate_metrics(mock_partition, baseline=True).iloc[0]
+    requested = ["MinOppMin", "EfficiencyGap", "MeanMedianRep"]
+    assert required_columns(requested) == [c for c in TALLY_COLUMNS if c != "P0010001"]
+    assert required_columns(["EfficiencyGap"]) == ["CompDemVot", "CompRepVot"]
+
+    def no_geometry(*args, **kwargs):
+        raise AssertionError("geometry materialized for a metric set that does not need it")
+
+    monkeypatch.setattr("redistricting.graph.metrics.node_geometries", no_geometry)
+    subset = calc.calculate_metrics(mock_partition, include_geometry=True, metrics=requested)
+    assert list(subset.columns) == ["EfficiencyGap", "MinOppMin", "MeanMedianRep"]
+    for name in subset.columns:
+        assert subset[name].iloc[0] == full[name]
+
+    store = PrecinctStore.from_graph(tiny_graph, tuple(TALLY_COLUMNS))
+    assignment = dict(mock_partition.assignment)
+    index = district_index(assignment.values())
+    engine = MetricsEngine(store, store.assignment_array(assignment, index), len(index))
+    assert engine.metrics(["SeatsVotesDiff"]) == {"SeatsVotesDiff": full["SeatsVotesDiff"]}
+    with pytest.raises(ValueError):
+        calc.calculate_metrics(mock_partition, metrics=["NotAMetric"])